@@ -7,9 +7,9 @@
 ::
 
     usage: neurocarto [-h] [-C PATH] [-P NAME] [--selector MODULE:NAME] [--atlas NAME]
-                      [--atlas-root PATH] [--config-file FILE] [--view MODULE:NAME]
-                      [--server-address URL] [--server-port PORT] [--no-open-browser]
-                      [FILE]
+                      [--atlas-root PATH] [--atlas-cache MB] [--atlas-prefetch N]
+                      [--config-file FILE] [--view MODULE:NAME] [--server-address URL]
+                      [--server-port PORT] [--no-open-browser] [FILE]
 
     positional arguments:
       FILE                  open channelmap file.
@@ -30,6 +30,9 @@
     Atlas:
       --atlas NAME          atlas mouse brain name
       --atlas-root PATH     atlas mouse brain download path
+      --atlas-cache MB      memory budget of atlas slice image cache. 0 to disable. default 256 (MB).
+      --atlas-prefetch N    prefetch N neighbouring rotated atlas slices in background. 0 to disable.
+                            default 2.
 
     Bokeh Application:
       --config-file FILE    global config file.
@@ -70,6 +73,8 @@ class CartoConfig:
     # Atlas
     atlas_name: int | str = 25
     atlas_root: Path | None = None
+    atlas_cache: int = 256
+    atlas_prefetch: int = 2
 
     # Application
     config_file: Path | None = None
@@ -109,6 +114,10 @@ def new_parser() -> argparse.ArgumentParser:
                     help='atlas mouse brain name')
     gp.add_argument('--atlas-root', metavar='PATH', type=Path, default=None, dest='atlas_root',
                     help='atlas mouse brain download path')
+    gp.add_argument('--atlas-cache', metavar='MB', type=int, default=256, dest='atlas_cache',
+                    help='memory budget of atlas slice image cache. 0 to disable. default 256 (MB).')
+    gp.add_argument('--atlas-prefetch', metavar='N', type=int, default=2, dest='atlas_prefetch',
+                    help='prefetch N neighbouring rotated atlas slices in background. 0 to disable. default 2.')
 
     #
     gp = ap.add_argument_group('Bokeh Application')
@@ -1,6 +1,6 @@
 import functools
 from pathlib import Path
-from typing import Any, TypedDict
+from typing import Any, TypedDict, NamedTuple
 
 import numpy as np
 from bokeh.application.application import SessionContext
@@ -20,7 +20,7 @@ from neurocarto.views import *
 from neurocarto.views.record import RecordManager
 from . import files
 
-__all__ = ['CartoApp', 'main', 'CartoUserConfig']
+__all__ = ['CartoApp', 'main', 'CartoUserConfig', 'ViewTiming']
 
 
 @doc_link()
@@ -67,6 +67,31 @@ class CartoUserConfig(TypedDict, total=False):
     """
 
 
+@doc_link()
+class ViewTiming(NamedTuple):
+    """Time used by a {DynamicView} on probe updates."""
+
+    count: int
+    """number of updates"""
+
+    total: float
+    """total time in sec"""
+
+    last: float
+    """time of last update in sec"""
+
+    max: float
+    """maximal time of an update in sec"""
+
+    @property
+    def mean(self) -> float:
+        """average time of an update in sec"""
+        return self.total / self.count if self.count else 0
+
+    def add(self, t: float) -> 'ViewTiming':
+        return ViewTiming(self.count + 1, self.total + t, t, max(self.max, t))
+
+
 class CartoApp(BokehApplication):
     """Application of neural probe channelmap editor.
 
@@ -87,6 +112,9 @@ class CartoApp(BokehApplication):
     right_panel_views_config: dict[str, Any] = {}
     """view configuration, channelmap depended"""
 
+    PROBE_UPDATE_BUDGET: float = 0.1
+    """time budget (sec) of a {DynamicView} on a probe update. Views over it are logged as warnings."""
+
     def __init__(self, config: CartoConfig, *, logger: str = 'neurocarto.editor'):
         super().__init__(logger=logger)
         self.config = config
@@ -101,6 +129,15 @@ class CartoApp(BokehApplication):
         self._overwrite_channelmap_file = app_config.get('overwrite_chmap_file', False)
         self._always_save_blueprint_file = app_config.get('always_save_blueprint_file', False)
 
+        if config.atlas_cache > 0:
+            from neurocarto.util.atlas_slice import SLICE_CACHE
+            SLICE_CACHE.budget = config.atlas_cache * 2 ** 20
+
+        self._probe_update_callback = None
+        self._probe_update_generation = 0
+        self.probe_update_timings: dict[str, ViewTiming] = {}
+        """time used by each {DynamicView} on probe updates. dict {view class name: timing}"""
+
     @property
     def title(self) -> str:
         f = self.config.probe_family.upper()
@@ -606,6 +643,12 @@ class CartoApp(BokehApplication):
         super().cleanup(context)
         self.save_user_config()
 
+        for view in self.right_panel_views:
+            try:
+                view.cleanup()
+            except BaseException as e:
+                self.logger.warning('cleanup %s', type(view).__name__, exc_info=e)
+
     # ========= #
     # callbacks #
     # ========= #
@@ -842,7 +885,7 @@ class CartoApp(BokehApplication):
         trigger_fresh = True
         if self.get_editor_userconfig().get('selected_as_pre_selected', False):
             if len([it for it in self.probe_view.electrodes if it.category not in (ProbeDesp.CATE_UNSET, ProbeDesp.CATE_SET)]) == 0:
-                electrodes = self.probe_view.get_captured_electrodes_index(self.probe_view.data_electrodes[ProbeDesp.STATE_USED], reset=False)
+                electrodes = self.probe_view.get_captured_electrodes_index(ProbeDesp.STATE_USED, reset=False)
                 trigger_fresh = False
 
         try:
@@ -853,30 +896,71 @@ class CartoApp(BokehApplication):
             return
 
         if self.auto_btn.active and trigger_fresh:
-            self.on_refresh()
+            self.on_refresh(incremental=True)
         else:
             self.on_probe_update()
 
+    @doc_link()
     def on_probe_update(self):
         """
         callback function to notify the ``DynamicView`` that the probe has updated.
+
+        Updates requested in the same event loop tick are coalesced into one dispatching on the next tick,
+        where all views share one {ProbeUpdate} snapshot. Views with {DynamicView#deferrable} set are
+        updated one tick later, and skipped if a newer update has come or is pending.
         """
+        if self._probe_update_callback is None:
+            self._probe_update_callback = run_later(self._on_probe_update)
+
+    def _on_probe_update(self):
+        self._probe_update_callback = None
+        self._probe_update_generation += 1
+        generation = self._probe_update_generation
+
         self.probe_view.update_electrode()
 
-        mark = TimeMarker()
+        update = ProbeUpdate(self.probe, self.probe_view.channelmap, self.probe_view.electrodes)
+
+        deferred = []
         for view in self.right_panel_views:
             if isinstance(view, DynamicView):
-                view_class = type(view).__name__
-
-                mark.reset()
-                try:
-                    view.on_probe_update(self.probe, self.probe_view.channelmap, self.probe_view.electrodes)
-                except BaseException as e:
-                    t = mark()
-                    self.logger.warning('on_probe_update(%s) used %.2f sec. failed with error', view_class, t, exc_info=e)
+                if view.deferrable:
+                    deferred.append(view)
                 else:
-                    t = mark()
-                    self.logger.debug('on_probe_update(%s) used %.2f sec', view_class, t)
+                    self._on_probe_update_view(view, update)
+
+        if len(deferred):
+            run_later(self._on_probe_update_deferred, generation, deferred, update)
+
+    def _on_probe_update_deferred(self, generation: int, views: list[DynamicView], update: ProbeUpdate):
+        if generation != self._probe_update_generation or self._probe_update_callback is not None:
+            self.logger.debug('on_probe_update() skip %d deferred views', len(views))
+            return
+
+        for view in views:
+            self._on_probe_update_view(view, update)
+
+    def _on_probe_update_view(self, view: DynamicView, update: ProbeUpdate):
+        view_class = type(view).__name__
+
+        mark = TimeMarker()
+        try:
+            view.on_probe_snapshot(update)
+        except BaseException as e:
+            t = mark()
+            self.logger.warning('on_probe_update(%s) used %.2f sec. failed with error', view_class, t, exc_info=e)
+        else:
+            t = mark()
+            if t > self.PROBE_UPDATE_BUDGET:
+                self.logger.warning('on_probe_update(%s) used %.2f sec, over budget', view_class, t)
+            else:
+                self.logger.debug('on_probe_update(%s) used %.2f sec', view_class, t)
+
+        try:
+            timing = self.probe_update_timings[view_class]
+        except KeyError:
+            timing = ViewTiming(0, 0, 0, 0)
+        self.probe_update_timings[view_class] = timing.add(t)
 
     def on_autoupdate(self, active: bool):
         """
@@ -886,14 +970,18 @@ class CartoApp(BokehApplication):
         """
         self.logger.debug('on_autoupdate(active=%s)', active)
         if active:
-            self.on_refresh()
+            self.on_refresh(incremental=True)
 
-    def on_refresh(self):
+    @doc_link()
+    def on_refresh(self, *, incremental: bool = False):
         """
         callback function to refresh the electrode selection.
+
+        :param incremental: only re-select the part affected by category changes. Auto-update uses it
+            to keep the editing latency independent of probe size. See {ProbeView#refresh_selection()}.
         """
         try:
-            self.probe_view.refresh_selection()
+            self.probe_view.refresh_selection(incremental=incremental)
         except BaseException:
             self.log_message('refresh fail')
         else:
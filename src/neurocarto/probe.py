@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import abc
+import functools
 import sys
 from collections.abc import Hashable, Iterable, Sequence
 from pathlib import Path
@@ -118,16 +119,25 @@ class ElectrodeDesp:
     def copy(self, r: ElectrodeDesp, **kwargs) -> Self:
         """A copy helper function to move data from *r*.
 
+        It copies the fields declared in :class:`ElectrodeDesp`, the slots of subclasses,
+        and the public attributes in ``r.__dict__``.
+
         :param r: copy reference electrode
         :param kwargs: overwrite fields. If you want a deep copy for particular fields.
         :return: self
         """
-        for attr in dir(r):
-            if not attr.startswith('_'):
-                if attr in kwargs:
-                    setattr(self, attr, kwargs[attr])
-                else:
+        fields = _electrode_fields(type(r))
+        if (d := getattr(r, '__dict__', None)) is not None:
+            fields = [*fields, *[it for it in d if not it.startswith('_') and it not in fields]]
+
+        for attr in fields:
+            if attr in kwargs:
+                setattr(self, attr, kwargs[attr])
+            else:
+                try:
                     setattr(self, attr, getattr(r, attr))
+                except AttributeError:  # unset slot
+                    pass
         return self
 
     def __hash__(self) -> int:
@@ -148,6 +158,18 @@ class ElectrodeDesp:
         return f'Electrode[{self.channel}:{self.electrode}]({pos}){{state={self.state}, category={self.category}}}'
 
 
+@functools.cache
+def _electrode_fields(cls: type[ElectrodeDesp]) -> tuple[str, ...]:
+    """public fields of ElectrodeDesp, and public slot names of *cls* and its super classes."""
+    ret = [it for it in ElectrodeDesp.__annotations__ if not it.startswith('_')]
+    for t in reversed(cls.__mro__):
+        slots = getattr(t, '__slots__', ())
+        if isinstance(slots, str):
+            slots = (slots,)
+        ret.extend([it for it in slots if not it.startswith('_') and it not in ret])
+    return tuple(ret)
+
+
 K = TypeVar('K')
 E = TypeVar('E', bound=ElectrodeDesp)  # electrode
 M = TypeVar('M')  # channelmap
@@ -567,6 +589,29 @@ class ProbeDesp(Generic[M, E], metaclass=abc.ABCMeta):
         else:
             return [it for it in electrodes if not self.probe_rule(chmap, e, it)]
 
+    @doc_link()
+    def reset_electrode_state(self, chmap: M, electrodes: list[E]):
+        """
+        Reset the state of all *electrodes* according to the channelmap *chmap*.
+
+        Electrodes in the channelmap are {#STATE_USED}, electrodes which break the {#probe_rule()}
+        with any of them are {#STATE_DISABLED}, and others are {#STATE_UNUSED}.
+
+        The default implementation uses {#all_channels()} and {#invalid_electrodes()}. Subclasses are
+        encouraged to overwrite it with a faster way, because it is called after every selection.
+
+        :param chmap: a channelmap instance
+        :param electrodes: an electrode list. States are updated in place.
+        """
+        for e in electrodes:
+            e.state = self.STATE_UNUSED
+
+        c = self.all_channels(chmap, electrodes)
+        for e in self.invalid_electrodes(chmap, c, electrodes):
+            e.state = self.STATE_DISABLED
+        for e in c:
+            e.state = self.STATE_USED
+
     @abc.abstractmethod
     def select_electrodes(self, chmap: M, blueprint: list[E], **kwargs) -> M:
         """
@@ -579,6 +624,22 @@ class ProbeDesp(Generic[M, E], metaclass=abc.ABCMeta):
         """
         pass
 
+    @doc_link()
+    def reselect_electrodes(self, chmap: M, blueprint: list[E], changed: list[E], **kwargs) -> M:
+        """
+        Re-selecting electrodes after the categories of *changed* electrodes are modified.
+
+        Probe could override it to keep the part of *chmap* which is not affected by *changed*,
+        and only re-select electrodes locally. The default implementation uses {#select_electrodes()}.
+
+        :param chmap: previous selection result.
+        :param blueprint: channelmap blueprint
+        :param changed: electrodes whose category differ from the blueprint used by *chmap*.
+        :param kwargs: other parameters.
+        :return: generated channelmap
+        """
+        return self.select_electrodes(chmap, blueprint, **kwargs)
+
     @abc.abstractmethod
     def save_blueprint(self, blueprint: list[E]) -> NDArray[np.int_]:
         """
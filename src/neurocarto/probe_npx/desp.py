@@ -9,7 +9,7 @@ from numpy.typing import NDArray
 
 from neurocarto.config import CartoConfig
 from neurocarto.probe import ProbeDesp, ElectrodeDesp
-from neurocarto.probe_npx.npx import ChannelMap, Electrode, e2p, e2cb, ProbeType, ChannelHasUsedError
+from neurocarto.probe_npx.npx import ChannelMap, Electrode, e2p, ProbeType, ChannelHasUsedError, probe_table
 from neurocarto.util.utils import SPHINX_BUILD, doc_link
 
 if TYPE_CHECKING:
@@ -36,6 +36,12 @@ class NpxElectrodeDesp(ElectrodeDesp):
     channel: int
     """channel identify."""
 
+    __slots__ = 's', 'x', 'y', 'electrode', 'channel', 'state', 'category'
+
+    def __init__(self):
+        self.state = 0
+        self.category = 0
+
 
 class NpxProbeDesp(ProbeDesp[ChannelMap, NpxElectrodeDesp]):
     """A Neuropixels probe interface."""
@@ -133,7 +139,7 @@ class NpxProbeDesp(ProbeDesp[ChannelMap, NpxElectrodeDesp]):
 
         # Benchmark:
         #   run_script(profile)[optimize,sample_times=100,single_process=True]
-        #       matrix              : 13.2108 seconds (current)
+        #       matrix              : 13.2108 seconds
         #         all_electrodes()     2.4466 seconds 18.52%
         #           e2cb()             0.3989 seconds 3.02%
         #       list-for-loop       : 19.7327 seconds
@@ -143,22 +149,19 @@ class NpxProbeDesp(ProbeDesp[ChannelMap, NpxElectrodeDesp]):
         #           copy()            11.8218 seconds 50.39%
         #             dir()           4.01177 seconds 17.10%
         #             startswith()    2.38829 seconds 10.18%
-        from .npx import electrode_coordinate
+        #       probe_table()       : (current)
+        #         the coordinate arrays are computed once per probe type,
+        #         only the electrode objects are created in each call.
+        table = probe_table(probe_type)
 
         ret = []
-        electrodes = electrode_coordinate(probe_type, electrode_unit='cr')
-        x, y = e2p(probe_type, (electrodes[:, 0], electrodes[:, 1], electrodes[:, 2]))
-        channels, _ = e2cb(probe_type, (electrodes[:, 0], electrodes[:, 1], electrodes[:, 2]))
-
-        for i, (s, c, r) in enumerate(electrodes):
+        for (s, c, r), x, y, ch in zip(table.electrodes.tolist(), table.x.tolist(), table.y.tolist(), table.channels.tolist()):
             d = NpxElectrodeDesp()
-
-            d.s = s = int(s)
-            d.electrode = (s, int(c), int(r))
-            d.x = int(x[i])
-            d.y = int(y[i])
-            d.channel = int(channels[i])
-
+            d.s = s
+            d.electrode = (s, c, r)
+            d.x = x
+            d.y = y
+            d.channel = ch
             ret.append(d)
 
         return ret
@@ -214,6 +217,27 @@ class NpxProbeDesp(ProbeDesp[ChannelMap, NpxElectrodeDesp]):
         else:
             return [it for it in electrodes if e.channel == it.channel]
 
+    def reset_electrode_state(self, chmap: ChannelMap, electrodes: list[NpxElectrodeDesp]):
+        # channel-indexed: an electrode is disabled when its channel is taken by a used electrode.
+        table = probe_table(chmap.probe_type)
+
+        used = np.zeros(len(table.electrodes), dtype=bool)
+        pos = chmap.channel_position
+        pos = pos[pos[:, 0] >= 0]
+        used[table.index[pos[:, 0], pos[:, 1], pos[:, 2]]] = True
+
+        index = np.array([it.electrode for it in electrodes], dtype=int).reshape(-1, 3)
+        index = table.index[index[:, 0], index[:, 1], index[:, 2]]
+        used = used[index]
+        channels = table.channels[index]
+
+        taken = np.zeros(chmap.probe_type.n_channels, dtype=bool)
+        taken[channels[used]] = True
+
+        state = np.where(used, self.STATE_USED, np.where(taken[channels], self.STATE_DISABLED, self.STATE_UNUSED))
+        for e, s in zip(electrodes, state.tolist()):
+            e.state = s
+
     def save_blueprint(self, blueprint: list[NpxElectrodeDesp]) -> NDArray[np.int_]:
         ret = np.zeros((len(blueprint), 5), dtype=int)  # (N, (shank, col, row, state, category))
         for i, e in enumerate(blueprint):  # type: int, NpxElectrodeDesp
@@ -253,6 +277,21 @@ class NpxProbeDesp(ProbeDesp[ChannelMap, NpxElectrodeDesp]):
         from .select import electrode_select
         return electrode_select(self, chmap, blueprint, selector=selector, **kwargs)
 
+    @doc_link()
+    def reselect_electrodes(self, chmap: ChannelMap, blueprint: list[NpxElectrodeDesp], changed: list[NpxElectrodeDesp], *,
+                            selector='default',
+                            **kwargs) -> ChannelMap:
+        """
+        Only the default selector supports local re-selection. Others fall back to {#select_electrodes()}.
+
+        :see: {neurocarto.probe_npx.select_default_fast#electrode_reselect()}
+        """
+        if selector not in ('default', 'default-fast'):
+            return self.select_electrodes(chmap, blueprint, selector=selector, **kwargs)
+
+        from .select_default_fast import electrode_reselect
+        return electrode_reselect(self, chmap, blueprint, changed, **kwargs)
+
     # ================== #
     # extension function #
     # ================== #
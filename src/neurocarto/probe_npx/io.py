@@ -257,25 +257,23 @@ def to_numpy(chmap: ChannelMap, unit: Literal['cr', 'xy', 'sxy'] = 'cr') -> NDAr
     :see: {ChannelMap#to_numpy()}
     """
 
+    pos = chmap._position
+    s, c, r = pos[pos[:, 0] >= 0].astype(int).T
+
     match unit:
         case 'cr':
-            def mapper(e: Electrode):
-                return e.shank, e.column, e.row
+            return np.column_stack([s, c, r])
         case 'xy':
             from .npx import e2p
-
-            def mapper(e: Electrode):
-                x, y = e2p(chmap.probe_type, e)
-                return int(x), int(y)
+            x, y = e2p(chmap.probe_type, (s, c, r))
+            return np.column_stack([x, y]).astype(int)
         case 'sxy':
-            def mapper(e: Electrode):
-                x, y = e2p(chmap.probe_type, e)
-                return e.shank, int(x), int(y)
+            from .npx import e2p
+            x, y = e2p(chmap.probe_type, (s, c, r))
+            return np.column_stack([s, x.astype(int), y.astype(int)])
         case _:
             raise ValueError(f'unsupported unit: {unit}')
 
-    return np.array([mapper(e) for e in chmap.electrodes])
-
 # ======================= #
 # pandas/polars dataframe #
 # ======================= #
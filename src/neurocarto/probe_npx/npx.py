@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import functools
 import math
 import sys
 from collections.abc import Iterable, Iterator, Sized, Sequence
@@ -34,6 +35,8 @@ __all__ = [
     'ChannelMap',
     'channel_coordinate',
     'electrode_coordinate',
+    'ProbeTable',
+    'probe_table',
     'ChannelHasUsedError',
 ]
 
@@ -241,17 +244,32 @@ Es = list[int] | NDArray[np.int_] | list[Electrode]
 """electrode set"""
 
 
-def _channelmap_len_(e: list[Electrode | None]) -> int:
-    """number of channels (C) in e"""
-    ret = 0
-    for it in e:
-        if it is not None:
-            ret += 1
-    return ret
+@functools.cache
+def _channel_table(probe_type: ProbeType) -> NDArray[np.int_]:
+    """
+    Channel lookup table for all electrodes. The result is cached and read-only.
+
+    :param probe_type:
+    :return: Array[C:int, S, C, R]
+    """
+    ns = probe_type.n_shank
+    nc = probe_type.n_col_shank
+    nr = probe_type.n_row_shank
+    s, c, r = np.mgrid[0:ns, 0:nc, 0:nr]
+    channels, _ = e2cb(probe_type, (s.ravel(), c.ravel(), r.ravel()))
+    channels = channels.reshape((ns, nc, nr))
+    channels.setflags(write=False)
+    return channels
 
 
 class ChannelMap:
-    """Neuropixels channelmap"""
+    """
+    Neuropixels channelmap
+
+    Besides the electrode objects, electrode positions are kept in an ``Array[int16, C, (S, C, R)]`` array,
+    and the channel of an electrode position is looked up from a shared table, so electrode lookup, adding
+    and removing are constant time.
+    """
 
     __match_args__ = 'probe_type',
 
@@ -263,11 +281,12 @@ class ChannelMap:
         :param probe_type: probe type code, ProbeType or a ChannelMap for coping.
         :param electrodes: pre-add electrodes
         """
+        copy_from = None
         if isinstance(probe_type, ChannelMap):
             chmap = cast(ChannelMap, probe_type)
             probe_type = chmap.probe_type
             if electrodes is None:
-                electrodes = chmap._electrodes
+                copy_from = chmap
             if meta is None:
                 meta = chmap.meta
 
@@ -278,18 +297,22 @@ class ChannelMap:
 
         self.probe_type: Final[ProbeType] = probe_type
         self._electrodes: Final[list[Electrode | None]] = [None] * probe_type.n_channels
+        self._position: Final[NDArray[np.int16]] = np.full((probe_type.n_channels, 3), -1, dtype=np.int16)
         self._reference = 0
         self.meta: NpxMeta | None = meta
 
-        # pre compute channels for all electrodes
-        ns = probe_type.n_shank
-        nc = probe_type.n_col_shank
-        nr = probe_type.n_row_shank
-        s, c, r = np.mgrid[0:ns, 0:nc, 0:nr]
-        channels, _ = e2cb(probe_type, (s.ravel(), c.ravel(), r.ravel()))
-        self._channels: Final[NDArray[np.int_]] = channels.reshape((ns, nc, nr))
+        # channels for all electrodes
+        self._channels: Final[NDArray[np.int_]] = _channel_table(probe_type)
+
+        if copy_from is not None:
+            # electrodes in copy_from have been validated.
+            for c, e in enumerate(copy_from._electrodes):
+                if e is not None:
+                    t = self._electrodes[c] = Electrode(e.shank, e.column, e.row)
+                    t.copy(e)
+            self._position[:] = copy_from._position
 
-        if electrodes is not None:
+        elif electrodes is not None:
             for e in electrodes:
                 if e is not None:
                     t = self.add_electrode(e)
@@ -436,11 +459,7 @@ class ChannelMap:
         return to_polars(self)
 
     def __hash__(self):
-        ret = 3 + 5 * self.probe_type.code
-        ret = 7 * ret + 11 * self._reference
-        for e in self._electrodes:
-            ret = 7 * ret + 11 * (0 if e is None else hash(e))
-        return ret
+        return hash((self.probe_type.code, self._reference, self._position.tobytes()))
 
     def __eq__(self, other):
         try:
@@ -448,12 +467,7 @@ class ChannelMap:
                 return False
             if self._reference != other._reference:
                 return False
-            if len(self._electrodes) != len(other._electrodes):
-                return False
-            for e, t in zip(self._electrodes, other._electrodes):
-                if e != t:
-                    return False
-            return True
+            return np.array_equal(self._position, other._position)
         except AttributeError:
             return False
 
@@ -468,16 +482,12 @@ class ChannelMap:
 
     def __len__(self) -> int:
         """number of channels"""
-        return _channelmap_len_(self._electrodes)
+        return int(np.count_nonzero(self._position[:, 0] >= 0))
 
     def __contains__(self, item: E | None) -> bool:
         """Is the electrode *item* in the map?"""
         if item is None:
-            for e in self._electrodes:
-                if e is None:
-                    return True
-            else:
-                return False
+            return bool(np.any(self._position[:, 0] < 0))
 
         return self.get_electrode(item) is not None
 
@@ -576,7 +586,18 @@ class ChannelMap:
 
     @property
     def channels(self) -> Channels:
-        return Channels(self.probe_type, self._electrodes)
+        return Channels(self)
+
+    @property
+    def channel_position(self) -> NDArray[np.int16]:
+        """
+        Read-only view of electrode positions of all channels. Empty channels are filled with -1.
+
+        :return: Array[int16, C, (S, C, R)]
+        """
+        ret = self._position.view()
+        ret.setflags(write=False)
+        return ret
 
     @doc_link()
     def get_electrode(self, electrode: E) -> Electrode | None:
@@ -604,14 +625,50 @@ class ChannelMap:
             case _:
                 raise TypeError()
 
-        for e in self._electrodes:
-            if e is not None and e.shank == shank and e.column == column and e.row == row:
-                return e
+        return self._get_electrode(int(shank), int(column), int(row))
+
+    def _get_electrode(self, shank: int, column: int, row: int) -> Electrode | None:
+        if (c := self._find_channel(shank, column, row)) is None:
+            return None
+        return self._electrodes[c]
+
+    def _find_channel(self, shank: int, column: int, row: int) -> int | None:
+        """channel occupied by electrode (shank, column, row)."""
+        if not (0 <= shank < self.probe_type.n_shank and
+                0 <= column < self.probe_type.n_col_shank and
+                0 <= row < self.probe_type.n_row_shank):
+            return None
+
+        c = int(self._channels[shank, column, row])
+        if self._electrodes[c] is None:
+            return None
+
+        s, cc, r = self._position[c]
+        if s == shank and cc == column and r == row:
+            return c
         return None
 
+    def _set_channel(self, c: int, e: Electrode | None):
+        self._electrodes[c] = e
+        if e is None:
+            self._position[c] = -1
+        else:
+            self._position[c] = (e.shank, e.column, e.row)
+
+    def _match_channels(self, shank, cols, rows) -> NDArray[np.int_]:
+        """channels occupied by electrodes in the given positions, see {Electrodes#__getitem__()}."""
+        pos = self._position
+        mask = pos[:, 0] >= 0
+        for i, (x, n) in enumerate([(shank, self.probe_type.n_shank),
+                                    (cols, self.probe_type.n_col_shank),
+                                    (rows, self.probe_type.n_row_shank)]):
+            if x is not None:
+                mask &= np.isin(pos[:, i], list(as_set(x, n)))
+        return np.flatnonzero(mask)
+
     @property
     def electrodes(self) -> Electrodes:
-        return Electrodes(self.probe_type, self._electrodes)
+        return Electrodes(self)
 
     def disconnect_channels(self) -> list[int]:
         """
@@ -678,7 +735,7 @@ class ChannelMap:
             else:
                 raise ChannelHasUsedError(t)
         else:
-            self._electrodes[c] = e = Electrode(shank, column, row, in_used)
+            self._set_channel(c, e := Electrode(shank, column, row, in_used))
             return e
 
     @doc_link()
@@ -702,11 +759,12 @@ class ChannelMap:
             case _:
                 raise TypeError(repr(electrode))
 
-        for c, e in enumerate(self._electrodes):
-            if e is not None and e.shank == shank and e.column == column and e.row == row:
-                self._electrodes[c] = None
-                return e
-        return None
+        if (c := self._find_channel(int(shank), int(column), int(row))) is None:
+            return None
+
+        e = self._electrodes[c]
+        self._set_channel(c, None)
+        return e
 
 
 class ChannelHasUsedError(RuntimeError):
@@ -724,15 +782,14 @@ class ChannelHasUsedError(RuntimeError):
 class Channels(Sized, Iterable[Electrode | None]):
     """Dict-like accessor for navigating channels via channel ID."""
 
-    __slots__ = '_probe_type', '_electrodes'
+    __slots__ = '_chmap',
 
-    def __init__(self, probe_type: ProbeType, electrode: list[Electrode | None]):
-        self._probe_type: Final = probe_type
-        self._electrodes: Final = electrode
+    def __init__(self, chmap: ChannelMap):
+        self._chmap: Final = chmap
 
     def __len__(self):
         """number of total channels"""
-        return self._probe_type.n_channels
+        return self._chmap.probe_type.n_channels
 
     def __contains__(self, item: int | None) -> bool:
         """
@@ -743,13 +800,15 @@ class Channels(Sized, Iterable[Electrode | None]):
             ``True`` if there are at least one channel is unbound (when *item* is ``None``).
         """
         if item is None:
-            for e in self._electrodes:
-                if e is None:
-                    return True
-            else:
-                return False
+            return None in self._chmap
+
+        return self._chmap._electrodes[item] is not None
 
-        return self._electrodes[item] is not None
+    def _channels(self, item) -> Iterable[int]:
+        if isinstance(item, slice):
+            return range(len(self))[item]
+        else:
+            return np.arange(len(self))[item].tolist()
 
     def __getitem__(self, item):
         """
@@ -758,12 +817,10 @@ class Channels(Sized, Iterable[Electrode | None]):
         :param item: channel id, id-slicing, or id-array
         :return: electrode/s
         """
+        electrodes = self._chmap._electrodes
         if all_int(item):
-            return self._electrodes[int(item)]
-        elif isinstance(item, slice):
-            return [self._electrodes[it] for it in range(len(self._electrodes))[item]]
-        else:
-            return [self._electrodes[int(it)] for it in np.arange(len(self._electrodes))[item]]
+            return electrodes[int(item)]
+        return [electrodes[it] for it in self._channels(item)]
 
     def __setitem__(self, item, value: Electrode):
         """
@@ -772,17 +829,15 @@ class Channels(Sized, Iterable[Electrode | None]):
         :param item: channel id, id-slicing, or id-array
         :param value: copy reference
         """
+        electrodes = self._chmap._electrodes
         if all_int(item):
-            if (e := self._electrodes[int(item)]) is not None:
-                e.copy(value)
-        elif isinstance(item, slice):
-            for it in range(len(self._electrodes))[item]:
-                if (e := self._electrodes[it]) is not None:
-                    e.copy(value)
+            item = [int(item)]
         else:
-            for it in np.arange(len(self._electrodes))[item]:
-                if (e := self._electrodes[int(it)]) is not None:
-                    e.copy(value)
+            item = self._channels(item)
+
+        for it in item:
+            if (e := electrodes[it]) is not None:
+                e.copy(value)
 
     def __delitem__(self, item):
         """
@@ -791,32 +846,29 @@ class Channels(Sized, Iterable[Electrode | None]):
         :param item: channel id, id-slicing, or id-array
         """
         if all_int(item):
-            self._electrodes[int(item)] = None
-        elif isinstance(item, slice):
-            for it in range(len(self._electrodes))[item]:
-                self._electrodes[it] = None
+            item = [int(item)]
         else:
-            for it in np.arange(len(self._electrodes))[item]:
-                self._electrodes[int(it)] = None
+            item = self._channels(item)
+
+        for it in item:
+            self._chmap._set_channel(it, None)
 
     def __iter__(self) -> Iterator[Electrode | None]:
         """iterating over channels, index imply its channel ID."""
-        for e in self._electrodes:
-            yield e
+        yield from self._chmap._electrodes
 
 
 class Electrodes(Sized, Iterable[Electrode]):
     """Dict-like accessor for navigating channels via electrode position (shank, column, row)"""
 
-    __slots__ = '_probe_type', '_electrodes'
+    __slots__ = '_chmap',
 
-    def __init__(self, probe_type: ProbeType, electrode: list[Electrode | None]):
-        self._probe_type: Final = probe_type
-        self._electrodes: Final = electrode
+    def __init__(self, chmap: ChannelMap):
+        self._chmap: Final = chmap
 
     def __len__(self):
         """number of channels (C)"""
-        return _channelmap_len_(self._electrodes)
+        return len(self._chmap)
 
     def __contains__(self, item) -> bool:
         """
@@ -831,34 +883,35 @@ class Electrodes(Sized, Iterable[Electrode]):
             case _:
                 return True
 
-    def __getitem__(self, item):
+    def _channels(self, item) -> Iterable[int] | None:
         """
-        Get electrode via electrode positions.
+        Channels occupied by electrodes at position *item*.
 
-        :param item: tuple of (shank:I, column:I, row:I), where type I = `None | int | slice | tuple (union) | Iterable[int]`
-        :return: found electrode/s
+        :return: channels, or ``None`` if *item* is an exact position.
         """
-        shank, cols, rows = item
         match item:
             case (None, None, None):
-                return [e for e in self._electrodes if e is not None]
+                return np.flatnonzero(self._chmap._position[:, 0] >= 0).tolist()
             case (shank, column, row) if all_int(shank, column, row):
-                for e in self._electrodes:
-                    if e is not None and e.shank == shank and e.column == column and e.row == row:
-                        return e
                 return None
-            case (_, _, _):
-                shank = as_set(shank, self._probe_type.n_shank)
-                cols = as_set(cols, self._probe_type.n_col_shank)
-                rows = as_set(rows, self._probe_type.n_row_shank)
-                ret = []
-                for e in self._electrodes:
-                    if e is not None and e.shank in shank and e.column in cols and e.row in rows:
-                        ret.append(e)
-                return ret
+            case (shank, cols, rows):
+                return self._chmap._match_channels(shank, cols, rows).tolist()
             case _:
                 raise TypeError(repr(item))
 
+    def __getitem__(self, item):
+        """
+        Get electrode via electrode positions.
+
+        :param item: tuple of (shank:I, column:I, row:I), where type I = `None | int | slice | tuple (union) | Iterable[int]`
+        :return: found electrode/s
+        """
+        if (channels := self._channels(item)) is None:
+            return self._chmap._get_electrode(*map(int, item))
+
+        electrodes = self._chmap._electrodes
+        return [electrodes[c] for c in channels]
+
     def __setitem__(self, item, value: Electrode):
         """
         Copy electrode properties.
@@ -866,27 +919,14 @@ class Electrodes(Sized, Iterable[Electrode]):
         :param item: tuple of (shank:I, column:I, row:I), where type I = `None | int | slice | tuple (union) | Iterable[int]`
         :param value: copy reference
         """
-        shank, cols, rows = item
-        match item:
-            case (None, None, None):
-                for e in self._electrodes:
-                    if e is not None:
-                        e.copy(value)
-                return [e for e in self._electrodes if e is not None]
-            case (shank, column, row) if all_int(shank, column, row):
-                for e in self._electrodes:
-                    if e is not None and e.shank == shank and e.column == column and e.row == row:
-                        e.copy(value)
-                return None
-            case (_, _, _):
-                shank = as_set(shank, self._probe_type.n_shank)
-                cols = as_set(cols, self._probe_type.n_col_shank)
-                rows = as_set(rows, self._probe_type.n_row_shank)
-                for e in self._electrodes:
-                    if e is not None and e.shank in shank and e.column in cols and e.row in rows:
-                        e.copy(value)
-            case _:
-                raise TypeError(repr(item))
+        if (channels := self._channels(item)) is None:
+            if (e := self._chmap._get_electrode(*map(int, item))) is not None:
+                e.copy(value)
+            return
+
+        electrodes = self._chmap._electrodes
+        for c in channels:
+            electrodes[c].copy(value)
 
     def __delitem__(self, item):
         """
@@ -894,31 +934,17 @@ class Electrodes(Sized, Iterable[Electrode]):
 
         :param item: tuple of (shank:I, column:I, row:I), where type I = `None | int | slice | tuple (union) | Iterable[int]`
         """
-        shank, cols, rows = item
-        match item:
-            case (None, None, None):
-                for c in range(len(self._electrodes)):
-                    self._electrodes[c] = None
-            case (shank, column, row) if all_int(shank, column, row):
-                for c in range(len(self._electrodes)):
-                    e = self._electrodes[c]
-                    if e is not None and e.shank == shank and e.column == column and e.row == row:
-                        self._electrodes[c] = e
-                        break
-            case (_, _, _):
-                shank = as_set(shank, self._probe_type.n_shank)
-                cols = as_set(cols, self._probe_type.n_col_shank)
-                rows = as_set(rows, self._probe_type.n_row_shank)
-                for c in range(len(self._electrodes)):
-                    e = self._electrodes[c]
-                    if e is not None and e.shank in shank and e.column in cols and e.row in rows:
-                        self._electrodes[c] = None
-            case _:
-                raise TypeError(repr(item))
+        if (channels := self._channels(item)) is None:
+            if (c := self._chmap._find_channel(*map(int, item))) is None:
+                return
+            channels = [c]
+
+        for c in channels:
+            self._chmap._set_channel(c, None)
 
     def __iter__(self) -> Iterator[Electrode]:
         """iterating over channels"""
-        for e in self._electrodes:
+        for e in self._chmap._electrodes:
             if e is not None:
                 yield e
 
@@ -1015,6 +1041,63 @@ def electrode_coordinate(probe_type: int | str | ChannelMap | ProbeType,
         ])
 
 
+class ProbeTable(NamedTuple):
+    """
+    Pre-computed electrode tables for a probe type. All arrays are read-only.
+
+    The electrode ordering is the same as :func:`electrode_coordinate()` (in ``'cr'`` unit).
+    """
+
+    electrodes: NDArray[np.int_]
+    """electrode position, Array[int, E, (S, C, R)]"""
+
+    channels: NDArray[np.int_]
+    """electrode channel, Array[int, E]"""
+
+    index: NDArray[np.int_]
+    """electrode index lookup table, Array[E:int, S, C, R]"""
+
+    x: NDArray[np.int_]
+    """electrode x position, Array[um:int, E]"""
+
+    y: NDArray[np.int_]
+    """electrode y position, Array[um:int, E]"""
+
+
+_PROBE_TABLE: dict[ProbeType, ProbeTable] = {}
+
+
+def probe_table(probe_type: ProbeType) -> ProbeTable:
+    """
+    Get the electrode tables for *probe_type*. The result is cached.
+
+    The electrode ordering is the same as :meth:`~neurocarto.probe_npx.desp.NpxProbeDesp.all_electrodes()`.
+
+    :param probe_type:
+    :return:
+    """
+    if (ret := _PROBE_TABLE.get(probe_type, None)) is None:
+        ret = _PROBE_TABLE[probe_type] = _new_probe_table(probe_type)
+    return ret
+
+
+def _new_probe_table(probe_type: ProbeType) -> ProbeTable:
+    electrodes = electrode_coordinate(probe_type, electrode_unit='cr')
+    s = electrodes[:, 0]
+    c = electrodes[:, 1]
+    r = electrodes[:, 2]
+    channels, _ = e2cb(probe_type, (s, c, r))
+    x, y = e2p(probe_type, (s, c, r))
+
+    index = np.full((probe_type.n_shank, probe_type.n_col_shank, probe_type.n_row_shank), -1, dtype=int)
+    index[s, c, r] = np.arange(len(electrodes))
+
+    ret = ProbeTable(electrodes, channels, index, x.astype(int), y.astype(int))
+    for a in ret:
+        a.setflags(write=False)
+    return ret
+
+
 ELECTRODE_MAP_21 = (np.array([1, 7, 5, 3], dtype=int),
                     np.array([0, 4, 8, 12], dtype=int))
 ELECTRODE_MAP_24 = np.array([
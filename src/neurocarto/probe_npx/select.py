@@ -1,5 +1,7 @@
 from typing import Protocol
 
+import numpy as np
+
 from neurocarto.util.utils import import_name, doc_link
 from .desp import NpxProbeDesp, NpxElectrodeDesp
 from .npx import ChannelMap
@@ -8,6 +10,7 @@ __all__ = ['electrode_select', 'load_select', 'ElectrodeSelector']
 
 BUILTIN_SELECTOR = {
     'default': 'neurocarto.probe_npx.select_default:electrode_select',
+    'default-fast': 'neurocarto.probe_npx.select_default_fast:electrode_select',
     'weaker': 'neurocarto.probe_npx.select_weaker:electrode_select',
 }
 
@@ -15,13 +18,16 @@ BUILTIN_SELECTOR = {
 class ElectrodeSelector(Protocol):
     """An electrode selector protocol class."""
 
-    def __call__(self, desp: NpxProbeDesp, chmap: ChannelMap, blueprint: list[NpxElectrodeDesp], **kwargs) -> ChannelMap:
+    def __call__(self, desp: NpxProbeDesp, chmap: ChannelMap, blueprint: list[NpxElectrodeDesp], *,
+                 rng: np.random.Generator = None,
+                 **kwargs) -> ChannelMap:
         """
         Selecting electrodes based on the electrode blueprint.
 
         :param desp:
         :param chmap: channelmap type. It is a reference.
         :param blueprint: channelmap blueprint
+        :param rng: random generator. If not given, use the global random state.
         :param kwargs: other parameters.
         :return: generated channelmap
         """
@@ -52,7 +58,7 @@ def electrode_select(desp: NpxProbeDesp, chmap: ChannelMap, blueprint: list[NpxE
     :param chmap: channelmap type. It is a reference.
     :param blueprint: channelmap blueprint
     :param selector: selector name
-    :param kwargs: selector keyword parameters.
+    :param kwargs: selector keyword parameters, such as *rng*, a ``numpy.random.Generator``.
     :return: {load_select()}
     :see:
     """
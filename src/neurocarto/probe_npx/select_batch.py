@@ -0,0 +1,307 @@
+"""
+Batched sampling for the Neuropixels default electrode selection method.
+
+It runs many independent selections simultaneously on an ``Array[bool, N, E]`` state matrix,
+following the same rules as :mod:`neurocarto.probe_npx.select_default`.
+
+Picking an electrode uniformly from the remaining candidates is equivalent to scanning a random
+permutation of the candidates and taking the first one which is still available. Hence, each sample
+scans its own random permutation of each category, and all samples advance one position per step.
+The recursive local density rules of the default selector always walk along a straight line
+(electrodes visited before have been removed from the candidate set), so they are implemented as
+lock-step walks over all samples.
+
+The outcomes follow the same distribution as the default selector, but they do not consume the
+random state in the same way.
+
+Both the straight line walks and the column wrap-around (the column next to the last column is the
+first column, as the default selector does) assume two columns per shank, which holds for all
+current Neuropixels probe types. Other probe types are rejected by :func:`batch_table`.
+"""
+from __future__ import annotations
+
+import functools
+from typing import NamedTuple
+
+import numpy as np
+from numpy.typing import NDArray
+
+from .desp import NpxProbeDesp, NpxElectrodeDesp
+from .npx import ChannelMap, ProbeType, probe_table
+from .select_default_fast import PRIORITY, Struct as DefaultStruct
+
+__all__ = ['BatchSelection', 'batch_select']
+
+# (column, row) offset
+STEP_REMOVE: dict[int, list[tuple[int, int]]] = {
+    NpxProbeDesp.CATE_FULL: [],
+    NpxProbeDesp.CATE_HALF: [(1, 0), (0, 1), (0, -1)],
+    NpxProbeDesp.CATE_QUARTER: [(1, 0), (0, 1), (1, 1), (0, -1), (1, -1), (0, 2), (0, -2)],
+}
+"""removed neighbors when an electrode is added."""
+
+STEP_WALK: dict[int, tuple[tuple[int, int], tuple[int, int]]] = {
+    NpxProbeDesp.CATE_FULL: ((0, 1), (0, -1)),
+    NpxProbeDesp.CATE_HALF: ((1, 1), (1, -1)),
+    NpxProbeDesp.CATE_QUARTER: ((1, 2), (1, -2)),
+}
+"""walking directions of the local density rules."""
+
+
+class BatchTable(NamedTuple):
+    """Pre-computed electrode tables used by batch selection. All arrays are read-only."""
+
+    electrodes: NDArray[np.int_]
+    """electrode position, Array[int, E, (S, C, R)]"""
+
+    channels: NDArray[np.int_]
+    """electrode channel, Array[C:int, E]"""
+
+    members: NDArray[np.int_]
+    """electrodes of each channel, Array[E:int, C, B], padded with E."""
+
+    neighbors: dict[tuple[int, int], NDArray[np.int_]]
+    """{(column, row) offset: Array[E:int, E]}. Column is wrapped around, and missing neighbor is E."""
+
+
+@functools.cache
+def batch_table(probe_type: ProbeType) -> BatchTable:
+    """
+    Get the electrode tables for *probe_type*. The result is cached.
+
+    :param probe_type:
+    :return:
+    :raise ValueError: *probe_type* does not have two columns per shank.
+    """
+    if probe_type.n_col_shank != 2:
+        # column wrap-around and straight line walks only match the default selector on two columns.
+        raise ValueError(f'batch selection requires 2 columns per shank, got {probe_type.n_col_shank}')
+
+    table = probe_table(probe_type)
+    electrodes = table.electrodes
+    channels = table.channels
+    n = len(channels)
+
+    count = np.bincount(channels, minlength=probe_type.n_channels)
+    members = np.full((probe_type.n_channels, int(np.max(count))), n, dtype=int)
+    for c in range(probe_type.n_channels):
+        i = np.flatnonzero(channels == c)
+        members[c, :len(i)] = i
+
+    s = electrodes[:, 0]
+    c = electrodes[:, 1]
+    r = electrodes[:, 2]
+    nc = probe_type.n_col_shank
+    nr = probe_type.n_row_shank
+
+    offsets = set([(1, 0)])
+    for it in STEP_REMOVE.values():
+        offsets.update(it)
+    for it in STEP_WALK.values():
+        offsets.update(it)
+
+    neighbors = {}
+    for dc, dr in offsets:
+        tc = (c + dc) % nc
+        tr = r + dr
+        valid = (0 <= tr) & (tr < nr)
+        t = np.full((n,), n, dtype=int)
+        t[valid] = table.index[s[valid], tc[valid], tr[valid]]
+        t.setflags(write=False)
+        neighbors[(dc, dr)] = t
+
+    members.setflags(write=False)
+    return BatchTable(electrodes, channels, members, neighbors)
+
+
+class BatchSelection(NamedTuple):
+    """Outcomes of a batch selection."""
+
+    probe_type: ProbeType
+
+    categories: NDArray[np.int_]
+    """blueprint, Array[category:int, E]"""
+
+    selected: NDArray[np.bool_]
+    """selection matrix, Array[bool, N, E]"""
+
+    def __len__(self) -> int:
+        """number of samples"""
+        return len(self.selected)
+
+    def n_selected(self) -> NDArray[np.int_]:
+        """
+        number of selected electrodes of each sample.
+
+        :return: Array[int, N]
+        """
+        return np.count_nonzero(self.selected, axis=1)
+
+    def complete(self) -> NDArray[np.bool_]:
+        """
+        Does each sample get a complete channelmap?
+
+        :return: Array[bool, N]
+        """
+        return self.n_selected() == self.probe_type.n_channels
+
+    def summation(self) -> NDArray[np.int_]:
+        """
+        count of selected times for each electrode.
+
+        :return: Array[count:int, S, C, R]
+        """
+        probe_type = self.probe_type
+        electrodes = probe_table(probe_type).electrodes
+        ret = np.zeros((probe_type.n_shank, probe_type.n_col_shank, probe_type.n_row_shank), dtype=int)
+        ret[electrodes[:, 0], electrodes[:, 1], electrodes[:, 2]] = np.count_nonzero(self.selected, axis=0)
+        return ret
+
+    def efficiency(self) -> tuple[NDArray[np.float64], NDArray[np.float64]]:
+        """
+        area and channel efficiency of each sample.
+
+        :return: tuple of (Array[aeff:float, N], Array[ceff:float, N])
+        """
+        from .stat import npx_channel_efficiency_matrix
+        return npx_channel_efficiency_matrix(self.categories, self.selected, self.probe_type.n_channels)
+
+    def channelmap(self, i: int) -> ChannelMap:
+        """
+        Build the channelmap of the *i*-th sample.
+
+        :param i: sample index
+        :return:
+        """
+        electrodes = probe_table(self.probe_type).electrodes
+        return ChannelMap(self.probe_type, [tuple(it) for it in electrodes[self.selected[i]]])
+
+    def channelmaps(self) -> list[ChannelMap]:
+        """Build the channelmaps of all samples."""
+        return [self.channelmap(i) for i in range(len(self))]
+
+
+def batch_select(chmap: ChannelMap | ProbeType,
+                 blueprint: list[NpxElectrodeDesp] | NDArray[np.int_],
+                 sample_times: int, *,
+                 batch_size: int = 1000,
+                 rng: np.random.Generator = None) -> BatchSelection:
+    """
+    Run *sample_times* default electrode selections.
+
+    :param chmap: channelmap type. It is a reference.
+    :param blueprint: channelmap blueprint, an electrode list or a blueprint array
+        which follows the ordering of :meth:`NpxProbeDesp.all_electrodes()`.
+    :param sample_times: number of samples N
+    :param batch_size: number of samples run simultaneously. It limits the memory usage.
+    :param rng: random generator
+    :return: outcomes
+    """
+    probe_type = chmap.probe_type if isinstance(chmap, ChannelMap) else chmap
+
+    if batch_size <= 0:
+        raise ValueError(f'illegal batch_size : {batch_size}')
+
+    if rng is None:
+        rng = np.random.default_rng()
+
+    table = batch_table(probe_type)
+    n_electrodes = len(table.channels)
+
+    s = DefaultStruct.new(probe_type, blueprint)
+
+    # pre-selected and excluded electrodes are the same for all samples.
+    for e in s.blueprint_index[s.blueprint_category == NpxProbeDesp.CATE_SET]:
+        s.add(int(e))
+    s.candidate[s.blueprint_index[s.blueprint_category == NpxProbeDesp.CATE_EXCLUDED]] = False
+
+    # padding E as a sentinel
+    categories = np.append(s.categories, -1)
+    candidate = np.append(s.candidate, False)
+    selected = np.zeros((n_electrodes + 1,), dtype=bool)
+    selected[s.selected[s.selected >= 0]] = True
+
+    ret = []
+    for i in range(0, sample_times, batch_size):
+        n = min(batch_size, sample_times - i)
+        ret.append(_batch_select(table, categories, candidate, selected, n, rng))
+
+    if len(ret) == 0:
+        ret = np.zeros((0, n_electrodes), dtype=bool)
+    else:
+        ret = np.concatenate(ret)
+
+    return BatchSelection(probe_type, s.categories, ret)
+
+
+def _batch_select(table: BatchTable,
+                  categories: NDArray[np.int_],
+                  candidate: NDArray[np.bool_],
+                  selected: NDArray[np.bool_],
+                  n: int,
+                  rng: np.random.Generator) -> NDArray[np.bool_]:
+    s = _BatchState(table, categories, np.tile(candidate, (n, 1)), np.tile(selected, (n, 1)))
+    samples = np.arange(n)
+
+    for p in PRIORITY:
+        index = np.flatnonzero(categories == p)
+        if len(index) == 0:
+            continue
+
+        order = index[np.argsort(rng.random((n, len(index))), axis=1)]
+        for k in range(len(index)):
+            e = order[:, k]
+            a = s.candidate[samples, e]
+            if np.any(a):
+                s.update(p, samples[a], e[a])
+
+            # all samples have consumed this category
+            if k % 64 == 63 and not np.any(s.candidate[:, index]):
+                break
+
+    return s.selected[:, :-1]
+
+
+class _BatchState(NamedTuple):
+    table: BatchTable
+    categories: NDArray[np.int_]  # Array[category:int, E+1]
+    candidate: NDArray[np.bool_]  # Array[bool, N, E+1]
+    selected: NDArray[np.bool_]  # Array[bool, N, E+1]
+
+    def add(self, n: NDArray[np.int_], e: NDArray[np.int_]):
+        # a candidate never shares channel with selected electrodes.
+        self.selected[n, e] = True
+        self.candidate[n[:, None], self.table.members[self.table.channels[e]]] = False
+
+    def get(self, n: NDArray[np.int_], e: NDArray[np.int_], p: int, offset: tuple[int, int]) -> NDArray[np.bool_]:
+        t = self.table.neighbors[offset][e]
+        return t, self.candidate[n, t] & (self.categories[t] == p)
+
+    def update(self, p: int, n: NDArray[np.int_], e: NDArray[np.int_]):
+        if p not in STEP_WALK:
+            self.add(n, e)
+            return
+
+        self.step(p, n, e)
+        for offset in STEP_WALK[p]:
+            self.walk(p, n, e, offset)
+
+    def step(self, p: int, n: NDArray[np.int_], e: NDArray[np.int_]):
+        self.add(n, e)
+
+        if p == NpxProbeDesp.CATE_FULL:
+            t, a = self.get(n, e, p, (1, 0))
+            if np.any(a):
+                self.add(n[a], t[a])
+        else:
+            for offset in STEP_REMOVE[p]:
+                t, a = self.get(n, e, p, offset)
+                self.candidate[n[a], t[a]] = False
+
+    def walk(self, p: int, n: NDArray[np.int_], e: NDArray[np.int_], offset: tuple[int, int]):
+        while len(n):
+            t, a = self.get(n, e, p, offset)
+            n = n[a]
+            e = t[a]
+            if len(n):
+                self.step(p, n, e)
@@ -4,13 +4,16 @@ Neuropixels default electrode selection method.
 """
 import random
 
+import numpy as np
+
 from .desp import NpxProbeDesp, NpxElectrodeDesp, K
 from .npx import ChannelMap, ProbeType
 
 __all__ = ['electrode_select']
 
 
-def electrode_select(desp: NpxProbeDesp, chmap: ChannelMap, blueprint: list[NpxElectrodeDesp], **kwargs) -> ChannelMap:
+def electrode_select(desp: NpxProbeDesp, chmap: ChannelMap, blueprint: list[NpxElectrodeDesp],
+                     rng: np.random.Generator = None, **kwargs) -> ChannelMap:
     ret = desp.new_channelmap(chmap)
 
     cand: dict[K, NpxElectrodeDesp] = {it.electrode: it for it in desp.all_electrodes(ret)}
@@ -29,13 +32,13 @@ def electrode_select(desp: NpxProbeDesp, chmap: ChannelMap, blueprint: list[NpxE
             except KeyError:
                 pass
 
-    return select_loop(desp, ret, cand, **kwargs)
+    return select_loop(desp, ret, cand, rng=rng, **kwargs)
 
 
 def select_loop(desp: NpxProbeDesp, chmap: ChannelMap, cand: dict[K, NpxElectrodeDesp],
-                **kwargs) -> ChannelMap:
+                rng: np.random.Generator = None, **kwargs) -> ChannelMap:
     while len(cand):
-        p, e = pick_electrode(cand)
+        p, e = pick_electrode(cand, rng)
         if p == NpxProbeDesp.CATE_EXCLUDED:
             break
         elif e is not None:
@@ -46,28 +49,35 @@ def select_loop(desp: NpxProbeDesp, chmap: ChannelMap, cand: dict[K, NpxElectrod
     return chmap
 
 
-def pick_electrode(cand: dict[K, NpxElectrodeDesp]) -> tuple[int, NpxElectrodeDesp | None]:
+def pick_electrode(cand: dict[K, NpxElectrodeDesp], rng: np.random.Generator = None) -> tuple[int, NpxElectrodeDesp | None]:
     if len(cand) == 0:
         return NpxProbeDesp.CATE_EXCLUDED, None
 
     if len(ret := [e for e in cand.values() if e.category == NpxProbeDesp.CATE_FULL]) > 0:
-        return NpxProbeDesp.CATE_FULL, random.choice(ret)
+        return NpxProbeDesp.CATE_FULL, _choice(rng, ret)
 
     if len(ret := [e for e in cand.values() if e.category == NpxProbeDesp.CATE_HALF]) > 0:
-        return NpxProbeDesp.CATE_HALF, random.choice(ret)
+        return NpxProbeDesp.CATE_HALF, _choice(rng, ret)
 
     if len(ret := [e for e in cand.values() if e.category == NpxProbeDesp.CATE_QUARTER]) > 0:
-        return NpxProbeDesp.CATE_QUARTER, random.choice(ret)
+        return NpxProbeDesp.CATE_QUARTER, _choice(rng, ret)
 
     if len(ret := [e for e in cand.values() if e.category == NpxProbeDesp.CATE_LOW]) > 0:
-        return NpxProbeDesp.CATE_LOW, random.choice(ret)
+        return NpxProbeDesp.CATE_LOW, _choice(rng, ret)
 
     if len(ret := [e for e in cand.values() if e.category == NpxProbeDesp.CATE_UNSET]) > 0:
-        return NpxProbeDesp.CATE_UNSET, random.choice(ret)
+        return NpxProbeDesp.CATE_UNSET, _choice(rng, ret)
 
     return NpxProbeDesp.CATE_EXCLUDED, None
 
 
+def _choice(rng: np.random.Generator | None, ret: list[NpxElectrodeDesp]) -> NpxElectrodeDesp:
+    # use global random module state when rng is not given.
+    if rng is None:
+        return random.choice(ret)
+    return ret[rng.integers(len(ret))]
+
+
 def update(desp: NpxProbeDesp, chmap: ChannelMap, cand: dict[K, NpxElectrodeDesp], e: NpxElectrodeDesp, category: int):
     match category:
         case NpxProbeDesp.CATE_FULL:
@@ -0,0 +1,277 @@
+"""
+Neuropixels default electrode selection method, array-based implementation.
+
+It follows the same category priority and local density rules as :mod:`neurocarto.probe_npx.select_default`,
+and consumes the ``random`` module (or the given ``numpy.random.Generator``) in the same way, so both selectors
+give the same channelmap under the same random state. Instead of a candidate dictionary of electrode objects,
+it keeps the candidate set as a boolean mask over all electrodes, and removes channel conflicts with a single
+vectorized update.
+"""
+from __future__ import annotations
+
+import random
+from typing import NamedTuple
+
+import numpy as np
+from numpy.typing import NDArray
+
+from .desp import NpxProbeDesp, NpxElectrodeDesp
+from .npx import ChannelMap, ProbeType, ProbeTable, probe_table
+
+__all__ = ['electrode_select', 'electrode_reselect']
+
+PRIORITY = (
+    NpxProbeDesp.CATE_FULL,
+    NpxProbeDesp.CATE_HALF,
+    NpxProbeDesp.CATE_QUARTER,
+    NpxProbeDesp.CATE_LOW,
+    NpxProbeDesp.CATE_UNSET,
+)
+"""category picking order"""
+
+
+def electrode_select(desp: NpxProbeDesp, chmap: ChannelMap, blueprint: list[NpxElectrodeDesp],
+                     rng: np.random.Generator = None, **kwargs) -> ChannelMap:
+    s = Struct.new(chmap.probe_type, blueprint)
+
+    # add pre-selected, follow blueprint ordering
+    for e in s.blueprint_index[s.blueprint_category == NpxProbeDesp.CATE_SET]:
+        s.add(int(e))
+
+    # remove excluded electrodes from the candidate set
+    s.candidate[s.blueprint_index[s.blueprint_category == NpxProbeDesp.CATE_EXCLUDED]] = False
+
+    select_loop(s, rng)
+
+    return build_channelmap(desp, chmap, s)
+
+
+def electrode_reselect(desp: NpxProbeDesp, chmap: ChannelMap, blueprint: list[NpxElectrodeDesp],
+                       changed: list[NpxElectrodeDesp], *,
+                       margin: int = 2,
+                       rng: np.random.Generator = None,
+                       **kwargs) -> ChannelMap:
+    """
+    Re-select electrodes around the *changed* electrodes, and keep other selected electrodes in *chmap*.
+
+    The affected region covers the rows within *margin* rows of the changed electrodes on the same shank.
+    Electrodes of *chmap* outside the region are kept as if they were picked by the selector, including
+    their local density rules, unless its channel could be taken by an electrode in the region with
+    a higher priority. Then the freed channels are filled in the same way as :func:`electrode_select()`.
+
+    :param desp:
+    :param chmap: previous selection result.
+    :param blueprint: new blueprint
+    :param changed: electrodes whose category changed.
+    :param margin: number of extra rows around changed electrodes.
+    :param rng: random generator
+    :return: new channelmap
+    """
+    s = Struct.new(chmap.probe_type, blueprint)
+    electrodes = s.table.electrodes
+
+    region = np.zeros(s.table.index.shape, dtype=bool)
+    for e in changed:
+        es, _, er = e.electrode
+        region[es, :, max(0, er - margin):er + margin + 1] = True
+    affected = region[electrodes[:, 0], electrodes[:, 1], electrodes[:, 2]]
+
+    # priority rank of each electrode, lower is higher. pre-selected electrodes are never displaced.
+    rank = np.full((len(electrodes),), len(PRIORITY), dtype=int)
+    for i, p in enumerate(PRIORITY):
+        rank[s.categories == p] = i
+    rank[s.categories == NpxProbeDesp.CATE_SET] = -1
+
+    # the highest priority of region electrodes in each channel
+    contest = affected & (s.categories != NpxProbeDesp.CATE_EXCLUDED)
+    channel_rank = np.full((chmap.probe_type.n_channels,), len(PRIORITY) + 1, dtype=int)
+    np.minimum.at(channel_rank, s.table.channels[contest], rank[contest])
+    affected |= channel_rank[s.table.channels] < rank
+
+    # add pre-selected, follow blueprint ordering
+    for e in s.blueprint_index[s.blueprint_category == NpxProbeDesp.CATE_SET]:
+        s.add(int(e))
+
+    # keep previous selected electrodes outside the affected region
+    for t in chmap.electrodes:
+        e = int(s.table.index[t.shank, t.column, t.row])
+        if not affected[e]:
+            keep(s, e)
+
+    # remove excluded electrodes from the candidate set
+    s.candidate[s.blueprint_index[s.blueprint_category == NpxProbeDesp.CATE_EXCLUDED]] = False
+
+    select_loop(s, rng)
+
+    return build_channelmap(desp, chmap, s)
+
+
+class Struct(NamedTuple):
+    table: ProbeTable
+    categories: NDArray[np.int_]  # Array[category:int, E]
+    candidate: NDArray[np.bool_]  # Array[bool, E]
+    selected: NDArray[np.int_]  # Array[E:int, C], -1 for empty channel
+    blueprint_index: NDArray[np.int_]  # Array[E:int, N], follow blueprint ordering
+    blueprint_category: NDArray[np.int_]  # Array[category:int, N], follow blueprint ordering
+
+    @classmethod
+    def new(cls, probe_type: ProbeType, blueprint: list[NpxElectrodeDesp] | NDArray[np.int_]) -> Struct:
+        """
+
+        :param probe_type:
+        :param blueprint: an electrode list, or a blueprint array which follows the ordering of
+            :meth:`NpxProbeDesp.all_electrodes()`.
+        :return:
+        """
+        table = probe_table(probe_type)
+        n = len(table.channels)
+
+        if isinstance(blueprint, np.ndarray):
+            if blueprint.shape != (n,):
+                raise ValueError(f'blueprint shape mismatch : {blueprint.shape}')
+            index = np.arange(n)
+            category = blueprint.astype(int)
+        elif len(blueprint):
+            pos = np.array([it.electrode for it in blueprint], dtype=int)
+            index = table.index[pos[:, 0], pos[:, 1], pos[:, 2]]
+            category = np.array([it.category for it in blueprint], dtype=int)
+        else:
+            index = np.zeros((0,), dtype=int)
+            category = np.zeros((0,), dtype=int)
+
+        categories = np.full((n,), NpxProbeDesp.CATE_UNSET, dtype=int)
+        categories[index] = category
+        candidate = np.ones((n,), dtype=bool)
+        selected = np.full((probe_type.n_channels,), -1, dtype=int)
+        return Struct(table, categories, candidate, selected, index, category)
+
+    def add(self, e: int):
+        channel = self.table.channels[e]
+        if self.selected[channel] < 0:
+            self.selected[channel] = e
+
+        # remove e and all electrodes which share the same channel from the candidate set.
+        self.candidate[self.table.channels == channel] = False
+
+    def remove(self, e: int | None):
+        if e is not None:
+            self.candidate[e] = False
+
+    def get(self, e: int, c: int, r: int) -> int | None:
+        """
+        Get the candidate electrode at relative position (*c*, *r*) of the electrode *e*, which
+        has the same category as *e*.
+
+        :param e: electrode index
+        :param c: column offset, wrapped around columns.
+        :param r: row offset
+        :return: electrode index. ``None`` if not found.
+        """
+        index = self.table.index
+        es, ec, er = self.table.electrodes[e]
+        nr = index.shape[2]
+        ec = (ec + c) % index.shape[1]
+        er = er + r
+        if not (0 <= er < nr):
+            return None
+
+        t = int(index[es, ec, er])
+        if self.candidate[t] and self.categories[t] == self.categories[e]:
+            return t
+        return None
+
+
+def select_loop(s: Struct, rng: np.random.Generator = None):
+    masks = [(p, s.categories == p) for p in PRIORITY]
+
+    while len(masks):
+        p, mask = masks[0]
+        cand = np.flatnonzero(s.candidate & mask)
+        if len(cand) == 0:
+            # candidate set only shrinks, so this category will never be picked again.
+            del masks[0]
+            continue
+
+        if rng is None:
+            e = random.choice(cand)
+        else:
+            e = cand[rng.integers(len(cand))]
+
+        update(s, int(e), p)
+
+
+def update(s: Struct, e: int, category: int):
+    match category:
+        case NpxProbeDesp.CATE_FULL:
+            return update_d1(s, e)
+        case NpxProbeDesp.CATE_HALF:
+            return update_d2(s, e)
+        case NpxProbeDesp.CATE_QUARTER:
+            return update_d4(s, e)
+        case NpxProbeDesp.CATE_LOW | NpxProbeDesp.CATE_UNSET:
+            return s.add(e)
+        case _:
+            raise ValueError()
+
+
+KEEP_REMOVE: dict[int, list[tuple[int, int]]] = {
+    NpxProbeDesp.CATE_HALF: [(1, 0), (0, 1), (0, -1)],
+    NpxProbeDesp.CATE_QUARTER: [(1, 0), (0, 1), (1, 1), (0, -1), (1, -1), (0, 2), (0, -2)],
+}
+"""removed neighbors (column, row) of a kept electrode, the non-recursive part of update_d2 and update_d4."""
+
+
+def keep(s: Struct, e: int):
+    s.add(e)
+    for c, r in KEEP_REMOVE.get(int(s.categories[e]), []):
+        s.remove(s.get(e, c, r))
+
+
+def update_d1(s: Struct, e: int):
+    s.add(e)
+
+    if (t := s.get(e, 1, 0)) is not None:
+        s.add(t)
+
+    if (t := s.get(e, 0, 1)) is not None:
+        update_d1(s, t)
+    if (t := s.get(e, 0, -1)) is not None:
+        update_d1(s, t)
+
+
+def update_d2(s: Struct, e: int):
+    s.add(e)
+    s.remove(s.get(e, 1, 0))
+    s.remove(s.get(e, 0, 1))
+    s.remove(s.get(e, 0, -1))
+
+    if (t := s.get(e, 1, 1)) is not None:
+        update_d2(s, t)
+    if (t := s.get(e, 1, -1)) is not None:
+        update_d2(s, t)
+
+
+def update_d4(s: Struct, e: int):
+    s.add(e)
+    s.remove(s.get(e, 1, 0))
+    s.remove(s.get(e, 0, 1))
+    s.remove(s.get(e, 1, 1))
+    s.remove(s.get(e, 0, -1))
+    s.remove(s.get(e, 1, -1))
+    s.remove(s.get(e, 0, 2))
+    s.remove(s.get(e, 0, -2))
+
+    if (t := s.get(e, 1, 2)) is not None:
+        update_d4(s, t)
+    if (t := s.get(e, 1, -2)) is not None:
+        update_d4(s, t)
+
+
+def build_channelmap(desp: NpxProbeDesp, chmap: ChannelMap, s: Struct) -> ChannelMap:
+    ret = desp.new_channelmap(chmap)
+
+    electrodes = s.table.electrodes
+    for e in s.selected[s.selected >= 0]:
+        ret.add_electrode(tuple(electrodes[e]), exist_ok=True)
+
+    return ret
@@ -6,6 +6,8 @@ from __future__ import annotations
 
 import random
 
+import numpy as np
+
 from .desp import NpxProbeDesp, NpxElectrodeDesp, K
 from .npx import ChannelMap
 
@@ -13,7 +15,8 @@ __all__ = ['electrode_select']
 
 
 def electrode_select(desp: NpxProbeDesp, chmap: ChannelMap, blueprint: list[NpxElectrodeDesp],
-                     ignore_preselected=False, ignore_exclude=False, **kwargs) -> ChannelMap:
+                     ignore_preselected=False, ignore_exclude=False,
+                     rng: np.random.Generator = None, **kwargs) -> ChannelMap:
     ret = desp.new_channelmap(chmap)
     cand: dict[K, NpxElectrodeDesp] = {it.electrode: it for it in desp.all_electrodes(ret)}
     for e in blueprint:
@@ -34,13 +37,13 @@ def electrode_select(desp: NpxProbeDesp, chmap: ChannelMap, blueprint: list[NpxE
                 except KeyError:
                     pass
 
-    return select_loop(desp, ret, cand, **kwargs)
+    return select_loop(desp, ret, cand, rng=rng, **kwargs)
 
 
 def select_loop(desp: NpxProbeDesp, chmap: ChannelMap, cand: dict[K, NpxElectrodeDesp],
-                ignore_exclude=False, **kwargs) -> ChannelMap:
+                ignore_exclude=False, rng: np.random.Generator = None, **kwargs) -> ChannelMap:
     while len(cand):
-        e = pick_electrode(cand)
+        e = pick_electrode(cand, rng)
         if e.category == NpxProbeDesp.CATE_EXCLUDED and ignore_exclude:
             pass
         else:
@@ -49,8 +52,10 @@ def select_loop(desp: NpxProbeDesp, chmap: ChannelMap, cand: dict[K, NpxElectrod
     return chmap
 
 
-def pick_electrode(cand: dict[K, NpxElectrodeDesp]) -> NpxElectrodeDesp | None:
-    return random.choice(list(cand.values()))
+def pick_electrode(cand: dict[K, NpxElectrodeDesp], rng: np.random.Generator = None) -> NpxElectrodeDesp | None:
+    if rng is None:
+        return random.choice(list(cand.values()))
+    return list(cand.values())[rng.integers(len(cand))]
 
 
 def _add(desp: NpxProbeDesp, chmap: ChannelMap, cand: dict[K, NpxElectrodeDesp], e: NpxElectrodeDesp):
@@ -4,77 +4,176 @@ It has a *weaker* local density rule compared to the default one.
 """
 from __future__ import annotations
 
-from collections.abc import Iterator
+import functools
+import itertools
 from typing import NamedTuple
 
 import numpy as np
 from numpy.typing import NDArray
 
-from .desp import NpxProbeDesp, NpxElectrodeDesp, K
-from .npx import ChannelMap, ProbeType
+from .desp import NpxProbeDesp, NpxElectrodeDesp
+from .npx import ChannelMap, ProbeType, probe_table
 
 __all__ = ['electrode_select']
 
+STENCIL: dict[int, list[tuple[bool, int, int]]] = {
+    # o e o
+    NpxProbeDesp.CATE_FULL: [
+        (False, -1, 0), (False, 1, 0),
+    ],
+    # o x o
+    # x e x
+    # o x o
+    NpxProbeDesp.CATE_HALF: [
+        (True, -1, 0), (True, 1, 0), (True, 0, 1), (True, 0, -1),
+        (False, 1, 1), (False, 1, -1), (False, -1, 1), (False, -1, -1),
+    ],
+    # ? x ?
+    # x x x
+    # x e x
+    # x x x
+    # ? x ?
+    NpxProbeDesp.CATE_QUARTER: [
+        (True, -1, 0), (True, 1, 0),
+        (True, -1, -1), (True, 0, -1), (True, 1, -1),
+        (True, -1, 1), (True, 0, 1), (True, 1, 1),
+        (True, 0, 2), (True, 0, -2),
+        (False, 1, 2), (False, 1, -2), (False, -1, 2), (False, -1, -2),
+    ],
+}
+"""local density rule for each category. list of (excluded?, column offset, row offset)"""
+
 
 def electrode_select(desp: NpxProbeDesp, chmap: ChannelMap, blueprint: list[NpxElectrodeDesp],
-                     **kwargs) -> ChannelMap:
+                     rng: np.random.Generator = None, **kwargs) -> ChannelMap:
     probe_type = chmap.probe_type
 
     s = Struct.new(desp, chmap)
     s.init_blueprint(blueprint)
     s.init_probability()
 
-    for e in np.random.permutation(np.nonzero(s.categories == NpxProbeDesp.CATE_SET)[0]):
+    # use global numpy random state when rng is not given.
+    permutation = np.random.permutation if rng is None else rng.permutation
+    for e in permutation(np.nonzero(s.categories == NpxProbeDesp.CATE_SET)[0]):
         s.add(e)
 
-    _select_loop(probe_type, s)
+    _select_loop(probe_type, s, rng)
 
     return build_channelmap(desp, chmap, s)
 
 
+class WeakerTable(NamedTuple):
+    """Pre-computed electrode tables used by weaker selector. All arrays are read-only."""
+
+    electrodes: NDArray[np.int_]
+    """electrode position, Array[int, E, (S, C, R)]"""
+
+    index: NDArray[np.int_]
+    """electrode index lookup table, Array[E:int, S, C, R]"""
+
+    channels: NDArray[np.int_]
+    """electrode channel, Array[C:int, E]"""
+
+    channel_ptr: NDArray[np.int_]
+    """electrodes of channel ``c`` are ``channel_electrodes[channel_ptr[c]:channel_ptr[c+1]]``, Array[int, C+1]"""
+
+    channel_electrodes: NDArray[np.int_]
+    """electrodes grouped by channels, Array[E:int, E]"""
+
+    neighbors: dict[int, tuple[NDArray[np.int_], NDArray[np.int_]]]
+    """{category: (excluded, enhanced)} neighbor index matrix Array[E:int, E, K], -1 for missing neighbor."""
+
+
+@functools.cache
+def weaker_table(probe_type: ProbeType) -> WeakerTable:
+    """
+    Get the electrode tables for *probe_type*. The result is cached.
+
+    :param probe_type:
+    :return:
+    """
+    table = probe_table(probe_type)
+    electrodes = table.electrodes
+    index = table.index
+    channels = table.channels
+
+    channel_electrodes = np.argsort(channels, kind='stable')
+    channel_ptr = np.searchsorted(channels[channel_electrodes], np.arange(probe_type.n_channels + 1))
+
+    s = electrodes[:, 0]
+    c = electrodes[:, 1]
+    r = electrodes[:, 2]
+    nc = probe_type.n_col_shank
+    nr = probe_type.n_row_shank
+
+    neighbors = {}
+    for category, stencil in STENCIL.items():
+        matrix = np.full((len(electrodes), len(stencil)), -1, dtype=int)
+        for k, (_, dc, dr) in enumerate(stencil):
+            tc = c + dc
+            tr = r + dr
+            valid = (0 <= tc) & (tc < nc) & (0 <= tr) & (tr < nr)
+            matrix[valid, k] = index[s[valid], tc[valid], tr[valid]]
+
+        excluded = np.array([it[0] for it in stencil])
+        ex = np.ascontiguousarray(matrix[:, excluded])
+        en = np.ascontiguousarray(matrix[:, ~excluded])
+        ex.setflags(write=False)
+        en.setflags(write=False)
+        neighbors[category] = (ex, en)
+
+    channel_ptr.setflags(write=False)
+    channel_electrodes.setflags(write=False)
+    return WeakerTable(electrodes, index, channels, channel_ptr, channel_electrodes, neighbors)
+
+
 class Struct(NamedTuple):
-    electrodes: list[NpxElectrodeDesp]
-    index: dict[K, int]
+    table: WeakerTable
     categories: NDArray[np.int_]
-    channels: NDArray[np.int_]
     probability: NDArray[np.float64]
+    candidate: NDArray[np.float64]  # probability of unselected electrodes, 0 for selected electrodes.
 
     @classmethod
     def new(cls, desp: NpxProbeDesp, chmap: ChannelMap):
-        electrodes = desp.all_electrodes(chmap)
-        categories = np.full((len(electrodes),), desp.CATE_UNSET, dtype=int)
-        probability = np.full((len(electrodes),), 0.0, dtype=float)
-        channels = np.array([it.channel for it in electrodes])
-        index: dict[K, int] = {
-            it.electrode: i
-            for i, it in enumerate(electrodes)
-        }
-        return Struct(electrodes, index, categories, channels, probability)
+        table = weaker_table(chmap.probe_type)
+        categories = np.full((len(table.channels),), desp.CATE_UNSET, dtype=int)
+        probability = np.full((len(table.channels),), 0.0, dtype=float)
+        candidate = np.full((len(table.channels),), 0.0, dtype=float)
+        return Struct(table, categories, probability, candidate)
 
     def init_blueprint(self, blueprint: list[NpxElectrodeDesp]):
-        for e in blueprint:
-            self.categories[self.index[e.electrode]] = e.category
+        if len(blueprint):
+            n = len(blueprint)
+            pos = itertools.chain.from_iterable([it.electrode for it in blueprint])
+            pos = np.fromiter(pos, dtype=int, count=3 * n).reshape((n, 3))
+            index = self.table.index[pos[:, 0], pos[:, 1], pos[:, 2]]
+            self.categories[index] = np.fromiter([it.category for it in blueprint], dtype=int, count=n)
 
     def init_probability(self):
         for p in NpxProbeDesp.all_possible_categories().values():
             self.probability[self.categories == p] = category_mapping_probability(p)
+        self.candidate[:] = np.where(self.probability < 1, self.probability, 0)
 
     def selected_electrode(self) -> int:
         return np.count_nonzero(self.probability == 1)
 
     def add(self, e: int):
-        self.probability[self.channels == self.channels[e]] = 0
+        table = self.table
+        c = table.channels[e]
+        i = table.channel_electrodes[table.channel_ptr[c]:table.channel_ptr[c + 1]]
+        self.probability[i] = 0
         self.probability[e] = 1.0
-
-    def get(self, e: int, c: int, r: int) -> int | None:
-        eh, ec, er = self.electrodes[e].electrode
-        return self.index.get((eh, ec + c, er + r), None)
+        self.candidate[i] = 0
 
 
-def _select_loop(probe_type: ProbeType, s: Struct):
-    while s.selected_electrode() < probe_type.n_channels:
-        if (e := pick_electrode(s)) is not None:
+def _select_loop(probe_type: ProbeType, s: Struct, rng: np.random.Generator = None):
+    # a picked electrode never shares its channel with selected electrodes,
+    # so each pick increases the number of selected electrodes by one.
+    n = s.selected_electrode()
+    while n < probe_type.n_channels:
+        if (e := pick_electrode(s, rng)) is not None:
             update_prob(s, e)
+            n += 1
         else:
             break
 
@@ -101,8 +200,10 @@ def category_mapping_probability(p: int) -> float:
 def build_channelmap(desp: NpxProbeDesp, chmap: ChannelMap, s: Struct) -> ChannelMap:
     ret = desp.new_channelmap(chmap)
 
+    # each channel has at most one electrode with probability 1.
+    electrodes = s.table.electrodes
     for e in np.nonzero(s.probability == 1)[0]:
-        desp.add_electrode(ret, s.electrodes[e], overwrite=True)
+        ret.add_electrode(tuple(electrodes[e]), exist_ok=True)
 
     return ret
 
@@ -112,82 +213,33 @@ def information_entropy(s: Struct) -> float:
     return -np.dot(p, np.log2(p))
 
 
-def pick_electrode(s: Struct) -> int | None:
-    mask = s.probability < 1
-    cand = s.probability[mask]
-    hp = np.max(cand)
+def pick_electrode(s: Struct, rng: np.random.Generator = None) -> int | None:
+    candidate = s.candidate
+    hp = candidate.max()
 
     if hp == 0:
         return None
 
-    return np.random.choice(np.arange(len(s.probability))[mask][cand >= hp])
+    cand = (candidate == hp).nonzero()[0]
+    if rng is None:
+        return cand[np.random.randint(len(cand))]
+    return cand[rng.integers(len(cand))]
 
 
 def update_prob(s: Struct, e: int):
     s.add(e)
-    ex = []
-    en = []
-    for bo, it in surr(s, e):
-        if it is not None:
-            if bo:
-                ex.append(it)
-            else:
-                en.append(it)
-
-    if len(ex):
-        ex = np.array(ex)
-        ex = ex[s.probability[ex] < 1]
-        s.probability[ex] /= 2
-
-    if len(en):
-        en = np.array(en)
-        en = en[(s.probability[en] > 0) & (s.probability[en] < 1)]
-        s.probability[en] = 0.95
-
-
-def surr(s: Struct, e: int) -> Iterator[tuple[bool, int | None]]:
-    """
 
-    :param s:
-    :param e:
-    :return: tuple of (excluded?, index)
-    """
-    match int(s.categories[e]):
-        case NpxProbeDesp.CATE_FULL:
-            # o e o
-            yield False, s.get(e, -1, 0)
-            yield False, s.get(e, 1, 0)
-        case NpxProbeDesp.CATE_HALF:
-            # o x o
-            # x e x
-            # o x o
-            yield True, s.get(e, -1, 0)
-            yield True, s.get(e, 1, 0)
-            yield True, s.get(e, 0, 1)
-            yield True, s.get(e, 0, -1)
-            yield False, s.get(e, 1, 1)
-            yield False, s.get(e, 1, -1)
-            yield False, s.get(e, -1, 1)
-            yield False, s.get(e, -1, -1)
-        case NpxProbeDesp.CATE_QUARTER:
-            # ? x ?
-            # x x x
-            # x e x
-            # x x x
-            # ? x ?
-            yield True, s.get(e, -1, 0)
-            yield True, s.get(e, 1, 0)
-            yield True, s.get(e, -1, -1)
-            yield True, s.get(e, 0, -1)
-            yield True, s.get(e, 1, -1)
-            yield True, s.get(e, -1, 1)
-            yield True, s.get(e, 0, 1)
-            yield True, s.get(e, 1, 1)
-            yield True, s.get(e, 0, 2)
-            yield True, s.get(e, 0, -2)
-            yield False, s.get(e, 1, 2)
-            yield False, s.get(e, 1, -2)
-            yield False, s.get(e, -1, 2)
-            yield False, s.get(e, -1, -2)
-        case _:
-            return
+    if (neighbors := s.table.neighbors.get(int(s.categories[e]), None)) is None:
+        return
+
+    # work on scalars, because a stencil only has a few electrodes.
+    probability = s.probability
+    candidate = s.candidate
+
+    for t in neighbors[0][e].tolist():
+        if t >= 0 and (p := probability[t]) < 1:
+            probability[t] = candidate[t] = p / 2
+
+    for t in neighbors[1][e].tolist():
+        if t >= 0 and 0 < (p := probability[t]) < 1:
+            probability[t] = candidate[t] = 0.95
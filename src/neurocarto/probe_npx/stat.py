@@ -7,9 +7,11 @@ import numpy as np
 from numpy.typing import NDArray
 
 from neurocarto.probe_npx import NpxProbeDesp, NpxElectrodeDesp
-from neurocarto.probe_npx.npx import ChannelMap
+from neurocarto.probe_npx.npx import ChannelMap, ProbeType, ProbeTable, probe_table, _PROBE_TABLE
 from neurocarto.probe_npx.select import ElectrodeSelector, load_select
+from neurocarto.probe_npx.select_batch import batch_select
 from neurocarto.util.util_blueprint import BlueprintFunctions
+from neurocarto.util.util_pool import use_pool, SharedArrays, spawn_seeds
 from neurocarto.util.utils import doc_link
 
 if sys.version_info >= (3, 11):
@@ -21,6 +23,8 @@ __all__ = [
     'npx_electrode_density',
     'npx_request_electrode',
     'npx_channel_efficiency',
+    'npx_channel_efficiency_matrix',
+    'NpxChannelEfficiency',
     'ElectrodeProbability',
     'npx_electrode_probability'
 ]
@@ -82,6 +86,7 @@ def npx_channel_efficiency(bp: BlueprintFunctions,
     :param channelmap: channelmap outcomes from *blueprint*
     :param blueprint: a given blueprint.
     :return: tuple of area and channel efficiency value
+    :see: {NpxChannelEfficiency}
     """
     if channelmap is None:
         channelmap = bp.channelmap
@@ -89,24 +94,137 @@ def npx_channel_efficiency(bp: BlueprintFunctions,
     if blueprint is None:
         blueprint = bp._blueprint
 
-    electrode = npx_request_electrode(bp, blueprint)
-    total = channelmap.probe_type.n_channels
-    unused = total - len(channelmap)
-    channel = 0
-    excluded = 0
+    return NpxChannelEfficiency.new(channelmap, blueprint)(channelmap)
 
-    selected = blueprint[bp.selected_electrodes(channelmap)]
-    for category, count in zip(*np.unique(selected, return_counts=True)):
-        match category:
-            case NpxProbeDesp.CATE_SET | NpxProbeDesp.CATE_FULL | NpxProbeDesp.CATE_HALF | NpxProbeDesp.CATE_QUARTER:
-                channel += count
-            case NpxProbeDesp.CATE_EXCLUDED:
-                excluded += count
 
-    ae = 0 if electrode == 0 else max(channel / electrode, 0)
-    ce = 0 if ae == 0 else min(ae, 1 / ae)
-    ex = (total - excluded - unused) / total
-    return ae, ce * ex
+def npx_channel_efficiency_matrix(blueprint: NDArray[np.int_],
+                                  selected: NDArray[np.bool_],
+                                  n_channels: int) -> tuple[NDArray[np.float64], NDArray[np.float64]]:
+    """
+    Calculate the area and channel efficiency for a group of selection outcomes with a given blueprint.
+
+    :param blueprint: a given blueprint. Array[category:int, E]
+    :param selected: selection matrix. Array[bool, N, E]
+    :param n_channels: number of total channels.
+    :return: tuple of (Array[aeff:float, N], Array[ceff:float, N])
+    """
+    return NpxChannelEfficiency(blueprint, n_channels).score_matrix(selected)
+
+
+class NpxChannelEfficiency:
+    """
+    Channel efficiency scorer for a fixed blueprint.
+
+    Category masks and the requested electrode number are computed once, so scoring many channelmap
+    outcomes of the same blueprint only counts the selected electrodes.
+    """
+
+    __slots__ = 'blueprint', 'n_channels', 'requested', '_index', '_channel', '_excluded'
+
+    def __init__(self, blueprint: NDArray[np.int_], n_channels: int, index: NDArray[np.int_] = None):
+        """
+
+        :param blueprint: a given blueprint. Array[category:int, E]
+        :param n_channels: number of total channels.
+        :param index: electrode index lookup table, Array[E:int, S, C, R]. Required for scoring a channelmap.
+        """
+        self.blueprint = blueprint
+        self.n_channels = n_channels
+
+        bp_set = (blueprint == NpxProbeDesp.CATE_SET) | (blueprint == NpxProbeDesp.CATE_FULL)
+        bp_half = blueprint == NpxProbeDesp.CATE_HALF
+        bp_quarter = blueprint == NpxProbeDesp.CATE_QUARTER
+
+        self.requested: float = np.count_nonzero(bp_set) + np.count_nonzero(bp_half) / 2 + np.count_nonzero(bp_quarter) / 4
+        """requested electrode number. It is the same as :func:`npx_request_electrode()`."""
+
+        self._index = index
+        self._channel = bp_set | bp_half | bp_quarter
+        self._excluded = blueprint == NpxProbeDesp.CATE_EXCLUDED
+
+    @classmethod
+    def new(cls, chmap: ChannelMap | ProbeType, blueprint: NDArray[np.int_]) -> Self:
+        """
+        Create a scorer for the blueprint, which follows the ordering of :meth:`NpxProbeDesp.all_electrodes()`.
+
+        :param chmap: channelmap type. It is a reference.
+        :param blueprint: a given blueprint. Array[category:int, E]
+        :return:
+        """
+        probe_type = chmap.probe_type if isinstance(chmap, ChannelMap) else chmap
+        return NpxChannelEfficiency(blueprint, probe_type.n_channels, probe_table(probe_type).index)
+
+    def selected(self, chmap: ChannelMap) -> NDArray[np.int_]:
+        """
+        Get the index of the selected electrodes in *chmap*.
+
+        :param chmap:
+        :return: Array[E:int, N]
+        """
+        if (index := self._index) is None:
+            raise RuntimeError('missing electrode index')
+
+        if len(chmap) == 0:
+            return np.zeros((0,), dtype=int)
+
+        pos = chmap.to_numpy('cr')
+        return index[pos[:, 0], pos[:, 1], pos[:, 2]]
+
+    def __call__(self, chmap: ChannelMap) -> tuple[float, float]:
+        """
+        Calculate the area and channel efficiency for *chmap*.
+
+        :param chmap:
+        :return: tuple of area and channel efficiency value
+        """
+        selected = self.selected(chmap)
+        channel = np.count_nonzero(self._channel[selected])
+        excluded = np.count_nonzero(self._excluded[selected])
+        aeff, ceff = self._efficiency(np.array([channel]), np.array([excluded]), np.array([len(chmap)]))
+        return float(aeff[0]), float(ceff[0])
+
+    def score_matrix(self, selected: NDArray[np.bool_]) -> tuple[NDArray[np.float64], NDArray[np.float64]]:
+        """
+        Calculate the area and channel efficiency for a group of selection outcomes.
+
+        :param selected: selection matrix. Array[bool, N, E]
+        :return: tuple of (Array[aeff:float, N], Array[ceff:float, N])
+        """
+        selected = np.asarray(selected, dtype=bool)
+        channel = np.count_nonzero(selected & self._channel, axis=1)
+        excluded = np.count_nonzero(selected & self._excluded, axis=1)
+        return self._efficiency(channel, excluded, np.count_nonzero(selected, axis=1))
+
+    def score_channelmaps(self, chmaps: list[ChannelMap]) -> tuple[NDArray[np.float64], NDArray[np.float64]]:
+        """
+        Calculate the area and channel efficiency for a list of channelmaps.
+
+        :param chmaps:
+        :return: tuple of (Array[aeff:float, N], Array[ceff:float, N])
+        """
+        channel = np.zeros((len(chmaps),), dtype=int)
+        excluded = np.zeros((len(chmaps),), dtype=int)
+        for i, chmap in enumerate(chmaps):
+            selected = self.selected(chmap)
+            channel[i] = np.count_nonzero(self._channel[selected])
+            excluded[i] = np.count_nonzero(self._excluded[selected])
+        return self._efficiency(channel, excluded, np.array([len(it) for it in chmaps]))
+
+    def _efficiency(self, channel: NDArray[np.int_],
+                    excluded: NDArray[np.int_],
+                    n_selected: NDArray[np.int_]) -> tuple[NDArray[np.float64], NDArray[np.float64]]:
+        n_channels = self.n_channels
+        unused = n_channels - n_selected
+
+        if self.requested == 0:
+            ae = np.zeros((len(channel),), dtype=float)
+        else:
+            ae = np.maximum(channel / self.requested, 0)
+
+        with np.errstate(divide='ignore'):
+            ce = np.where(ae == 0, 0, np.minimum(ae, 1 / ae))
+        ex = (n_channels - excluded - unused) / n_channels
+        return ae, ce * ex
 
 
 class ElectrodeProbability(NamedTuple):
@@ -161,10 +279,13 @@ class ElectrodeProbability(NamedTuple):
         )
 
 
+@doc_link()
 def npx_electrode_probability(probe: NpxProbeDesp, chmap: ChannelMap, blueprint: list[NpxElectrodeDesp],
                               selector: str | ElectrodeSelector = 'default',
                               sample_times: int = 1000,
-                              n_worker: int = 1) -> ElectrodeProbability:
+                              n_worker: int = 1, *,
+                              batch_size: int = 0,
+                              seed: int | np.random.SeedSequence = None) -> ElectrodeProbability:
     """
     Sample *sample_times* channelmap outcomes for a given *blueprint*.
 
@@ -174,28 +295,44 @@ def npx_electrode_probability(probe: NpxProbeDesp, chmap: ChannelMap, blueprint:
     :param selector: use which electrode selecting method.
     :param sample_times:
     :param n_worker: number of process.
+    :param batch_size: when it is positive, use the batched sampler with this batch size, and
+        *n_worker* is ignored. It only supports the default selector.
+    :param seed: random seed. Each worker uses an independent random stream spawned from it. If not given,
+        a single process sampling uses the global random state, and parallel sampling uses fresh entropy.
     :return: ElectrodeProbability
+    :see: {batch_select()}
     """
+    if batch_size > 0:
+        if selector not in ('default', 'default-fast'):
+            raise ValueError(f'batch sampling does not support selector : {selector}')
+        return _npx_electrode_probability_batch(chmap, blueprint, sample_times, batch_size, seed)
+
     if isinstance(selector, str):
         selector = load_select(selector)
 
     if n_worker == 1:
-        return _npx_electrode_probability_0(probe, chmap, blueprint, selector, sample_times)
+        rng = None if seed is None else np.random.default_rng(seed)
+        return _npx_electrode_probability_0(probe, chmap, blueprint, selector, sample_times, rng)
     else:
-        return _npx_electrode_probability_n(probe, chmap, blueprint, selector, sample_times, n_worker=n_worker)
+        return _npx_electrode_probability_n(probe, chmap, blueprint, selector, sample_times, n_worker=n_worker, seed=seed)
 
 
 def _npx_electrode_probability_0(probe: NpxProbeDesp, chmap: ChannelMap, blueprint: list[NpxElectrodeDesp],
                                  selector: ElectrodeSelector,
-                                 sample_times: int) -> ElectrodeProbability:
+                                 sample_times: int,
+                                 rng: np.random.Generator = None) -> ElectrodeProbability:
     pt = chmap.probe_type
     bp = BlueprintFunctions(probe, chmap)
+    scorer = NpxChannelEfficiency.new(pt, bp.from_blueprint(blueprint))
     mat = np.zeros((pt.n_shank, pt.n_col_shank, pt.n_row_shank))
     complete = 0
     channel_efficiency = []
 
     for _ in range(sample_times):
-        chmap = selector(probe, chmap, blueprint)
+        if rng is None:
+            chmap = selector(probe, chmap, blueprint)
+        else:
+            chmap = selector(probe, chmap, blueprint, rng=rng)
 
         for t in chmap.electrodes:
             mat[t.shank, t.column, t.row] += 1
@@ -203,16 +340,26 @@ def _npx_electrode_probability_0(probe: NpxProbeDesp, chmap: ChannelMap, bluepri
         if probe.is_valid(chmap):
             complete += 1
 
-        bp.set_blueprint(blueprint)
-        channel_efficiency.append(npx_channel_efficiency(bp, chmap)[1])
+        channel_efficiency.append(scorer(chmap)[1])
 
     return ElectrodeProbability(sample_times, mat, complete, np.array(channel_efficiency))
 
 
+def _npx_electrode_probability_batch(chmap: ChannelMap, blueprint: list[NpxElectrodeDesp],
+                                     sample_times: int,
+                                     batch_size: int,
+                                     seed: int | np.random.SeedSequence = None) -> ElectrodeProbability:
+    result = batch_select(chmap, blueprint, sample_times, batch_size=batch_size, rng=np.random.default_rng(seed))
+    _, channel_efficiency = result.efficiency()
+    complete = int(np.count_nonzero(result.complete()))
+    return ElectrodeProbability(sample_times, result.summation(), complete, channel_efficiency)
+
+
 def _npx_electrode_probability_n(probe: NpxProbeDesp, chmap: ChannelMap, blueprint: list[NpxElectrodeDesp],
                                  selector: ElectrodeSelector,
                                  sample_times: int,
-                                 n_worker: int) -> ElectrodeProbability:
+                                 n_worker: int,
+                                 seed: int | np.random.SeedSequence = None) -> ElectrodeProbability:
     if n_worker <= 1:
         raise ValueError()
 
@@ -221,12 +368,77 @@ def _npx_electrode_probability_n(probe: NpxProbeDesp, chmap: ChannelMap, bluepri
     sample_times_list[-1] += sample_times - sum(sample_times_list)
     assert sum(sample_times_list) == sample_times
 
-    import multiprocessing
-    with multiprocessing.Pool(n_worker) as pool:
+    # only send the blueprint array to workers
+    probe_type = chmap.probe_type
+    table = share_probe_table(probe_type)
+    bp = _worker_blueprint_functions(probe, probe_type, table)
+    blueprint = bp.from_blueprint(blueprint)
+
+    with use_pool(n_worker) as pool:
         jobs = []
-        for _sample_times in sample_times_list:
-            jobs.append(pool.apply_async(_npx_electrode_probability_0, (probe, chmap, blueprint, selector, _sample_times)))
-        pool.close()
-        pool.join()
+        for _sample_times, _seed in zip(sample_times_list, spawn_seeds(seed, n_worker)):
+            jobs.append(pool.apply_async(_npx_electrode_probability_job,
+                                         (probe, chmap, table, blueprint, selector, _sample_times, _seed)))
+
+        return ElectrodeProbability._reduce_add([it.get() for it in jobs])
+
+
+def _npx_electrode_probability_job(probe: NpxProbeDesp, chmap: ChannelMap, table: SharedArrays,
+                                   blueprint: NDArray[np.int_],
+                                   selector: ElectrodeSelector,
+                                   sample_times: int,
+                                   seed: np.random.SeedSequence) -> ElectrodeProbability:
+    bp = _worker_blueprint_functions(probe, chmap.probe_type, table)
+    blueprint_lst = bp.apply_blueprint(blueprint=blueprint)
+    rng = np.random.default_rng(seed)
+    return _npx_electrode_probability_0(probe, chmap, blueprint_lst, selector, sample_times, rng)
+
+
+_PROBE_TABLE_SHARED: dict[ProbeType, SharedArrays] = {}
+
+
+@doc_link()
+def share_probe_table(probe_type: ProbeType) -> SharedArrays:
+    """
+    Put the electrode tables for *probe_type* into shared memory. The result is cached.
+
+    :param probe_type:
+    :return: a handle passed to worker processes.
+    """
+    if (ret := _PROBE_TABLE_SHARED.get(probe_type, None)) is None:
+        ret = _PROBE_TABLE_SHARED[probe_type] = SharedArrays.create(probe_table(probe_type)._asdict())
+    return ret
+
+
+@doc_link()
+def attach_probe_table(probe_type: ProbeType, table: SharedArrays):
+    """
+    Use the electrode tables in shared memory for *probe_type*. It is used by worker processes.
+
+    :param probe_type:
+    :param table: handle from {share_probe_table()}.
+    """
+    if probe_type not in _PROBE_TABLE:
+        _PROBE_TABLE[probe_type] = ProbeTable(**table.attach())
+
+
+_WORKER_BLUEPRINT_FUNCTIONS: dict[tuple[type, ProbeType], BlueprintFunctions] = {}
+
+
+@doc_link()
+def _worker_blueprint_functions(probe: NpxProbeDesp, probe_type: ProbeType, table: SharedArrays) -> BlueprintFunctions:
+    """
+    Get a process-wide {BlueprintFunctions} for *probe_type*, and attach the shared electrode tables.
+    It is used by worker processes, so the electrode list is built once per process instead of once per job.
+
+    :param probe:
+    :param probe_type:
+    :param table: shared electrode tables
+    :return: a pure {BlueprintFunctions}. Caller should not keep the internal blueprint.
+    """
+    attach_probe_table(probe_type, table)
 
-    return ElectrodeProbability._reduce_add([it.get() for it in jobs])
+    key = (type(probe), probe_type)
+    if (bp := _WORKER_BLUEPRINT_FUNCTIONS.get(key, None)) is None:
+        bp = _WORKER_BLUEPRINT_FUNCTIONS[key] = BlueprintFunctions(probe, probe.new_channelmap(probe_type))
+    return bp
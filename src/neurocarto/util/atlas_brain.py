@@ -1,16 +1,33 @@
 from __future__ import annotations
 
+import os
 from pathlib import Path
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Literal
+
+import numpy as np
+from numpy.typing import NDArray
 
 if TYPE_CHECKING:
     from brainglobe_atlasapi import BrainGlobeAtlas
 
-__all__ = ['get_atlas_brain', 'BrainGlobeAtlas', 'REFERENCE']
+__all__ = ['get_atlas_brain', 'mmap_atlas_volume', 'BrainGlobeAtlas', 'REFERENCE']
+
+VOLUME = Literal['reference', 'annotation', 'hemispheres']
 
 
 def get_atlas_brain(source: int | str = 25, cache_dir: str | Path = None, *,
-                    check_latest=False) -> BrainGlobeAtlas:
+                    check_latest=False,
+                    mmap_dir: str | Path = None) -> BrainGlobeAtlas:
+    """
+    Get atlas brain.
+
+    :param source: atlas name, or resolution (um) of allen mouse brain.
+    :param cache_dir: atlas download directory.
+    :param check_latest: check whether the local atlas is the latest version.
+    :param mmap_dir: directory of memory-mapped volume cache. If given, ``reference`` and ``annotation``
+        volumes are opened via :func:`mmap_atlas_volume` instead of loading into memory.
+    :return:
+    """
     from brainglobe_atlasapi import BrainGlobeAtlas
 
     if isinstance(source, int):
@@ -19,13 +36,54 @@ def get_atlas_brain(source: int | str = 25, cache_dir: str | Path = None, *,
     if cache_dir is not None:
         cache_dir = str(Path(cache_dir).absolute())
 
-    return BrainGlobeAtlas(
+    ret = BrainGlobeAtlas(
         source,
         brainglobe_dir=cache_dir,
         # interm_download_dir=str(BRAIN_DIR.absolute()),
         check_latest=check_latest,
     )
 
+    if mmap_dir is not None:
+        for volume in ('reference', 'annotation'):
+            mmap_atlas_volume(ret, volume, mmap_dir)
+
+    return ret
+
+
+def mmap_atlas_volume(atlas: BrainGlobeAtlas, volume: VOLUME, cache_dir: str | Path) -> NDArray:
+    """
+    Replace the *volume* of *atlas* with a read-only memory-mapped array, so only the pages touched
+    by slicing are read from disk, and they are shared with other processes through the OS page cache.
+
+    The volume is converted into a ``.npy`` file under *cache_dir* at the first time (which loads the whole volume once),
+    and converted again when the atlas file is newer than the cache file.
+
+    :param atlas:
+    :param volume: volume name.
+    :param cache_dir: cache directory.
+    :return: memory-mapped volume.
+    """
+    cache_dir = Path(cache_dir)
+    version = atlas.metadata.get('version', None)
+    name = atlas.atlas_name if version is None else f'{atlas.atlas_name}_v{version}'
+    cache_file = cache_dir / name / f'{volume}.npy'
+    source_file = atlas.root_dir / f'{volume}.tiff'
+
+    if not cache_file.exists() or (source_file.exists() and source_file.stat().st_mtime > cache_file.stat().st_mtime):
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+
+        # write to a temporary file and rename, so concurrent sessions never read a partial file.
+        temp_file = cache_file.with_suffix(f'.{os.getpid()}.npy')
+        try:
+            np.save(temp_file, np.ascontiguousarray(getattr(atlas, volume)))
+            os.replace(temp_file, cache_file)
+        finally:
+            temp_file.unlink(missing_ok=True)
+
+    ret = np.load(cache_file, mmap_mode='r')
+    setattr(atlas, f'_{volume}', ret)
+    return ret
+
 
 REFERENCE = {
     # name: {}
@@ -3,12 +3,14 @@ from __future__ import annotations
 import abc
 import math
 import sys
+import threading
+from collections import OrderedDict
 from typing import Literal, TypeVar, Final, overload, NamedTuple, get_args, TYPE_CHECKING
 
 import numpy as np
 from numpy.typing import NDArray
 
-from neurocarto.util.utils import all_int, align_arr, all_float
+from neurocarto.util.utils import all_int, align_arr, all_float, doc_link
 
 if sys.version_info >= (3, 11):
     from typing import Self
@@ -18,7 +20,7 @@ else:
 if TYPE_CHECKING:
     from neurocarto.util.atlas_brain import BrainGlobeAtlas
 
-__all__ = ['SLICE', 'SliceView', 'SlicePlane']
+__all__ = ['SLICE', 'SliceView', 'SlicePlane', 'SliceCache', 'SlicePrefetcher']
 
 SLICE = Literal['coronal', 'sagittal', 'transverse']
 T = TypeVar('T')
@@ -28,6 +30,135 @@ PXY = tuple[int, int, int]  # (plane, x, y)
 COOR = tuple[int, int, int] | tuple[float, float, float]  # (ap, dv, ml)
 
 
+class SliceCache:
+    """
+    LRU cache of slice images, bounded by a memory budget.
+
+    Images are keyed by (view, plane, anchor, rotation) and the brain volume they are taken from.
+    Cached images are read-only. It is thread-safe, so :class:`SlicePrefetcher` could fill it from a worker thread.
+    """
+
+    def __init__(self, budget: int = 256 * 2 ** 20):
+        """
+        :param budget: memory budget in bytes.
+        """
+        self._budget = int(budget)
+        self._cache: OrderedDict[tuple, tuple[NDArray[np.uint], NDArray[np.uint]]] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        """number of cache hits"""
+
+        self.misses = 0
+        """number of cache misses"""
+
+    @property
+    def budget(self) -> int:
+        """memory budget in bytes"""
+        return self._budget
+
+    @budget.setter
+    def budget(self, value: int):
+        with self._lock:
+            self._budget = int(value)
+            self._evict()
+
+    @property
+    def size(self) -> int:
+        """total bytes of cached images"""
+        return self._size
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def get(self, key: tuple, volume: NDArray[np.uint]) -> NDArray[np.uint] | None:
+        """
+        Get the cached image.
+
+        :param key: image key
+        :param volume: brain volume where the image taken from.
+        :return: image. ``None`` if not cached.
+        """
+        key = (id(volume), *key)
+        with self._lock:
+            try:
+                source, image = self._cache[key]
+            except KeyError:
+                self.misses += 1
+                return None
+
+            if source is not volume:
+                self._remove(key)
+                self.misses += 1
+                return None
+
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return image
+
+    def __contains__(self, item: tuple[tuple, NDArray[np.uint]]) -> bool:
+        """
+        Whether the image is cached, without touching its LRU order or the hit/miss counters.
+
+        :param item: tuple of (key, volume)
+        """
+        key, volume = item
+        with self._lock:
+            try:
+                source, _ = self._cache[(id(volume), *key)]
+            except KeyError:
+                return False
+            return source is volume
+
+    def put(self, key: tuple, volume: NDArray[np.uint], image: NDArray[np.uint]) -> NDArray[np.uint]:
+        """
+        Put the image into the cache, and evict the least recently used images when over the budget.
+
+        :param key: image key
+        :param volume: brain volume where the image taken from.
+        :param image: image
+        :return: read-only *image*.
+        """
+        image.setflags(write=False)
+        if image.nbytes > self._budget:
+            return image
+
+        key = (id(volume), *key)
+        with self._lock:
+            self._remove(key)
+            self._cache[key] = (volume, image)
+            self._size += image.nbytes
+            self._evict()
+        return image
+
+    def clear(self):
+        """remove all cached images."""
+        with self._lock:
+            self._cache.clear()
+            self._size = 0
+
+    def _remove(self, key: tuple):
+        try:
+            _, image = self._cache.pop(key)
+        except KeyError:
+            pass
+        else:
+            self._size -= image.nbytes
+
+    def _evict(self):
+        while self._size > self._budget and len(self._cache):
+            _, (_, image) = self._cache.popitem(last=False)
+            self._size -= image.nbytes
+
+
+SLICE_CACHE = SliceCache()
+"""
+shared slice image cache. It is not used unless given to :class:`SliceView` explicitly.
+Its budget is process-wide, and the application sets it once at startup (``--atlas-cache``).
+"""
+
+
 class SliceView(metaclass=abc.ABCMeta):
     """Atlas brain slice view. Here provide three kinds of view ('coronal', 'sagittal', 'transverse').
     """
@@ -44,7 +175,11 @@ class SliceView(metaclass=abc.ABCMeta):
     grid_x: Final[NDArray[np.int_]]
     grid_y: Final[NDArray[np.int_]]
 
-    def __new__(cls, brain: BrainGlobeAtlas, name: SLICE, reference: NDArray[np.uint] = None):
+    cache: SliceCache | None
+    """slice image cache. ``None`` disable caching."""
+
+    def __new__(cls, brain: BrainGlobeAtlas, name: SLICE, reference: NDArray[np.uint] = None, *,
+                cache: SliceCache | None = None):
         if name == 'coronal':
             return object.__new__(CoronalView)
         elif name == 'sagittal':
@@ -54,12 +189,13 @@ class SliceView(metaclass=abc.ABCMeta):
         else:
             raise ValueError()
 
-    def __init__(self, brain: BrainGlobeAtlas, name: SLICE, reference: NDArray[np.uint] = None):
+    def __init__(self, brain: BrainGlobeAtlas, name: SLICE, reference: NDArray[np.uint] = None, *,
+                 cache: SliceCache | None = None):
         """
 
         :param name: view
         :param reference: reference brain volume with shape (AP, DL, ML)
-        :param resolution: um/pixel
+        :param cache: slice image cache, such as :data:`SLICE_CACHE`. ``None`` (default) disable caching.
         """
         if reference is not None:
             if reference.shape != brain.reference.shape:
@@ -80,6 +216,12 @@ class SliceView(metaclass=abc.ABCMeta):
         """um/pixel"""
 
         self.grid_y, self.grid_x = np.mgrid[0:self.height, 0:self.width]
+        self.grid_x.setflags(write=False)
+        self.grid_y.setflags(write=False)
+
+        self.cache = cache
+        self._offset: OrderedDict[tuple[int, int], NDArray[np.int_]] = OrderedDict()
+        self._offset_lock = threading.Lock()  # shared with SlicePrefetcher worker
 
     def __str__(self):
         return f'SliceView[{self.name}]'
@@ -145,10 +287,18 @@ class SliceView(metaclass=abc.ABCMeta):
         :param image: brain volume with shape (AP, DL, ML)
         :return: brain slice image with shape (height, width)
         """
+        if image is not None:
+            if image.shape != self.reference.shape:
+                raise RuntimeError('shape of brain volume mismatch')
+        else:
+            image = self.reference
+
         match o:
             case o if all_int(o):
-                o = np.full_like((self.height, self.width), o)
+                return self._plane_flat(image, int(o))
             case (plane, dh, dv) if all_int(plane, dh, dv):
+                if dh == dv == 0:
+                    return self._plane_flat(image, int(plane))
                 o = plane + self.offset(dh, dv)
             case _ if isinstance(o, np.ndarray):
                 if o.shape != (self.height, self.width):
@@ -156,15 +306,52 @@ class SliceView(metaclass=abc.ABCMeta):
             case _:
                 raise TypeError(repr(o))
 
-        if image is not None:
-            if image.shape != self.reference.shape:
-                raise RuntimeError('shape of brain volume mismatch')
-        else:
-            image = self.reference
-
         o = np.clip(o, 0, self.n_plane - 1)
         return image[self.coor_on(o, (self.grid_x, self.grid_y))]
 
+    def _plane_flat(self, image: NDArray[np.uint], plane: int) -> NDArray[np.uint]:
+        """
+        Brain image on a non-rotated plane. It is a read-only view of *image*, without copying.
+
+        :param image: brain volume with shape (AP, DL, ML)
+        :param plane: plane index
+        :return: brain slice image with shape (height, width)
+        """
+        pidx, xidx, yidx = self.project_index
+        index: list[int | slice] = [slice(None), slice(None), slice(None)]
+        index[pidx] = min(max(plane, 0), self.n_plane - 1)
+        ret = image[tuple(index)]
+        if xidx < yidx:
+            ret = ret.T
+        ret = ret.view()
+        ret.setflags(write=False)
+        return ret
+
+    def plane_image(self, plane: SlicePlane, image: NDArray[np.uint] = None) -> NDArray[np.uint]:
+        """
+        Get brain image on *plane*, through the slice image cache.
+
+        :param plane:
+        :param image: brain volume with shape (AP, DL, ML)
+        :return: read-only brain slice image with shape (height, width)
+        """
+        if image is None:
+            image = self.reference
+
+        if plane.dw == plane.dh == 0:
+            return self.plane(plane.plane, image)
+
+        if (cache := self.cache) is None:
+            return self.plane(plane.plane_offset, image)
+
+        key = self._plane_key(plane)
+        if (ret := cache.get(key, image)) is None:
+            ret = cache.put(key, image, self.plane(plane.plane_offset, image))
+        return ret
+
+    def _plane_key(self, plane: SlicePlane) -> tuple:
+        return self.name, plane.plane, plane.ax, plane.ay, plane.dw, plane.dh
+
     @overload
     def coor_on(self, plane: int, o: XY | tuple[float, float], *, um=False) -> COOR:
         pass
@@ -263,11 +450,29 @@ class SliceView(metaclass=abc.ABCMeta):
 
         :param h: horizontal plane diff to the center. right side positive.
         :param v: vertical plane diff to the center. bottom side positive.
-        :return: Array[int, H, W] array
+        :return: read-only Array[int, H, W] array
         """
+        key = (int(h), int(v))
+        with self._offset_lock:
+            try:
+                ret = self._offset[key]
+            except KeyError:
+                pass
+            else:
+                self._offset.move_to_end(key)
+                return ret
+
         x_frame = np.round(np.linspace(-h, h, self.width)).astype(int)
         y_frame = np.round(np.linspace(-v, v, self.height)).astype(int)
-        return np.add.outer(y_frame, x_frame)
+        ret = np.add.outer(y_frame, x_frame)
+        ret.setflags(write=False)
+
+        with self._offset_lock:
+            self._offset[key] = ret
+            self._offset.move_to_end(key)
+            while len(self._offset) > 8:
+                self._offset.popitem(last=False)
+        return ret
 
     def angle_offset(self, a: tuple[float, float, float]) -> tuple[int, int]:
         """plane index offset according to angle difference *a*.
@@ -438,10 +643,10 @@ class SlicePlane(NamedTuple):
 
     @property
     def image(self) -> NDArray[np.uint]:
-        return self.slice.plane(self.plane_offset)
+        return self.slice.plane_image(self)
 
     def image_of(self, image: NDArray[np.uint]) -> NDArray[np.uint]:
-        return self.slice.plane(self.plane_offset, image)
+        return self.slice.plane_image(self, image)
 
     @property
     def plane_offset(self) -> NDArray[np.int_]:
@@ -533,3 +738,95 @@ class SlicePlane(NamedTuple):
         dw = int(-self.width * math.tan(rx) / 2)
         dh = int(self.height * math.tan(ry) / 2)
         return self.with_offset(dw, dh)
+
+
+@doc_link()
+class SlicePrefetcher:
+    """
+    Compute slice images of neighbouring planes on a worker thread, and put them into
+    the slice image cache of the view, so moving to those planes becomes a cache hit.
+
+    Only the latest request is kept. A new request, or {#cancel()}, abandons the pending one.
+    Non-rotated planes are skipped, because they are cheap views of the volume.
+    """
+
+    def __init__(self, count: int = 2):
+        """
+        :param count: number of planes computed on each side.
+        """
+        self.count = count
+        self._cond = threading.Condition()
+        self._job: tuple[SlicePlane, int, tuple[NDArray[np.uint], ...]] | None = None
+        self._generation = 0
+        self._thread: threading.Thread | None = None
+        self._closed = False
+
+    def prefetch(self, plane: SlicePlane, direction: int = 0, *volume: NDArray[np.uint]):
+        """
+        Request computing planes next to *plane*.
+
+        :param plane: current plane.
+        :param direction: the direction of motion. Positive for increasing plane index, negative for
+            decreasing, and ``0`` for both sides.
+        :param volume: brain volumes. Use the reference volume of the view if omitted.
+        """
+        if self.count <= 0 or plane.dw == plane.dh == 0 or plane.slice.cache is None:
+            self.cancel()
+            return
+
+        if len(volume) == 0:
+            volume = (plane.slice.reference,)
+
+        with self._cond:
+            if self._closed:
+                return
+            self._generation += 1
+            self._job = (plane, direction, volume)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='SlicePrefetcher', daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def cancel(self):
+        """abandon pending work."""
+        with self._cond:
+            self._generation += 1
+            self._job = None
+
+    def close(self):
+        """abandon pending work and stop the worker thread."""
+        with self._cond:
+            self._closed = True
+            self._generation += 1
+            self._job = None
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._job is None and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                plane, direction, volume = self._job
+                generation = self._generation
+                self._job = None
+
+            for target in self._targets(plane, direction):
+                if self._generation != generation:
+                    break
+                for image in volume:
+                    view = target.slice
+                    if (cache := view.cache) is not None and (view._plane_key(target), image) not in cache:
+                        cache.put(view._plane_key(target), image, view.plane(target.plane_offset, image))
+
+    def _targets(self, plane: SlicePlane, direction: int) -> list[SlicePlane]:
+        if direction > 0:
+            step = [i for i in range(1, self.count + 1)]
+        elif direction < 0:
+            step = [-i for i in range(1, self.count + 1)]
+        else:
+            step = [j for i in range(1, self.count + 1) for j in (i, -i)]
+
+        n_plane = plane.slice.n_plane
+        return [plane.with_plane(plane.plane + i) for i in step if 0 <= plane.plane + i < n_plane]
@@ -5,6 +5,8 @@ from typing import NamedTuple, Iterator, TYPE_CHECKING
 import numpy as np
 from numpy.typing import NDArray
 
+from neurocarto.util.utils import doc_link
+
 if TYPE_CHECKING:
     from brainglobe_atlasapi import BrainGlobeAtlas
 
@@ -29,6 +31,9 @@ class Structures:
             it.acronym: it
             for it in structure
         }
+        self._table: tuple[NDArray[np.int_], NDArray[np.int_]] | None = None
+        self._id_structure: list[Structure] = []
+        self._lut: tuple[tuple, NDArray[np.int_]] | None = None
 
     @classmethod
     def of(cls, atlas: BrainGlobeAtlas) -> Structures:
@@ -44,10 +49,11 @@ class Structures:
         if isinstance(item, str):
             return self._structure[item]
 
-        elif isinstance(item, int):
-            for _, structure in self._structure.items():
-                if structure.id == item:
-                    return structure
+        elif isinstance(item, (int, np.integer)):
+            ids, _ = self._id_table()
+            i = int(np.searchsorted(ids, item))
+            if i < len(ids) and ids[i] == item:
+                return self._id_structure[i]
 
             raise KeyError(item)
         else:
@@ -79,13 +85,110 @@ class Structures:
         return parent.id in child.id_path
 
     def iter_subregions(self, region: STRUCTURE | ACRONYM | Structure) -> Iterator[Structure]:
-        if isinstance(region, (int, str)):
+        if isinstance(region, (int, np.integer, str)):
             region = self[region]
 
         for it in self._structure.values():
             if region.id in it.id_path:
                 yield it
 
+    def _id_table(self) -> tuple[NDArray[np.int_], NDArray[np.int_]]:
+        """
+        Build (once) the structure id lookup table.
+
+        :return: tuple of (sorted structure id (Array[id:int, R]), ancestor table (Array[id:int, R+1, D])),
+            where ``table[i, d]`` is the ancestor id of the *i*-th structure at hierarchy depth *d*, or ``0``
+            when the structure is shallower than *d*. The last row is all ``0``, used for unknown ids.
+        """
+        if (table := self._table) is not None:
+            return table
+
+        structure = {it.id: it for it in self._structure.values()}
+        ids = np.array(sorted(structure), dtype=int)
+        depth = max([len(it.id_path) for it in structure.values()], default=0)
+
+        path = np.zeros((len(ids) + 1, depth), dtype=int)
+        for i, it in enumerate(ids):
+            id_path = structure[int(it)].id_path
+            path[i, :len(id_path)] = id_path
+
+        ids.setflags(write=False)
+        path.setflags(write=False)
+        self._id_structure = [structure[int(it)] for it in ids]
+        self._table = ids, path
+        return self._table
+
+    def _id_row(self, annotation: NDArray[np.int_]) -> NDArray[np.int_]:
+        """
+        :param annotation: structure id Array[id:int, ...]
+        :return: row index of ancestor table. Array[int, ...]
+        """
+        annotation = np.asarray(annotation)
+        if annotation.size < 1024:
+            return self._id_row_search(annotation)
+
+        # annotation images are piecewise constant, so only look up the first id of each run.
+        flat = annotation.ravel()
+        start = np.flatnonzero(flat[1:] != flat[:-1]) + 1
+        if len(start) > len(flat) // 4:
+            return self._id_row_search(annotation)
+
+        start = np.concatenate([[0], start])
+        count = np.diff(np.append(start, len(flat)))
+        return np.repeat(self._id_row_search(flat[start]), count).reshape(annotation.shape)
+
+    def _id_row_search(self, annotation: NDArray[np.int_]) -> NDArray[np.int_]:
+        ids, _ = self._id_table()
+        i = np.asarray(np.searchsorted(ids, annotation))
+        ok = i < len(ids)
+        ok[ok] = ids[i[ok]] == annotation[ok]
+        i[~ok] = len(ids)
+        return i
+
+    def subregion_ids(self, region: STRUCTURE | ACRONYM | Structure) -> NDArray[np.int_]:
+        """
+        Sorted id of all subregions of *region*, including itself.
+
+        :param region:
+        :return: Array[id:int, N]
+        """
+        if isinstance(region, (int, np.integer, str)):
+            region = self[region]
+
+        ids, path = self._id_table()
+        return ids[path[:-1, len(region.id_path) - 1] == region.id]
+
+    def mask_region(self, annotation: NDArray[np.int_], region: STRUCTURE | ACRONYM | Structure) -> NDArray[np.bool_]:
+        """
+        Whether annotations are located in *region* or any of its subregions.
+
+        :param annotation: structure id Array[id:int, ...]
+        :param region:
+        :return: Array[bool, ...]
+        """
+        if isinstance(region, (int, np.integer, str)):
+            region = self[region]
+
+        _, path = self._id_table()
+        return path[self._id_row(annotation), len(region.id_path) - 1] == region.id
+
+    def label_regions(self, annotation: NDArray[np.int_], level: int = None) -> NDArray[np.int_]:
+        """
+        Label annotations with their ancestor regions at every hierarchy level.
+
+        :param annotation: structure id Array[id:int, ...]
+        :param level: only the given hierarchy depth (0 is the root).
+        :return: ancestor structure id Array[id:int, ..., D], or Array[id:int, ...] when *level* is given.
+            ``0`` for unknown id or the level deeper than the structure.
+        """
+        _, path = self._id_table()
+        row = self._id_row(annotation)
+        if level is None:
+            return path[row]
+        if level >= path.shape[1]:
+            return np.zeros_like(row)
+        return path[row, level]
+
     def sort_structure(self, regions: list[STRUCTURE | ACRONYM]) -> list[STRUCTURE | ACRONYM]:
         """
         For sorted list, two elements r[i] and r[j] for i, j in N, i < j,
@@ -100,8 +203,37 @@ class Structures:
     def image_annotation(self, annotation: NDArray[np.uint],
                          merge: dict[STRUCTURE | ACRONYM, int],
                          other: int) -> NDArray[np.uint]:
-        ret = np.full_like(annotation, other)
+        """
+        Remap annotation image into region values.
+
+        :param annotation: annotation image Array[id:int, ...]
+        :param merge: dict of region to output value. A region also covers its subregions,
+            and deeper regions take priority over their parents.
+        :param other: value for annotations not covered by any region.
+        :return: Array[value:int, ...]
+        """
+        lut = self.region_lut(merge, other)
+        return lut[self._id_row(annotation)].astype(np.asarray(annotation).dtype, copy=False)
+
+    @doc_link()
+    def region_lut(self, merge: dict[STRUCTURE | ACRONYM, int], other: int) -> NDArray[np.int_]:
+        """
+        Lookup table used by {#image_annotation()}, cached until *merge* or *other* changed.
+
+        :param merge: dict of region to output value.
+        :param other: value for annotations not covered by any region.
+        :return: output value for each row of the ancestor table. Array[value:int, R+1]
+        """
+        key = (tuple(merge.items()), other)
+        if (cache := self._lut) is not None and cache[0] == key:
+            return cache[1]
+
+        _, path = self._id_table()
+        lut = np.full((len(path),), other)
         for region in self.sort_structure(list(merge)):
-            for sub in self.iter_subregions(region):
-                ret[annotation == sub.id] = merge[region]
-        return ret
+            structure = self[region]
+            lut[:-1][path[:-1, len(structure.id_path) - 1] == structure.id] = merge[region]
+
+        lut.setflags(write=False)
+        self._lut = key, lut
+        return lut
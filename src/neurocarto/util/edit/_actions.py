@@ -185,6 +185,8 @@ def load_blueprint(bp: BlueprintFunctions, filename: str):
 def optimize_channelmap(bp: BlueprintFunctions, sample_times: int = 100, *,
                         single_process=False,
                         n_worker: int = 1,
+                        patience: int = 0,
+                        target: float = None,
                         **kwargs):
     """
     Sample and find the optimized channelmap that has maxima channel efficiency.
@@ -192,6 +194,9 @@ def optimize_channelmap(bp: BlueprintFunctions, sample_times: int = 100, *,
     :param bp:
     :param sample_times: (int=100)
     :param single_process: (bool) debug use parameter
+    :param n_worker: (int=1) number of process.
+    :param patience: (int) stop early when max(Ceff) does not improve after this number of samples.
+    :param target: (float) stop early when max(Ceff) reaches this value.
     :param kwargs: selector parameters
     """
     blueprint = bp.blueprint()
@@ -200,6 +205,7 @@ def optimize_channelmap(bp: BlueprintFunctions, sample_times: int = 100, *,
         return
 
     from .optimize import optimize_channelmap as _optimize_channelmap
+    from .optimize import iter_optimize_channelmap, OptimizeResult
 
     chmap = None
     aeff = 0
@@ -208,24 +214,49 @@ def optimize_channelmap(bp: BlueprintFunctions, sample_times: int = 100, *,
     if single_process:
         chmap, aeff, ceff = _optimize_channelmap(bp, bp.channelmap, blueprint,
                                                  sample_times=sample_times,
+                                                 patience=patience,
+                                                 target=target,
                                                  **kwargs)
     else:
         import threading
 
-        def target():
-            nonlocal chmap, aeff, ceff
-            chmap, aeff, ceff = _optimize_channelmap(bp, bp.channelmap, blueprint,
-                                                     sample_times=sample_times,
-                                                     n_worker=n_worker,
-                                                     **kwargs)
-
-        thread = threading.Thread(target=target, daemon=True)
+        result: OptimizeResult | None = None
+        stop = threading.Event()
+
+        def run_optimize():
+            nonlocal result
+            it = iter_optimize_channelmap(bp, bp.channelmap, blueprint,
+                                          sample_times=sample_times,
+                                          n_worker=n_worker,
+                                          patience=patience,
+                                          target=target,
+                                          **kwargs)
+            try:
+                for result in it:
+                    if stop.is_set():
+                        break
+            finally:
+                it.close()
+
+        thread = threading.Thread(target=run_optimize, daemon=True)
         thread.start()
 
-        while thread.is_alive():
-            yield 1
+        try:
+            while thread.is_alive():
+                if (current := result) is not None:
+                    bp.set_status_line(f'sampled {current.sample_times}/{sample_times}, '
+                                       f'max(Ceff)={100 * current.ceff:.2f}%')
+                yield 1
+        except KeyboardInterrupt:
+            stop.set()
+            raise
+
         thread.join()
 
+        if result is None:
+            return
+        chmap, aeff, ceff = result.channelmap, result.aeff, result.ceff
+
     bp.set_status_line(f'finished. got max(Ceff)={100 * ceff:.2f}% and Aeff={100 * aeff:.2f}')
     bp.set_channelmap(chmap)
 
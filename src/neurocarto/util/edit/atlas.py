@@ -35,6 +35,7 @@ __all__ = [
     'atlas_set_anchor_on_probe',
     'atlas_coor_electrode',
     'atlas_mask_region',
+    'atlas_label_region',
 ]
 
 
@@ -63,11 +64,7 @@ def atlas_get_region(controller: ControllerView | AtlasBrainView, region: int |
     if (atlas := _get_atlas(controller)) is None:
         return None
 
-    try:
-        structure = atlas._structure
-    except:
-        from neurocarto.util.atlas_struct import Structures
-        structure = Structures.of(atlas.brain)
+    structure = _get_structure(atlas)
 
     try:
         return structure[region]
@@ -378,23 +375,52 @@ def atlas_mask_region(bp: BlueprintFunctions,
         if (coor := atlas_current_probe(bp, view)) is None:
             raise RuntimeError('Cannot determine current probe coordinate.')
 
-    p = atlas_coor_electrode(bp, view, coor, electrode, bregma=None)  # Array[um:float, N, (ap, dv, ml)] atlas-origin
-    q = (p / view.brain.resolution).astype(int)  # Array[index:int, N, (ap, dv, ml)]
-    r = view.brain.annotation[tuple(q.T)]  # Array[annotation:int, N]
+    structure = _get_structure(view)
+    r = _electrode_annotation(bp, view, coor, electrode)  # Array[annotation:int, N]
+
+    if (target := atlas_get_region(view, region)) is None:
+        return np.zeros_like(r, dtype=bool)
 
+    return structure.mask_region(r, target)
+
+
+@doc_link(DOC=textwrap.dedent(BlueprintFunctions.atlas_label_region.__doc__))
+def atlas_label_region(bp: BlueprintFunctions,
+                       controller: ControllerView | AtlasBrainView,
+                       coor: probe_coor.ProbeCoordinate = None,
+                       electrode: NDArray[np.int_] | NDArray[np.bool_] | NDArray[np.float64] = None,
+                       level: int = None) -> NDArray[np.int_]:
+    """
+    {DOC}
+    :see: {BlueprintFunctions#atlas_label_region()}
+    """
+    if (view := _get_atlas(controller)) is None:
+        raise RuntimeError('cannot determine current atlas')
+
+    if coor is None:
+        if (coor := atlas_current_probe(bp, view)) is None:
+            raise RuntimeError('Cannot determine current probe coordinate.')
+
+    structure = _get_structure(view)
+    r = _electrode_annotation(bp, view, coor, electrode)  # Array[annotation:int, N]
+    return structure.label_regions(r, level)
+
+
+def _get_structure(view: AtlasBrainView):
     try:
-        structure = view._structure
-    except:
+        return view._structure
+    except AttributeError:
         from neurocarto.util.atlas_struct import Structures
-        structure = Structures.of(view.brain)
+        return Structures.of(view.brain)
 
-    ret = np.zeros_like(r, dtype=bool)
-    if (target := atlas_get_region(view, region)) is None:
-        return ret
 
-    for sub in structure.iter_subregions(target):
-        np.logical_or(ret, r == sub.id, out=ret)
-    return ret
+def _electrode_annotation(bp: BlueprintFunctions,
+                          view: AtlasBrainView,
+                          coor: probe_coor.ProbeCoordinate,
+                          electrode: NDArray[np.int_] | NDArray[np.bool_] | NDArray[np.float64] = None) -> NDArray[np.int_]:
+    p = atlas_coor_electrode(bp, view, coor, electrode, bregma=None)  # Array[um:float, N, (ap, dv, ml)] atlas-origin
+    q = (p / view.brain.resolution).astype(int)  # Array[index:int, N, (ap, dv, ml)]
+    return view.brain.annotation[tuple(q.T)]  # Array[annotation:int, N]
 
 
 def _electrode_coor(bp: BlueprintFunctions,
@@ -8,7 +8,7 @@ from numpy.typing import NDArray
 
 from neurocarto.util.util_blueprint import BlueprintFunctions
 from neurocarto.util.utils import doc_link
-from .surrounding import surrounding, get_surrounding
+from .surrounding import get_surrounding
 
 __all__ = ['ClusteringEdges', 'find_clustering', 'clustering_edges', 'edge_rastering']
 
@@ -91,35 +91,32 @@ def find_clustering(self: BlueprintFunctions,
     if isinstance(categories, int):
         categories = [categories]
 
-    ret: NDArray[np.int_] = np.arange(len(blueprint)) + 1
-
-    unset = self.CATE_UNSET
-    ret[blueprint == unset] = 0
+    active = blueprint != self.CATE_UNSET
     if categories is not None:
-        for category in np.unique(blueprint):
-            if int(category) not in categories:
-                ret[blueprint == category] = 0
-
-    def union(i: int, j: int):
-        if i == j:
-            return
-
-        a: int = ret[i]
-        b: int = ret[j]
-        c = min(a, b)
-
-        if a != c:
-            ret[ret == a] = c
-        if b != c:
-            ret[ret == b] = c
-
-    for i in range(len(blueprint)):
-        if ret[i] > 0:
-            for j in surrounding(self, i, diagonal=diagonal):
-                if blueprint[i] == blueprint[j]:
-                    union(i, j)
-
-    return ret
+        active &= np.isin(blueprint, categories)
+
+    # pairs of neighboring electrodes in the same zone
+    a, b = self.grid.neighbors(diagonal=diagonal)
+    keep = active[a] & (blueprint[a] == blueprint[b])
+    a = a[keep]
+    b = b[keep]
+
+    # disjoint set, where root is the smallest electrode index in the set.
+    parent = np.arange(len(blueprint))
+    while True:
+        # path compression. parent[i] <= i always hold, so it converges.
+        while not np.array_equal(p := parent[parent], parent):
+            parent = p
+
+        pa = parent[a]
+        pb = parent[b]
+        if not np.any(diff := pa != pb):
+            break
+
+        # union, link the larger root to the smaller one
+        np.minimum.at(parent, np.maximum(pa[diff], pb[diff]), np.minimum(pa[diff], pb[diff]))
+
+    return np.where(active, parent + 1, 0)
 
 
 @doc_link(DOC=textwrap.dedent(BlueprintFunctions.clustering_edges.__doc__))
@@ -116,8 +116,10 @@ def load_csv_data(self: BlueprintFunctions, file: str | Path, *,
     electrode = data[:, [0, 1, 2]].astype(int)
     value = data[:, 3]
 
+    index = self.electrode_index(electrode)
+
     ret = np.full((len(self.s),), np.nan)
-    ret[self.index_blueprint(electrode)] = value
+    ret[index[index >= 0]] = value[index >= 0]
     return ret
 
 
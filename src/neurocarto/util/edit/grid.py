@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import sys
+from typing import NamedTuple
+
+import numpy as np
+from numpy.typing import NDArray
+
+if sys.version_info >= (3, 11):
+    from typing import Self
+else:
+    from typing_extensions import Self
+
+__all__ = ['ElectrodeGrid']
+
+
+class ElectrodeGrid(NamedTuple):
+    """
+    Rasterized electrodes on a dense (shank, x, y) grid.
+
+    Grid position of an electrode is ``(shank, int(x / dx), int(y / dy))``, the same key used in
+    ``BlueprintFunctions._position_index``, shifted by (*x0*, *y0*) and with shank values mapped to
+    shank axis indices. All arrays are read-only.
+    """
+
+    shank: NDArray[np.int_]
+    """shank value for each shank axis index. Array[int, S]"""
+
+    x0: int
+    """x offset of grid"""
+
+    y0: int
+    """y offset of grid"""
+
+    index: NDArray[np.int_]
+    """electrode index. ``-1`` for no electrode. Array[E:int, S, X, Y]"""
+
+    s: NDArray[np.int_]
+    """shank axis index for each electrode. Array[int, E]"""
+
+    x: NDArray[np.int_]
+    """x grid index for each electrode. Array[int, E]"""
+
+    y: NDArray[np.int_]
+    """y grid index for each electrode. Array[int, E]"""
+
+    @classmethod
+    def new(cls, s: NDArray[np.int_], x: NDArray[np.int_], y: NDArray[np.int_], dx: float, dy: float) -> Self:
+        """
+        Rasterize electrodes.
+
+        :param s: electrode shank. Array[int, E]
+        :param x: electrode x position in um. Array[um:int, E]
+        :param y: electrode y position in um. Array[um:int, E]
+        :param dx: x interval space.
+        :param dy: y interval space.
+        :return:
+        """
+        shank, gs = np.unique(s, return_inverse=True)
+        gx = (x / dx).astype(int)
+        gy = (y / dy).astype(int)
+        x0 = int(np.min(gx)) if len(gx) else 0
+        y0 = int(np.min(gy)) if len(gy) else 0
+        gx = gx - x0
+        gy = gy - y0
+
+        if len(gs):
+            shape = (len(shank), int(np.max(gx)) + 1, int(np.max(gy)) + 1)
+        else:
+            shape = (0, 0, 0)
+
+        index = np.full(shape, -1)
+        index[gs, gx, gy] = np.arange(len(gs))
+
+        ret = cls(shank, x0, y0, index, gs, gx, gy)
+        for a in (shank, index, gs, gx, gy):
+            a.setflags(write=False)
+        return ret
+
+    @property
+    def shape(self) -> tuple[int, int, int]:
+        """grid shape (S, X, Y)"""
+        return self.index.shape
+
+    @property
+    def valid(self) -> NDArray[np.bool_]:
+        """mask of grid positions which have an electrode. Array[bool, S, X, Y]"""
+        return self.index >= 0
+
+    def to_grid(self, a: NDArray, init=0) -> NDArray:
+        """
+        Put electrode values onto the grid.
+
+        :param a: Array[V, E]
+        :param init: value for grid positions without electrode.
+        :return: Array[V, S, X, Y]
+        """
+        ret = np.full(self.shape, init, dtype=a.dtype)
+        ret[self.s, self.x, self.y] = a
+        return ret
+
+    def from_grid(self, a: NDArray) -> NDArray:
+        """
+        Take electrode values from the grid.
+
+        :param a: Array[V, S, X, Y]
+        :return: Array[V, E]
+        """
+        return a[self.s, self.x, self.y]
+
+    def index_of(self, s, x, y) -> NDArray[np.int_]:
+        """
+        Get electrode index at positions.
+
+        :param s: shank. int or Array[int, N]
+        :param x: x position in unit of dx, i.e. ``int(x / dx)``. int or Array[int, N]
+        :param y: y position in unit of dy. int or Array[int, N]
+        :return: electrode index. ``-1`` for no electrode. Array[E:int, N]
+        """
+        s, x, y = np.broadcast_arrays(
+            np.asarray(s, dtype=int),
+            np.asarray(x, dtype=int) - self.x0,
+            np.asarray(y, dtype=int) - self.y0,
+        )
+        ns, nx, ny = self.shape
+
+        i = np.searchsorted(self.shank, s)
+        ok = i < ns
+        ok[ok] = self.shank[i[ok]] == s[ok]
+        ok &= (0 <= x) & (x < nx) & (0 <= y) & (y < ny)
+
+        ret = np.full(s.shape, -1)
+        ret[ok] = self.index[i[ok], x[ok], y[ok]]
+        return ret
+
+    def neighbors(self, *, diagonal=True) -> tuple[NDArray[np.int_], NDArray[np.int_]]:
+        """
+        Find all pairs of neighboring electrodes by shifting the grid.
+
+        :param diagonal: including electrodes on diagonal.
+        :return: tuple of index array (i, j), where electrode i and j are neighbors. Each pair appears once.
+        """
+        if diagonal:
+            offsets = [(1, 0), (1, 1), (0, 1), (1, -1)]
+        else:
+            offsets = [(1, 0), (0, 1)]
+
+        a = []
+        b = []
+        for ox, oy in offsets:
+            src, dst = self.shift(ox, oy)
+            keep = (src >= 0) & (dst >= 0)
+            a.append(src[keep])
+            b.append(dst[keep])
+
+        return np.concatenate(a), np.concatenate(b)
+
+    def shift(self, tx: int, ty: int) -> tuple[NDArray[np.int_], NDArray[np.int_]]:
+        """
+        Overlapped part of the index grid and itself shifted by (*tx*, *ty*).
+
+        :param tx: x steps
+        :param ty: y steps
+        :return: tuple of index grid (src, dst), where electrode ``src[p]`` moves to ``dst[p]``.
+        """
+        _, nx, ny = self.shape
+        sx, dx = _shift_slice(nx, tx)
+        sy, dy = _shift_slice(ny, ty)
+        return self.index[:, sx, sy], self.index[:, dx, dy]
+
+
+def _shift_slice(n: int, t: int) -> tuple[slice, slice]:
+    t = max(-n, min(n, t))
+    return slice(max(0, -t), n - max(0, t)), slice(max(0, t), n - max(0, -t))
@@ -37,36 +37,8 @@ def move(self: BlueprintFunctions, a: NDArray, *,
     if abs(tx) < dx and abs(ty) < dy:
         return a
 
-    pos = self._position_index
-
-    ii = np.arange(len(s))
-    jj = np.arange(len(s))
-    rm = []
-    for i in range(len(s)):
-        if mask is None or mask[i]:
-            p = int(s[i]), int((x[i] + tx) / dx), int((y[i] + ty) / dy)
-            if (j := pos.get(p, None)) is None:
-                rm.append(i)
-            else:
-                jj[i] = j
-        else:
-            rm.append(i)
-
-    if len(rm):
-        ii = np.delete(ii, rm)
-        jj = np.delete(jj, rm)
-
-    if a.ndim > 1:
-        _index: list[slice | NDArray[np.int_]] = [slice(None)] * a.ndim
-        _index[axis] = ii
-        ii = tuple(_index)
-        _index[axis] = jj
-        jj = tuple(_index)
-
-    ret = np.full_like(a, init)
-    ret[jj] = a[ii]
-
-    return ret
+    jj = self.grid.index_of(s, ((x + tx) / dx).astype(int), ((y + ty) / dy).astype(int))
+    return _move(a, jj, mask, axis, init)
 
 
 @doc_link(DOC=textwrap.dedent(BlueprintFunctions.move_i.__doc__))
@@ -92,24 +64,26 @@ def move_i(self: BlueprintFunctions, a: NDArray, *,
     if mask is not None and len(mask) != len(s):
         raise RuntimeError()
 
-    pos = self._position_index
-
-    ii = np.arange(len(s))
-    jj = np.arange(len(s))
-    rm = []
-    for i in ii:
-        if mask is None or mask[i]:
-            p = int(s[i]), int(x[i] + tx), int(y[i] + ty)
-            if (j := pos.get(p, None)) is None:
-                rm.append(i)
-            else:
-                jj[i] = j
-        else:
-            rm.append(i)
-
-    if len(rm):
-        ii = np.delete(ii, rm)
-        jj = np.delete(jj, rm)
+    jj = self.grid.index_of(s, x + tx, y + ty)
+    return _move(a, jj, mask, axis, init)
+
+
+def _move(a: NDArray, jj: NDArray[np.int_], mask: NDArray[np.bool_] | None, axis: int, init: float) -> NDArray:
+    """
+
+    :param a: Array[V, ..., N, ...]
+    :param jj: moving target index. ``-1`` for out of probe. Array[E:int, N]
+    :param mask: Array[bool, N]
+    :param axis: index of N
+    :param init: initial value V
+    :return: moved a
+    """
+    keep = jj >= 0
+    if mask is not None:
+        keep &= np.asarray(mask, dtype=bool)
+
+    ii = np.flatnonzero(keep)
+    jj = jj[keep]
 
     if a.ndim > 1:
         _index: list[slice | NDArray[np.int_]] = [slice(None)] * a.ndim
@@ -150,64 +124,82 @@ def fill(self: BlueprintFunctions,
     elif isinstance(categories, int):
         categories = [categories]
 
-    dx = self.dx
-    dy = self.dy
-
-    ret = blueprint.copy()
-    cate_unset = self.CATE_UNSET
+    grid = self.grid
 
     from .clustering import find_clustering
     clustering = find_clustering(self, blueprint, categories)
-    for cluster in np.unique(clustering):
-        if cluster == 0:
-            continue
-
-        area: NDArray[np.bool_] = clustering == cluster
-        if threshold is not None:
-            if np.count_nonzero(area) < threshold:
-                if unset:
-                    ret[area] = cate_unset
-                continue
-
-        c = np.unique(ret[area])
-        assert len(c) == 1
-        c = int(c[0])
-
-        s = np.unique(self.s[area])
-        assert len(s) == 1
-        s = int(s[0])
-
-        x = (self.x[area] / dx).astype(int)
-        y = (self.y[area] / dy).astype(int)
-        y0 = int(np.min(y))
-        y1 = int(np.max(y))
-
-        for xx in np.unique(x):  # for each column
-            xx = int(xx)
-            if gap is None:
-                for yy in range(y0, y1 + 1):
-                    if not area[(yi := self._position_index[(s, xx, yy)])]:
-                        ret[yi] = c
-            else:
-                assert gap_window is not None
-                # fill gap in y
-                for yy in range(y0, y1 + 2 - gap_window):
-                    yi = np.array([
-                        self._position_index[(s, xx, yy + gi)]
-                        for gi in range(gap_window)
-                    ])
-                    if np.count_nonzero(~area[yi]) <= gap:
-                        ret[yi] = c
 
+    index = np.flatnonzero(clustering > 0)
+    label, cluster = np.unique(clustering[index], return_inverse=True)  # cluster: Array[K, E']
+    category = np.zeros(len(label), dtype=blueprint.dtype)
+    category[cluster] = blueprint[index]
+
+    # writing (electrode, cluster, value), applied in cluster order.
+    write_i = []
+    write_k = []
+    write_v = []
+
+    if threshold is not None:
+        small = (np.bincount(cluster, minlength=len(label)) < threshold)[cluster]
+        if unset:
+            write_i.append(index[small])
+            write_k.append(cluster[small])
+            write_v.append(np.full(np.count_nonzero(small), self.CATE_UNSET, dtype=blueprint.dtype))
+        index = index[~small]
+        cluster = cluster[~small]
+
+    y = grid.y[index]
+    y0 = np.full(len(label), grid.shape[2])
+    y1 = np.full(len(label), -1)
+    np.minimum.at(y0, cluster, y)
+    np.maximum.at(y1, cluster, y)
+
+    # for each column of each cluster, take all positions between the cluster y range.
+    segment = np.unique(np.column_stack([cluster, grid.s[index], grid.x[index]]), axis=0).reshape(-1, 3)
+    k = segment[:, 0]
+    length = y1[k] - y0[k] + 1
+    start = np.cumsum(length) - length
+
+    position = np.repeat(np.arange(len(segment)), length)  # segment of each position
+    offset = np.arange(len(position)) - start[position]  # offset in segment
+    k = k[position]  # cluster of each position
+    electrode = grid.index[segment[position, 1], segment[position, 2], y0[k] + offset]
+    inside = (electrode >= 0) & (clustering[electrode] == label[k])
+
+    if gap is None:
+        fill_area = ~inside
+    else:
+        assert gap_window is not None
+        # fill gap in y, for each window which has at most gap electrodes outside the area.
+        outside = np.concatenate([[0], np.cumsum(~inside)])
+        window = np.zeros_like(inside)
+        p = np.flatnonzero(offset <= length[position] - gap_window)  # window start
+        window[p] = (outside[p + gap_window] - outside[p]) <= gap
+
+        # windows never cross segments, so it is fine to count over all segments.
+        window = np.concatenate([[0], np.cumsum(window)])
+        p = np.arange(len(position))
+        fill_area = (window[p + 1] - window[np.maximum(p + 1 - gap_window, 0)]) > 0
+
+    fill_area &= electrode >= 0
+    write_i.append(electrode[fill_area])
+    write_k.append(k[fill_area])
+    write_v.append(category[k[fill_area]])
+
+    write_i = np.concatenate(write_i)
+    order = np.argsort(np.concatenate(write_k), kind='stable')
+
+    ret = blueprint.copy()
+    ret[write_i[order]] = np.concatenate(write_v)[order]
     return ret
 
 
 @doc_link(DOC=textwrap.dedent(BlueprintFunctions.extend.__doc__))
 def extend(self: BlueprintFunctions,
            blueprint: NDArray[np.int_],
-           category: int,
+           category: int | list[int],
            step: int | tuple[int, int],
-           value: int = None, *,
+           value: int | list[int] = None, *,
            threshold: int | tuple[int, int] = None,
            bi: bool = True,
            overwrite: bool = False) -> NDArray[np.int_]:
@@ -218,51 +210,40 @@ def extend(self: BlueprintFunctions,
     if len(blueprint) != len(self.s):
         raise ValueError()
 
-    match threshold:
-        case None | int() | (int(), int()):
-            pass
-        case [int(), int()]:
-            threshold = tuple(threshold)
-        case _:
-            raise TypeError()
+    threshold = _as_threshold(threshold)
+    x_steps, y_steps = _as_steps(step, bi)
+
+    if isinstance(category, (int, np.integer)):
+        category = [category]
 
     if value is None:
         value = category
+    elif isinstance(value, (int, np.integer)):
+        value = [value] * len(category)
+    elif len(value) != len(category):
+        raise ValueError('values and categories are not paired')
 
-    match step:
-        case int(step):
-            step = (0, step)
-        case (int(left), int(right)):
-            step = left, right
-        case _:
-            raise TypeError()
-
-    x_steps = _step_as_range(step[0], bi)
-    y_steps = _step_as_range(step[1], bi)
-
-    ret = blueprint.copy()
+    grid = self.grid
     unset = self.CATE_UNSET
 
-    from .clustering import find_clustering
-    clustering = find_clustering(self, blueprint, [category])
-    for cluster in np.unique(clustering):
-        if cluster == 0:
-            continue
+    ret = blueprint.copy()
 
-        area: NDArray[np.bool_] = clustering == cluster
-        if threshold is not None and not _check_area_size(np.count_nonzero(area), threshold):
-            continue
+    # former categories take priority, so they are applied at last.
+    for c, v in reversed(list(zip(category, value))):
+        label = _category_zone(self, blueprint, c, threshold)
 
-        extend = np.zeros_like(area, dtype=bool)
-        for x in x_steps:
-            for y in y_steps:
-                np.logical_or(move_i(self, area, tx=x, ty=y, mask=area, init=False), extend, out=extend)
+        # the largest and the smallest zone label around each electrode.
+        zone = grid.to_grid(label)
+        hi = grid.from_grid(_window(zone, x_steps, y_steps, np.maximum, 0))
+        zone[zone == 0] = len(label) + 1
+        lo = grid.from_grid(_window(zone, x_steps, y_steps, np.minimum, len(label) + 1))
 
-        extend[area] = False
+        # electrodes reached by any zone, except the zone it belongs to.
+        extend = (hi > 0) & ((label == 0) | (hi != label) | (lo != label))
         if not overwrite:
-            extend[blueprint != unset] = False
+            extend &= blueprint == unset
 
-        ret[extend] = value
+        ret[extend] = v
 
     return ret
 
@@ -270,7 +251,7 @@ def extend(self: BlueprintFunctions,
 @doc_link(DOC=textwrap.dedent(BlueprintFunctions.reduce.__doc__))
 def reduce(self: BlueprintFunctions,
            blueprint: NDArray[np.int_],
-           category: int,
+           category: int | list[int],
            step: int | tuple[int, int], *,
            threshold: int | tuple[int, int] = None,
            bi: bool = True) -> NDArray[np.int_]:
@@ -281,14 +262,43 @@ def reduce(self: BlueprintFunctions,
     if len(blueprint) != len(self.s):
         raise ValueError()
 
+    threshold = _as_threshold(threshold)
+    x_steps, y_steps = _as_steps(step, bi)
+
+    if isinstance(category, (int, np.integer)):
+        category = [category]
+
+    grid = self.grid
+    unset = self.CATE_UNSET
+
+    ret = blueprint.copy()
+
+    for c in category:
+        label = _category_zone(self, blueprint, c, None)
+        reduce = _category_zone(self, blueprint, c, threshold, label) > 0
+
+        # electrode is kept only when all electrodes in the window belong to the same zone.
+        zone = grid.to_grid(label)
+        hi = grid.from_grid(_window(zone, x_steps, y_steps, np.maximum, 0))
+        lo = grid.from_grid(_window(zone, x_steps, y_steps, np.minimum, 0))
+        reduce &= (hi != label) | (lo != label)
+
+        ret[reduce] = unset
+
+    return ret
+
+
+def _as_threshold(threshold: int | tuple[int, int] | None) -> int | tuple[int, int] | None:
     match threshold:
         case None | int() | (int(), int()):
-            pass
+            return threshold
         case [int(), int()]:
-            threshold = tuple(threshold)
+            return tuple(threshold)
         case _:
             raise TypeError()
 
+
+def _as_steps(step: int | tuple[int, int], bi: bool) -> tuple[range, range]:
     match step:
         case int(step):
             step = (0, step)
@@ -297,31 +307,66 @@ def reduce(self: BlueprintFunctions,
         case _:
             raise TypeError()
 
-    x_steps = _step_as_range(step[0], bi)
-    y_steps = _step_as_range(step[1], bi)
+    return _step_as_range(step[0], bi), _step_as_range(step[1], bi)
 
-    ret = blueprint.copy()
-    unset = self.CATE_UNSET
 
-    from .clustering import find_clustering
-    clustering = find_clustering(self, blueprint, [category])
-    for cluster in np.unique(clustering):
-        if cluster == 0:
-            continue
+def _category_zone(self: BlueprintFunctions,
+                   blueprint: NDArray[np.int_],
+                   category: int,
+                   threshold: int | tuple[int, int] | None,
+                   label: NDArray[np.int_] = None) -> NDArray[np.int_]:
+    """
+    Label the zones of *category*.
 
-        area: NDArray[np.bool_] = clustering == cluster
-        if threshold is not None and not _check_area_size(np.count_nonzero(area), threshold):
-            continue
+    :param blueprint:
+    :param category:
+    :param threshold: only keep zones which size pass the threshold.
+    :param label: pre-computed zone label.
+    :return: zone label Array[int, E]. ``0`` for electrodes not in any (kept) zone.
+    """
+    if label is None:
+        from .clustering import find_clustering
+        label = find_clustering(self, blueprint, [category])
 
-        inner = area.copy()
-        for x in x_steps:
-            for y in y_steps:
-                np.logical_and(move_i(self, area, tx=x, ty=y, mask=area, init=False), inner, out=inner)
+    if threshold is not None:
+        size = np.bincount(label, minlength=len(label) + 1)[label]
+        label = np.where(_check_area_size(size, threshold), label, 0)
 
-        remove = np.logical_and(area, ~inner)
+    return label
 
-        ret[remove] = unset
 
+def _window(a: NDArray, x_steps: range, y_steps: range, func, fill) -> NDArray:
+    """
+    Reduce the values in a moving window on the grid, i.e. ``ret[t] = func(a[t - o] for o in window)``,
+    where the window is ``x_steps * y_steps``.
+
+    :param a: Array[V, S, X, Y]
+    :param x_steps: x offsets.
+    :param y_steps: y offsets.
+    :param func: reduce ufunc, such as ``np.maximum``.
+    :param fill: value for positions outside the grid.
+    :return: Array[V, S, X, Y]
+    """
+    # the window is a rectangle, so reduce along x and y separately.
+    for axis, steps in ((1, x_steps), (2, y_steps)):
+        ret = None
+        for o in steps:
+            b = _shift(a, o, axis, fill)
+            ret = b if ret is None else func(ret, b, out=ret)
+        a = ret
+    return a
+
+
+def _shift(a: NDArray, o: int, axis: int, fill) -> NDArray:
+    """ret[t] = a[t - o] along *axis*."""
+    n = a.shape[axis]
+    ret = np.full_like(a, fill)
+    if abs(o) < n:
+        src = [slice(None)] * a.ndim
+        dst = [slice(None)] * a.ndim
+        src[axis] = slice(max(0, -o), n - max(0, o))
+        dst[axis] = slice(max(0, o), n - max(0, -o))
+        ret[tuple(dst)] = a[tuple(src)]
     return ret
 
 
@@ -339,12 +384,12 @@ def _step_as_range(step: int, bi: bool) -> range:
     raise RuntimeError()
 
 
-def _check_area_size(area: int, threshold: int | tuple[int, int]) -> bool:
+def _check_area_size(area: int | NDArray[np.int_], threshold: int | tuple[int, int]) -> bool | NDArray[np.bool_]:
     match threshold:
         case int(threshold) if threshold >= 0:
             return threshold <= area
         case int(threshold) if threshold < 0:
             return area <= -threshold
         case (int(left), int(right)):
-            return left <= area <= right
+            return (left <= area) & (area <= right)
     raise TypeError()
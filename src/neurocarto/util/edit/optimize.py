@@ -1,18 +1,32 @@
+import itertools
+import queue
+from collections.abc import Generator, Iterator
+from typing import NamedTuple
+
 import numpy as np
 from numpy.typing import NDArray
 
 from neurocarto.probe_npx.npx import ChannelMap
-from neurocarto.probe_npx.stat import npx_channel_efficiency
+from neurocarto.probe_npx.select_batch import batch_select, BatchSelection
+from neurocarto.probe_npx.stat import npx_channel_efficiency, NpxChannelEfficiency, share_probe_table, \
+    _worker_blueprint_functions
 from neurocarto.util.util_blueprint import BlueprintFunctions
+from neurocarto.util.util_pool import use_pool, SharedArrays, spawn_seeds, CancelFlag
+from neurocarto.util.utils import doc_link
 
-__all__ = ['optimize_channelmap', 'generate_channelmap']
+__all__ = ['optimize_channelmap', 'iter_optimize_channelmap', 'OptimizeResult', 'generate_channelmap']
 
 
+@doc_link()
 def optimize_channelmap(bp: BlueprintFunctions,
                         chmap: ChannelMap,
                         blueprint: NDArray[int],
                         sample_times: int = 100, *,
                         n_worker: int = 1,
+                        batch_size: int = 0,
+                        patience: int = 0,
+                        target: float = None,
+                        seed: int | np.random.SeedSequence = None,
                         **kwargs) -> tuple[ChannelMap, float, float]:
     """
     Sample and find the optimized channelmap that has maxima channel efficiency.
@@ -21,52 +35,225 @@ def optimize_channelmap(bp: BlueprintFunctions,
     :param chmap: initial channel map
     :param blueprint:
     :param sample_times: (int=100)
+    :param n_worker: number of process.
+    :param batch_size: when it is positive, use the batched sampler with this batch size, and
+        *n_worker* is ignored. It only supports the default selector.
+    :param patience: stop early when max(Ceff) does not improve after this number of samples.
+    :param target: stop early when max(Ceff) reaches this value.
+    :param seed: random seed.
     :param kwargs: selector parameters
     :return: tuple of (channelmap, aeff, ceff)
+    :see: {iter_optimize_channelmap()}
     """
-    bp = bp.clone(pure=True)
+    result = None
+    for result in iter_optimize_channelmap(bp, chmap, blueprint, sample_times,
+                                           n_worker=n_worker, batch_size=batch_size,
+                                           patience=patience, target=target, seed=seed, **kwargs):
+        pass
 
-    if n_worker < 0:
-        raise ValueError()
-    elif n_worker in (0, 1):
-        return _optimize_channelmap(bp, chmap, blueprint, sample_times, **kwargs)
-    else:
-        import multiprocessing
-        with multiprocessing.Pool(n_worker) as pool:
+    if result is None:
+        aeff, ceff = npx_channel_efficiency(bp, chmap, blueprint)
+        return chmap, aeff, ceff
 
-            _sample_times = sample_times // n_worker
-            sample_times_list = [_sample_times] * n_worker
-            sample_times_list[-1] += sample_times - sum(sample_times_list)
+    return result.channelmap, result.aeff, result.ceff
 
-            jobs = [
-                pool.apply_async(_optimize_channelmap, (bp, chmap, blueprint, t), kwargs)
-                for t in sample_times_list
-            ]
 
-            pool.close()
-            pool.join()
+class OptimizeResult(NamedTuple):
+    """best-so-far result of :func:`iter_optimize_channelmap()`"""
 
-            max_map = None
-            max_aef = None
-            max_cef = -1
+    channelmap: ChannelMap
+    aeff: float
+    ceff: float
 
-            for i, job in enumerate(jobs):
-                chmap, aeff, ceff = job.get()
-                print(i, ceff)
-                if ceff > max_cef:
-                    max_map = chmap
-                    max_aef = aeff
-                    max_cef = ceff
+    sample_times: int
+    """number of finished samples"""
+
+
+@doc_link()
+def iter_optimize_channelmap(bp: BlueprintFunctions,
+                             chmap: ChannelMap,
+                             blueprint: NDArray[int],
+                             sample_times: int = 100, *,
+                             n_worker: int = 1,
+                             batch_size: int = 0,
+                             chunk_size: int = 10,
+                             patience: int = 0,
+                             target: float = None,
+                             seed: int | np.random.SeedSequence = None,
+                             **kwargs) -> Iterator[OptimizeResult]:
+    """
+    Sample and find the optimized channelmap that has maxima channel efficiency, and yield
+    the best-so-far result whenever a chunk of samples is finished.
+
+    Samples are split into chunks, and chunks are consumed in completion order. The convergence criteria
+    are checked after each chunk, so *patience* is counted in the granularity of chunks.
+
+    Caller could stop the iteration at any time. Unfinished chunks in workers are cancelled, and
+    they stop after their current sample, so the workers are free for the next request.
+
+    Each chunk uses an independent random stream spawned from *seed*, and ties are resolved by the chunk
+    order, so the final result does not depend on the completion order of workers unless it stops early.
+
+    :param bp:
+    :param chmap: initial channel map
+    :param blueprint:
+    :param sample_times: (int=100) maximal number of samples.
+    :param n_worker: number of process.
+    :param batch_size: when it is positive, use the batched sampler with this batch size as chunk size,
+        and *n_worker* is ignored. It only supports the default selector.
+    :param chunk_size: number of samples in one chunk.
+    :param patience: stop when max(Ceff) does not improve after this number of samples. Disabled when non-positive.
+    :param target: stop when max(Ceff) reaches this value.
+    :param seed: random seed. If not given, a single process sampling uses the global random state,
+        and parallel sampling uses fresh entropy.
+    :param kwargs: selector parameters. A generator given as *rng* is used as *seed*.
+    :return: iterator of best-so-far result.
+    :raise ValueError: both *seed* and *rng* are given.
+    """
+    if n_worker < 0:
+        raise ValueError(f'illegal n_worker : {n_worker}')
+    if chunk_size <= 0:
+        raise ValueError(f'illegal chunk_size : {chunk_size}')
 
-            pool.terminate()
+    seed = _resolve_seed(seed, kwargs)
+    bp = bp.clone(pure=True)
 
-        return max_map, max_aef, max_cef
+    if batch_size > 0:
+        chunks = _split_chunks(sample_times, batch_size)
+        seeds = spawn_seeds(seed, len(chunks))
+        chunks = _iter_optimize_batch(chmap, blueprint, chunks, seeds, batch_size, **kwargs)
+    elif n_worker in (0, 1):
+        chunks = _split_chunks(sample_times, chunk_size)
+        seeds = [None] * len(chunks) if seed is None else spawn_seeds(seed, len(chunks))
+        chunks = _iter_optimize_single(bp, chmap, blueprint, chunks, seeds, **kwargs)
+    else:
+        chunks = _split_chunks(sample_times, chunk_size)
+        seeds = spawn_seeds(seed, len(chunks))
+        chunks = _iter_optimize_pool(bp, chmap, blueprint, chunks, seeds, n_worker, **kwargs)
+
+    aeff, ceff = npx_channel_efficiency(bp, chmap, blueprint)
+    best = OptimizeResult(chmap, aeff, ceff, 0)
+    best_chunk = -1
+    samples = 0
+    stall = 0
+
+    try:
+        for i, n, (chmap, aeff, ceff) in chunks:
+            samples += n
+            if ceff > best.ceff or (ceff == best.ceff and 0 <= i < best_chunk):
+                best = OptimizeResult(chmap, aeff, ceff, samples)
+                best_chunk = i
+                stall = 0
+            else:
+                best = best._replace(sample_times=samples)
+                stall += n
+
+            yield best
+
+            if target is not None and best.ceff >= target:
+                break
+            if 0 < patience <= stall:
+                break
+    finally:
+        chunks.close()
+
+
+def _split_chunks(sample_times: int, chunk_size: int) -> list[int]:
+    ret = [chunk_size] * (sample_times // chunk_size)
+    if (remain := sample_times % chunk_size) > 0:
+        ret.append(remain)
+    return ret
+
+
+def _resolve_seed(seed: int | np.random.SeedSequence | None,
+                  kwargs: dict) -> int | np.random.SeedSequence | np.random.Generator | None:
+    # take selector's rng out of kwargs, so it is not given twice, or silently replaced by a seed.
+    if (rng := kwargs.pop('rng', None)) is None:
+        return seed
+    if seed is not None:
+        raise ValueError('give either seed or rng, not both')
+    return rng
+
+
+def _selector_kwargs(kwargs: dict, seed: np.random.SeedSequence | None) -> dict:
+    if seed is None:
+        return kwargs
+    return dict(kwargs, rng=np.random.default_rng(seed))
+
+
+_CHUNK_RESULT = Generator[tuple[int, int, tuple[ChannelMap, float, float]], None, None]
+
+
+def _iter_optimize_single(bp: BlueprintFunctions,
+                          chmap: ChannelMap,
+                          blueprint: NDArray[int],
+                          chunks: list[int],
+                          seeds: list[np.random.SeedSequence | None],
+                          **kwargs) -> _CHUNK_RESULT:
+    for i, (n, seed) in enumerate(zip(chunks, seeds)):
+        yield i, n, _optimize_channelmap(bp, chmap, blueprint, n, **_selector_kwargs(kwargs, seed))
+
+
+def _iter_optimize_pool(bp: BlueprintFunctions,
+                        chmap: ChannelMap,
+                        blueprint: NDArray[int],
+                        chunks: list[int],
+                        seeds: list[np.random.SeedSequence],
+                        n_worker: int,
+                        **kwargs) -> _CHUNK_RESULT:
+    table = share_probe_table(chmap.probe_type)
+    done = queue.SimpleQueue()
+    cancel = CancelFlag.new()
+
+    def submit(i: int):
+        n = chunks[i]
+        pool.apply_async(_optimize_channelmap_job, (bp.probe, table, chmap, blueprint, n, seeds[i], cancel), kwargs,
+                         callback=lambda r: done.put((i, n, r)),
+                         error_callback=lambda e: done.put((i, n, e)))
+
+    with use_pool(n_worker) as pool:
+        try:
+            # keep two chunks per worker in flight, so workers do not wait for the consumer.
+            index = iter(range(len(chunks)))
+            pending = 0
+            for i in itertools.islice(index, 2 * n_worker):
+                submit(i)
+                pending += 1
+
+            while pending > 0:
+                i, n, result = done.get()
+                pending -= 1
+                if isinstance(result, BaseException):
+                    raise result
+
+                for j in itertools.islice(index, 1):
+                    submit(j)
+                    pending += 1
+
+                yield i, n, result
+        finally:
+            # stop chunks still running or queued in the pool.
+            cancel.cancel()
+
+
+def _iter_optimize_batch(chmap: ChannelMap,
+                         blueprint: NDArray[int],
+                         chunks: list[int],
+                         seeds: list[np.random.SeedSequence],
+                         batch_size: int,
+                         **kwargs) -> _CHUNK_RESULT:
+    for i, (n, seed) in enumerate(zip(chunks, seeds)):
+        result = _batch_select(chmap, blueprint, n, batch_size, rng=np.random.default_rng(seed), **kwargs)
+        aeff, ceff = result.efficiency()
+        k = int(np.argmax(ceff))
+        yield i, n, (result.channelmap(k), float(aeff[k]), float(ceff[k]))
 
 
 def _optimize_channelmap(bp: BlueprintFunctions,
                          chmap: ChannelMap,
                          blueprint: NDArray[int],
                          sample_times: int = 100,
+                         cancel: CancelFlag = None,
                          **kwargs) -> tuple[ChannelMap, float, float]:
     """
     Sample and find the optimized channelmap that has maxima channel efficiency.
@@ -75,17 +262,22 @@ def _optimize_channelmap(bp: BlueprintFunctions,
     :param chmap: initial channel map
     :param blueprint:
     :param sample_times: (int=100)
+    :param cancel: stop sampling once it is cancelled, and return the best-so-far result.
     :param kwargs: selector parameters
     :return: tuple of (channelmap, aeff, ceff)
     """
     blueprint_lst = bp.apply_blueprint(blueprint=blueprint)
+    scorer = NpxChannelEfficiency.new(chmap, blueprint)
 
     max_map = chmap
-    max_aef, max_cef = npx_channel_efficiency(bp, chmap, blueprint)
+    max_aef, max_cef = scorer(chmap)
 
     for i in range(sample_times):
+        if cancel is not None and cancel.cancelled:
+            break
+
         chmap = bp.select_electrodes(chmap, blueprint_lst, **kwargs)
-        aeff, ceff = npx_channel_efficiency(bp, chmap, blueprint)
+        aeff, ceff = scorer(chmap)
         if ceff > max_cef:
             max_map = chmap
             max_aef = aeff
@@ -94,11 +286,23 @@ def _optimize_channelmap(bp: BlueprintFunctions,
     return max_map, max_aef, max_cef
 
 
+def _optimize_channelmap_job(probe, table: SharedArrays, chmap: ChannelMap, blueprint: NDArray[int], sample_times: int,
+                             seed: np.random.SeedSequence,
+                             cancel: CancelFlag,
+                             **kwargs) -> tuple[ChannelMap, float, float]:
+    if cancel.cancelled:
+        return chmap, 0.0, 0.0  # discarded by the consumer
+    bp = _worker_blueprint_functions(probe, chmap.probe_type, table)
+    return _optimize_channelmap(bp, chmap, blueprint, sample_times, cancel, **_selector_kwargs(kwargs, seed))
+
+
 def generate_channelmap(bp: BlueprintFunctions,
                         chmap: ChannelMap,
                         blueprint: NDArray[int],
                         sample_times: int = 100, *,
                         n_worker: int = 1,
+                        batch_size: int = 0,
+                        seed: int | np.random.SeedSequence = None,
                         **kwargs) -> tuple[list[ChannelMap], NDArray[float], NDArray[float]]:
     """
     generate a group of channel maps.
@@ -107,31 +311,44 @@ def generate_channelmap(bp: BlueprintFunctions,
     :param chmap: channelmap type. It is a reference.
     :param blueprint:
     :param sample_times: N (int=100)
-    :param kwargs: selector parameters
+    :param n_worker: number of process.
+    :param batch_size: when it is positive, use the batched sampler with this batch size, and
+        *n_worker* is ignored. It only supports the default selector.
+    :param seed: random seed. Each worker uses an independent random stream spawned from it.
+    :param kwargs: selector parameters. A generator given as *rng* is used as *seed*.
     :return: tuple of ([channelmap], Array[aeff, N], Array[ceff, N])
+    :raise ValueError: both *seed* and *rng* are given.
     """
+    seed = _resolve_seed(seed, kwargs)
     bp = bp.clone(pure=True)
 
+    if batch_size > 0:
+        result = _batch_select(chmap, blueprint, sample_times, batch_size, rng=np.random.default_rng(seed), **kwargs)
+        aeff, ceff = result.efficiency()
+        return result.channelmaps(), aeff, ceff
+
     if n_worker < 0:
         raise ValueError()
     elif n_worker in (0, 1):
+        if seed is not None:
+            kwargs['rng'] = np.random.default_rng(seed)
         return _generate_channelmap(bp, chmap, blueprint, sample_times, **kwargs)
     else:
-        import multiprocessing
-        with multiprocessing.Pool(n_worker) as pool:
+        table = share_probe_table(chmap.probe_type)
 
-            _sample_times = sample_times // n_worker
-            sample_times_list = [_sample_times] * n_worker
-            sample_times_list[-1] += sample_times - sum(sample_times_list)
+        _sample_times = sample_times // n_worker
+        sample_times_list = [_sample_times] * n_worker
+        sample_times_list[-1] += sample_times - sum(sample_times_list)
 
+        ret_map = []
+        ret_aef = []
+        ret_cef = []
+        with use_pool(n_worker) as pool:
             jobs = [
-                pool.apply_async(_generate_channelmap, (bp, chmap, blueprint, t), kwargs)
-                for t in sample_times_list
+                pool.apply_async(_generate_channelmap_job, (bp.probe, table, chmap, blueprint, t, s), kwargs)
+                for t, s in zip(sample_times_list, spawn_seeds(seed, n_worker))
             ]
 
-            ret_map = []
-            ret_aef = []
-            ret_cef = []
             for job in jobs:
                 chmap, aeff, ceff = job.get()
                 ret_map.extend(chmap)
@@ -148,15 +365,29 @@ def _generate_channelmap(bp: BlueprintFunctions,
                          **kwargs) -> tuple[list[ChannelMap], NDArray[float], NDArray[float]]:
     blueprint_lst = bp.apply_blueprint(blueprint=blueprint)
 
-    ret_map = []
-    ret_aef = []
-    ret_cef = []
+    ret_map = [
+        bp.select_electrodes(chmap, blueprint_lst, **kwargs)
+        for _ in range(sample_times)
+    ]
+
+    ret_aef, ret_cef = NpxChannelEfficiency.new(chmap, blueprint).score_channelmaps(ret_map)
+    return ret_map, ret_aef, ret_cef
+
+
+def _generate_channelmap_job(probe, table: SharedArrays, chmap: ChannelMap, blueprint: NDArray[int], sample_times: int,
+                             seed: np.random.SeedSequence,
+                             **kwargs) -> tuple[list[ChannelMap], NDArray[float], NDArray[float]]:
+    bp = _worker_blueprint_functions(probe, chmap.probe_type, table)
+    return _generate_channelmap(bp, chmap, blueprint, sample_times, **_selector_kwargs(kwargs, seed))
 
-    for i in range(sample_times):
-        chmap = bp.select_electrodes(chmap, blueprint_lst, **kwargs)
-        aeff, ceff = npx_channel_efficiency(bp, chmap, blueprint)
-        ret_map.append(chmap)
-        ret_aef.append(aeff)
-        ret_cef.append(ceff)
 
-    return ret_map, np.array(ret_aef), np.array(ret_cef)
+def _batch_select(chmap: ChannelMap,
+                  blueprint: NDArray[int],
+                  sample_times: int,
+                  batch_size: int,
+                  selector: str = 'default',
+                  rng: np.random.Generator = None,
+                  **kwargs) -> BatchSelection:
+    if selector not in ('default', 'default-fast'):
+        raise ValueError(f'batch sampling does not support selector : {selector}')
+    return batch_select(chmap, blueprint, sample_times, batch_size=batch_size, rng=rng)
@@ -67,12 +67,8 @@ def capture_electrode(self: BlueprintFunctions, controller: ControllerView,
         view.set_capture_electrodes(captured)
     else:
         for s in state:
-            try:
-                data = view.data_electrodes[s]
-            except KeyError:
-                pass
-            else:
-                view.set_capture_electrodes(captured, data)
+            if s in view.render_electrodes:
+                view.set_capture_electrodes(captured, s)
 
 
 @doc_link(DOC=textwrap.dedent(BlueprintFunctions.clear_capture_electrode.__doc__))
@@ -94,7 +90,7 @@ def captured_electrodes(controller: ControllerView, all=False) -> NDArray[np.int
     if all:
         captured = view.get_captured_electrodes_index(None, reset=False)
     else:
-        captured = view.get_captured_electrodes_index(view.data_electrodes[ProbeDesp.STATE_USED], reset=False)
+        captured = view.get_captured_electrodes_index(ProbeDesp.STATE_USED, reset=False)
 
     return np.unique(captured)
 
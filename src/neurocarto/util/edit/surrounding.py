@@ -23,11 +23,10 @@ def surrounding(self: BlueprintFunctions, i: int | tuple[int, int, int], *, diag
     else:
         code = [0, 2, 4, 6]
 
-    pos = self._position_index
-    for c in code:
-        p = get_surrounding(self, (s, x, y), c)
-        if (i := pos.get(p, None)) is not None:
-            yield i
+    p = np.array([get_surrounding(self, (s, x, y), c) for c in code])
+    index = self.grid.index_of(p[:, 0], p[:, 1], p[:, 2])
+    for i in index[index >= 0]:
+        yield int(i)
 
 
 def get_surrounding(self: BlueprintFunctions, i: int | tuple[int, int, int], p: int) -> tuple[int, int, int]:
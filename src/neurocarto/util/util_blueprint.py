@@ -21,6 +21,7 @@ else:
 if TYPE_CHECKING:
     from matplotlib.axes import Axes
     from neurocarto.util.edit.clustering import ClusteringEdges
+    from neurocarto.util.edit.grid import ElectrodeGrid
     from neurocarto.util.probe_coor import ProbeCoordinate
     from neurocarto.views.atlas import Label
 
@@ -131,7 +132,10 @@ class BlueprintFunctions(Generic[M, E]):
         * {#clear_blueprint()}
         * {#apply_blueprint()}
         * {#from_blueprint()}
+        * {#from_blueprints()}
         * {#index_blueprint()}
+        * {#electrode_index()}
+        * {#grid}
         * {#load_blueprint()}
         * {#save_blueprint()}
         * {#set()}
@@ -196,6 +200,7 @@ class BlueprintFunctions(Generic[M, E]):
         * {#atlas_set_anchor_on_probe()}
         * {#atlas_coor_electrode()}
         * {#atlas_mask_region()}
+        * {#atlas_label_region()}
 
     **Blueprint script view functions**
 
@@ -274,45 +279,70 @@ class BlueprintFunctions(Generic[M, E]):
         self.categories: Final[dict[str, int]] = probe.all_possible_categories()
         """categories mapping."""
 
-        if chmap is not None:
-            electrodes = probe.all_electrodes(chmap)
-        else:
-            electrodes = []
-
-        self.electrodes: Final[list[E]] = electrodes
-        """all available electrodes"""
+        self._electrodes: list[E] | None
+        self._grid: ElectrodeGrid | None = None
 
         if chmap is not None:
-            self.s: Final[NDArray[np.int_]] = np.array([it.s for it in self.electrodes])
+            geometry, self._electrodes = _probe_geometry(probe, chmap)
+
+            self.s: Final[NDArray[np.int_]] = geometry.s
             """shank"""
-            self.x: Final[NDArray[np.int_]] = np.array([it.x for it in self.electrodes])
+            self.x: Final[NDArray[np.int_]] = geometry.x
             """x position in um"""
-            self.y: Final[NDArray[np.int_]] = np.array([it.y for it in self.electrodes])
+            self.y: Final[NDArray[np.int_]] = geometry.y
             """y position in um"""
 
-            self.dx: Final[float] = float(np.min(np.diff(np.unique(self.x))))
-            self.dy: Final[float] = float(np.min(np.diff(np.unique(self.y))))
-            if self.dx <= 0 or self.dy <= 0:
-                raise ValueError(f'dx={self.dx}, dy={self.dy}')
-
-            self._position_index: dict[tuple[int, int, int], int] = {
-                (int(self.s[i]), int(self.x[i] / self.dx), int(self.y[i] / self.dy)): i
-                for i in range(len(self.s))
-            }
+            self.dx: Final[float] = geometry.dx
+            self.dy: Final[float] = geometry.dy
 
-            self._blueprint: BLUEPRINT | None = np.array([it.category for it in electrodes])
+            self._position_index: dict[tuple[int, int, int], int] = geometry.position_index
+            self._geometry: _ProbeGeometry | None = geometry
+            self._blueprint: BLUEPRINT | None = geometry.blueprint.copy()
         else:
+            self._electrodes = []
+            self._geometry = None
             self._blueprint = None
 
         self._controller: ControllerView | None = None
         self._blueprint_changed = False
 
+    @property
+    def electrodes(self) -> list[E]:
+        """
+        all available electrodes. They are created at the first access, and owned by this instance (and its clones).
+        """
+        if (ret := getattr(self, '_electrodes', None)) is None:
+            ret = self._electrodes = self.probe.all_electrodes(self.channelmap)
+        return ret
+
+    @electrodes.setter
+    def electrodes(self, electrodes: list[E]):
+        self._electrodes = electrodes
+
     def __len__(self) -> int:
         """number of total electrodes"""
         if self.channelmap is None:
             return 0
         return len(self.s)
 
+    @property
+    def grid(self) -> ElectrodeGrid:
+        """
+        Electrodes rasterized on a dense (shank, x, y) grid. It is created at the first access.
+
+        :raise RuntimeError: when probe is missing.
+        """
+        if self.channelmap is None:
+            raise RuntimeError('probe missing')
+
+        if (ret := getattr(self, '_grid', None)) is None:
+            if (geometry := getattr(self, '_geometry', None)) is not None:
+                ret = self._grid = geometry.get_grid()
+            else:
+                from .edit.grid import ElectrodeGrid
+                ret = self._grid = ElectrodeGrid.new(self.s, self.x, self.y, self.dx, self.dy)
+        return ret
+
     def __getattr__(self, item: str):
         if item.startswith('CATE_'):
             if (ret := self.categories.get(item[5:], None)) is not None:
@@ -344,7 +374,7 @@ class BlueprintFunctions(Generic[M, E]):
         ret = object.__new__(BlueprintFunctions)
         ret.probe = self.probe
         ret.channelmap = channelmap
-        ret.electrodes = self.electrodes
+        ret._electrodes = getattr(self, '_electrodes', None)
         ret.categories = self.categories
 
         ret.s = self.s
@@ -353,6 +383,8 @@ class BlueprintFunctions(Generic[M, E]):
         ret.dx = self.dx
         ret.dy = self.dy
         ret._position_index = self._position_index
+        ret._geometry = getattr(self, '_geometry', None)
+        ret._grid = getattr(self, '_grid', None)
         ret._blueprint = self._blueprint.copy()
         ret._blueprint_changed = False
 
@@ -557,19 +589,12 @@ class BlueprintFunctions(Generic[M, E]):
 
         if electrodes is None:
             electrodes = self.electrodes
-        else:
-            for e in electrodes:
-                e.state = ProbeDesp.STATE_UNUSED
 
-        for e in self.probe.all_channels(channelmap, electrodes):
-            for t in self.probe.invalid_electrodes(channelmap, e, electrodes):
-                t.state = ProbeDesp.STATE_DISABLED
-            e.state = ProbeDesp.STATE_USED
+        self.probe.reset_electrode_state(channelmap, electrodes)
 
-        c = {it.electrode: it for it in electrodes}
-        for e, p in zip(self.electrodes, blueprint):
-            if (t := c.get(e.electrode, None)) is not None:
-                t.category = int(p)
+        for t, i in zip(electrodes, self.electrode_index(electrodes).tolist()):
+            if i >= 0:
+                t.category = int(blueprint[i])
 
         return electrodes
 
@@ -583,41 +608,73 @@ class BlueprintFunctions(Generic[M, E]):
         :raise RuntimeError: when probe is missing.
         :see: {#apply_blueprint()}
         """
-        blueprint = self.new_blueprint()
-        c = {it.electrode: it.category for it in electrodes}
-        for i, e in enumerate(self.electrodes):
-            if (category := c.get(e.electrode, None)) is not None:
-                blueprint[i] = category
-        return blueprint
+        return self.from_blueprints([electrodes])[0]
+
+    @doc_link()
+    def from_blueprints(self, electrodes: Sequence[ELECTRODES]) -> NDArray[np.int_]:
+        """
+        Get blueprints from electrode lists at once.
+
+        :param electrodes: list of electrode list
+        :return: Array[category, K, E], where K is the number of electrode lists.
+        :raise RuntimeError: when probe is missing.
+        :see: {#from_blueprint()}
+        """
+        if self.channelmap is None:
+            raise RuntimeError('probe missing')
+
+        ret = np.full((len(electrodes), len(self.s)), self.CATE_UNSET, dtype=int)
+
+        items = [(k, t) for k, it in enumerate(electrodes) for t in it]
+        if len(items) == 0:
+            return ret
+
+        k = np.array([it[0] for it in items])
+        c = np.array([it[1].category for it in items])
+        i = self.electrode_index([it[1] for it in items])
+        ret[k[i >= 0], i[i >= 0]] = c[i >= 0]
+        return ret
 
     def index_blueprint(self, electrodes: ELECTRODES | NDArray[np.int_]) -> NDArray[np.int_]:
         """
         Get an electrode index array from an electrode list.
 
         :param electrodes: list of electrode or an Array[int, N, (S,X,Y)].
-        :return: electrode index Array[E:int, N], follow *electrodes* ordering.
+        :return: electrode index Array[E:int, N], follow *electrodes* ordering. Electrodes not found are dropped.
+        :raise RuntimeError: when probe is missing.
+        :see: {#electrode_index()}
+        """
+        ret = self.electrode_index(electrodes)
+        return ret[ret >= 0]
+
+    @doc_link()
+    def electrode_index(self, electrodes: ELECTRODES | NDArray[np.int_]) -> NDArray[np.int_]:
+        """
+        Get an electrode index array from an electrode list or a position array in any shape.
+
+        It looks up all positions in one call with {#grid}.
+
+        :param electrodes: list of electrode or an Array[int, ..., (S,X,Y)].
+        :return: electrode index Array[E:int, ...], follow *electrodes* ordering. ``-1`` for electrodes not found.
         :raise RuntimeError: when probe is missing.
         """
         if self.channelmap is None:
             raise RuntimeError('probe missing')
 
-        ret = []
-        pos = self._position_index
-
         if isinstance(electrodes, list):
-            for e in electrodes:
-                p = int(e.s), int(e.x / self.dx), int(e.y / self.dy)
-                if (i := pos.get(p, None)) is not None:
-                    ret.append(i)
+            s = np.array([it.s for it in electrodes], dtype=int)
+            x = np.array([it.x for it in electrodes], dtype=float)
+            y = np.array([it.y for it in electrodes], dtype=float)
         elif isinstance(electrodes, np.ndarray):
-            for (s, x, y) in electrodes:
-                p = int(s), int(x / self.dx), int(y / self.dy)
-                if (i := pos.get(p, None)) is not None:
-                    ret.append(i)
+            if electrodes.shape[-1] != 3:
+                raise ValueError(f'not an Array[int, ..., (S,X,Y)] : {electrodes.shape}')
+            s = electrodes[..., 0]
+            x = electrodes[..., 1]
+            y = electrodes[..., 2]
         else:
             raise TypeError()
 
-        return np.array(ret, dtype=int)
+        return self.grid.index_of(s, (x / self.dx).astype(int), (y / self.dy).astype(int))
 
     def load_blueprint(self, file: str | Path) -> BLUEPRINT:
         """
@@ -949,9 +1006,9 @@ class BlueprintFunctions(Generic[M, E]):
     @blueprint_function
     @doc_link()
     def extend(self, blueprint: BLUEPRINT,
-               category: int,
+               category: int | list[int],
                step: int | tuple[int, int],
-               value: int = None, *,
+               value: int | list[int] = None, *,
                threshold: int | tuple[int, int] = None,
                bi: bool = True,
                overwrite: bool = False) -> BLUEPRINT:
@@ -961,9 +1018,10 @@ class BlueprintFunctions(Generic[M, E]):
         It is a {blueprint_function()} function.
 
         :param blueprint: Array[category, N]
-        :param category: on which category zone.
+        :param category: on which category zone. For a list of categories, all zones are extended at once
+            from the given *blueprint*, and former categories take priority where the extending overlaps.
         :param step: expend step on y or (x, y)
-        :param value: a category value used in the extending.
+        :param value: a category value (or values paired with *category*) used in the extending.
         :param threshold: Positive value: extend the zone which size larger than threshold.
             Negative value: extend the zone which size smaller than threshold.
             A tuple: extend the zone which size in a range.
@@ -977,7 +1035,7 @@ class BlueprintFunctions(Generic[M, E]):
     @blueprint_function
     @doc_link()
     def reduce(self, blueprint: BLUEPRINT,
-               category: int,
+               category: int | list[int],
                step: int | tuple[int, int], *,
                threshold: int | tuple[int, int] = None,
                bi: bool = True) -> BLUEPRINT:
@@ -987,7 +1045,7 @@ class BlueprintFunctions(Generic[M, E]):
         It is a {blueprint_function()} function.
 
         :param blueprint: Array[category, N]
-        :param category: on which category zone.
+        :param category: on which category zone, or a list of categories.
         :param step: reduce step on y or (x, y)
         :param threshold: Positive value: extend the zone which size larger than threshold.
             Negative value: extend the zone which size smaller than threshold.
@@ -1604,6 +1662,26 @@ class BlueprintFunctions(Generic[M, E]):
 
         return atlas_mask_region(self, controller, region, coor, electrode)
 
+    @doc_link()
+    def atlas_label_region(self, coor: ProbeCoordinate = None,
+                           electrode: NDArray[np.int_] | NDArray[np.bool_] | NDArray[np.float64] = None,
+                           level: int = None) -> NDArray[np.int_]:
+        """
+        Label electrodes with the regions they located in, at every hierarchy level.
+
+        :param coor: probe coordinate
+        :param electrode: electrode index (Array[int, N]), mask (Array[bool, E]) or position (Array[um:float, N, (x, y)])
+        :param level: only the region at given hierarchy depth (0 is the root).
+        :return: region id Array[int, N, D], or Array[int, N] when *level* is given. ``0`` for outside any region.
+        :see: use {#atlas_current_probe()} when *coor* is ``None``.
+        :see: use {#atlas_mask_region()}
+        """
+        from .edit.atlas import atlas_label_region
+        if (controller := self._controller) is None:
+            raise RuntimeError('cannot determine current atlas')
+
+        return atlas_label_region(self, controller, coor, electrode, level)
+
     # =================== #
     # matplotlib plotting #
     # =================== #
@@ -1710,3 +1788,70 @@ class BlueprintFunctions(Generic[M, E]):
             profile_script(self, controller, script, *args, **kwargs)
         else:
             raise RuntimeError()
+
+
+class _ProbeGeometry:
+    """
+    Electrode geometry of a probe type, shared by all BlueprintFunctions of the same probe type.
+    All arrays are read-only.
+    """
+
+    __slots__ = 's', 'x', 'y', 'dx', 'dy', 'position_index', 'blueprint', 'grid'
+
+    def __init__(self, electrodes: list[E]):
+        self.s = np.array([it.s for it in electrodes])
+        self.x = np.array([it.x for it in electrodes])
+        self.y = np.array([it.y for it in electrodes])
+
+        self.dx = float(np.min(np.diff(np.unique(self.x))))
+        self.dy = float(np.min(np.diff(np.unique(self.y))))
+        if self.dx <= 0 or self.dy <= 0:
+            raise ValueError(f'dx={self.dx}, dy={self.dy}')
+
+        self.position_index = {
+            (int(s), int(x / self.dx), int(y / self.dy)): i
+            for i, (s, x, y) in enumerate(zip(self.s.tolist(), self.x.tolist(), self.y.tolist()))
+        }
+
+        self.blueprint = np.array([it.category for it in electrodes])
+        self.grid = None
+
+        for a in (self.s, self.x, self.y, self.blueprint):
+            a.setflags(write=False)
+
+    def get_grid(self) -> ElectrodeGrid:
+        if (ret := self.grid) is None:
+            from .edit.grid import ElectrodeGrid
+            ret = self.grid = ElectrodeGrid.new(self.s, self.x, self.y, self.dx, self.dy)
+        return ret
+
+
+_GEOMETRY_CACHE: dict[tuple[type, int], _ProbeGeometry] = {}
+_GEOMETRY_CACHE_SIZE = 8
+
+
+def _probe_geometry(probe: ProbeDesp[M, E], chmap: M) -> tuple[_ProbeGeometry, list[E] | None]:
+    """
+    Get the electrode geometry of *chmap*, keyed by the probe type (``probe.channelmap_code(chmap)``).
+
+    :return: tuple of (geometry, electrodes). *electrodes* is the fresh electrode list when the geometry
+        is just built, otherwise ``None``.
+    """
+    if (code := probe.channelmap_code(chmap)) is None:
+        electrodes = probe.all_electrodes(chmap)
+        return _ProbeGeometry(electrodes), electrodes
+
+    key = (type(probe), code)
+    try:
+        geometry = _GEOMETRY_CACHE.pop(key)
+    except KeyError:
+        electrodes = probe.all_electrodes(chmap)
+        geometry = _ProbeGeometry(electrodes)
+    else:
+        electrodes = None
+
+    _GEOMETRY_CACHE[key] = geometry  # move to end
+    while len(_GEOMETRY_CACHE) > _GEOMETRY_CACHE_SIZE:
+        del _GEOMETRY_CACHE[next(iter(_GEOMETRY_CACHE))]
+
+    return geometry, electrodes
@@ -0,0 +1,293 @@
+"""
+A long-lived process pool for parallel computing, and shared memory arrays for its workers.
+
+The pool is started lazily at the first request and kept alive until the interpreter exits,
+so repeated parallel computations do not pay the process startup cost each time. Use :func:`use_pool`
+to hold the pool during a computation, so it is not closed under the caller when another caller
+requests a larger pool.
+Large read-only tables could be put in shared memory via :class:`SharedArrays`, so jobs only need
+to carry a small handle instead of pickling the whole tables. :func:`spawn_seeds` gives each job an
+independent random stream, which does not depend on the global random state inherited from the parent process.
+:class:`CancelFlag` lets the parent process stop submitted jobs, which otherwise keep occupying the
+workers after their caller gave up.
+"""
+from __future__ import annotations
+
+import atexit
+import contextlib
+import multiprocessing
+import sys
+import threading
+from multiprocessing.pool import Pool
+from multiprocessing.shared_memory import SharedMemory
+from collections.abc import Iterator
+from typing import NamedTuple
+
+import numpy as np
+from numpy.typing import NDArray
+
+from neurocarto.util.utils import doc_link
+
+if sys.version_info >= (3, 11):
+    from typing import Self
+else:
+    from typing_extensions import Self
+
+__all__ = ['get_pool', 'use_pool', 'shutdown_pool', 'SharedArrays', 'spawn_seeds', 'CancelFlag']
+
+_POOL_LOCK = threading.Lock()
+_POOL: Pool | None = None
+_POOL_SIZE = 0
+_POOL_USERS: dict[Pool, int] = {}  # pools held by use_pool(), including replaced ones.
+
+_SHARED_OWNED: dict[str, SharedMemory] = {}
+_SHARED_ATTACHED: dict[str, SharedMemory] = {}
+
+_CANCEL_SLOTS = 64
+_CANCEL_LOCK = threading.Lock()
+_CANCEL_BOARD: SharedArrays | None = None
+_CANCEL_FREE: list[int] = []
+_CANCEL_TOKEN = 0
+
+
+@doc_link()
+def get_pool(n_worker: int) -> Pool:
+    """
+    Get the process pool which has at least *n_worker* processes.
+
+    The pool is started at the first call, and replaced with a larger one when more workers are requested.
+    A replaced pool is closed at once, unless it is held by :func:`use_pool`, then it is closed once released.
+    Caller should not close or terminate the returned pool. Use {shutdown_pool()} instead.
+
+    :param n_worker: number of process.
+    :return: process pool.
+    :raise ValueError: non-positive *n_worker*.
+    """
+    if n_worker <= 0:
+        raise ValueError(f'illegal n_worker : {n_worker}')
+
+    with _POOL_LOCK:
+        return _get_pool(n_worker)
+
+
+def _get_pool(n_worker: int) -> Pool:
+    global _POOL, _POOL_SIZE
+
+    if _POOL is None or _POOL_SIZE < n_worker:
+        if _POOL is not None and _POOL not in _POOL_USERS:
+            _POOL.close()
+            _POOL.join()
+
+        # let workers share the resource tracker of this process, otherwise each worker
+        # starts its own one which unlinks attached shared memory at its exit.
+        if sys.platform != 'win32':
+            from multiprocessing import resource_tracker
+            resource_tracker.ensure_running()
+
+        _POOL = multiprocessing.Pool(n_worker)
+        _POOL_SIZE = n_worker
+
+    return _POOL
+
+
+@contextlib.contextmanager
+@doc_link()
+def use_pool(n_worker: int) -> Iterator[Pool]:
+    """
+    Get the process pool like {get_pool()}, and hold it until the context exits.
+
+    A held pool keeps accepting jobs, even if it is replaced by a larger one in the meantime.
+
+    :param n_worker: number of process.
+    :return: a context manager carries the process pool.
+    :raise ValueError: non-positive *n_worker*.
+    """
+    if n_worker <= 0:
+        raise ValueError(f'illegal n_worker : {n_worker}')
+
+    with _POOL_LOCK:
+        pool = _get_pool(n_worker)
+        _POOL_USERS[pool] = _POOL_USERS.get(pool, 0) + 1
+
+    try:
+        yield pool
+    finally:
+        with _POOL_LOCK:
+            if (users := _POOL_USERS.pop(pool) - 1) > 0:
+                _POOL_USERS[pool] = users
+                replaced = False
+            else:
+                replaced = pool is not _POOL
+
+        if replaced:
+            # jobs were done or cancelled by the last user.
+            pool.close()
+
+
+@doc_link()
+def shutdown_pool():
+    """Terminate the process pool. A new one will be started at next {get_pool()}."""
+    global _POOL, _POOL_SIZE
+
+    with _POOL_LOCK:
+        if (pool := _POOL) is not None:
+            _POOL = None
+            _POOL_SIZE = 0
+            pool.terminate()
+            pool.join()
+
+
+def spawn_seeds(seed: int | np.random.SeedSequence | np.random.Generator | None,
+                n: int) -> list[np.random.SeedSequence]:
+    """
+    Spawn *n* independent child seeds from *seed*.
+
+    :param seed: root seed. If ``None``, use fresh entropy from OS. If it is a generator, child seeds
+        are drawn from it, which advances its state.
+    :param n: number of child seeds.
+    :return: list of seed sequence. Use ``numpy.random.default_rng()`` to create generators.
+    """
+    if isinstance(seed, np.random.Generator):
+        return [np.random.SeedSequence(int(it)) for it in seed.integers(2 ** 63, size=n)]
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    return seed.spawn(n)
+
+
+@doc_link()
+class SharedArrays(NamedTuple):
+    """
+    A picklable handle of numpy arrays which are stored in one shared memory block.
+
+    The creator process owns the memory block, which is released at interpreter exit or
+    by {#release()}. Other processes use {#attach()} to get read-only array views.
+    """
+
+    name: str
+    """shared memory name"""
+
+    layout: tuple[tuple[str, str, tuple[int, ...], int], ...]
+    """tuple of (key, dtype, shape, offset)"""
+
+    @classmethod
+    def create(cls, arrays: dict[str, NDArray]) -> Self:
+        """
+        Copy *arrays* into a new shared memory block.
+
+        :param arrays: {key: array}
+        :return: handle
+        """
+        layout = []
+        size = 0
+        for key, a in arrays.items():
+            a = np.ascontiguousarray(a)
+            layout.append((key, a.dtype.str, a.shape, size))
+            size += (a.nbytes + 7) // 8 * 8
+
+        shm = SharedMemory(create=True, size=max(size, 8))
+        _SHARED_OWNED[shm.name] = shm
+
+        ret = cls(shm.name, tuple(layout))
+        for key, a in ret._views(shm).items():
+            a[...] = arrays[key]
+            a.setflags(write=False)
+        return ret
+
+    def attach(self) -> dict[str, NDArray]:
+        """
+        Get read-only views of the arrays.
+
+        :return: {key: array}
+        """
+        if (shm := _SHARED_OWNED.get(self.name, None)) is None:
+            if (shm := _SHARED_ATTACHED.get(self.name, None)) is None:
+                shm = _SHARED_ATTACHED[self.name] = SharedMemory(name=self.name)
+
+        ret = self._views(shm)
+        for a in ret.values():
+            a.setflags(write=False)
+        return ret
+
+    def _views(self, shm: SharedMemory) -> dict[str, NDArray]:
+        return {
+            key: np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf, offset=offset)
+            for key, dtype, shape, offset in self.layout
+        }
+
+    def release(self):
+        """Release the memory block. Only the creator process can release it."""
+        if (shm := _SHARED_OWNED.pop(self.name, None)) is not None:
+            _release(shm)
+
+
+@doc_link()
+class CancelFlag(NamedTuple):
+    """
+    A picklable cancellation flag, which is set by the creator process and polled by pool workers.
+
+    Flags live in a small shared memory board. Each flag occupies a slot holding its token until
+    it is cancelled, so a slot could be reused right after {#cancel()} without reviving old jobs.
+    When all slots are occupied, new flags are never cancelled.
+    """
+
+    board: SharedArrays | None
+    slot: int
+    token: int
+
+    @classmethod
+    def new(cls) -> Self:
+        """Create a flag. Only the process owning the pool should create flags."""
+        global _CANCEL_BOARD, _CANCEL_TOKEN
+
+        with _CANCEL_LOCK:
+            if _CANCEL_BOARD is None:
+                _CANCEL_BOARD = SharedArrays.create({'token': np.zeros((_CANCEL_SLOTS,), dtype=np.int64)})
+                _CANCEL_FREE.extend(range(_CANCEL_SLOTS))
+
+            if len(_CANCEL_FREE) == 0:
+                return cls(None, -1, 0)
+
+            _CANCEL_TOKEN += 1
+            slot = _CANCEL_FREE.pop()
+            _CANCEL_BOARD._views(_SHARED_OWNED[_CANCEL_BOARD.name])['token'][slot] = _CANCEL_TOKEN
+            return cls(_CANCEL_BOARD, slot, _CANCEL_TOKEN)
+
+    def cancel(self):
+        """Set the flag and release its slot. It is safe to call it more than once."""
+        if (board := self.board) is None:
+            return
+
+        with _CANCEL_LOCK:
+            token = board._views(_SHARED_OWNED[board.name])['token']
+            if token[self.slot] == self.token:
+                token[self.slot] = 0
+                _CANCEL_FREE.append(self.slot)
+
+    @property
+    def cancelled(self) -> bool:
+        """Whether the flag is set. It could be checked in any process."""
+        if (board := self.board) is None:
+            return False
+        return int(board.attach()['token'][self.slot]) != self.token
+
+
+def _cleanup():
+    shutdown_pool()
+
+    for shm in list(_SHARED_OWNED.values()):
+        _release(shm)
+    _SHARED_OWNED.clear()
+
+
+def _release(shm: SharedMemory):
+    try:
+        shm.unlink()
+    except FileNotFoundError:
+        pass
+    try:
+        shm.close()
+    except BufferError:  # array views are still alive
+        pass
+
+
+atexit.register(_cleanup)
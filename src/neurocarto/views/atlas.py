@@ -10,7 +10,7 @@ from numpy.typing import NDArray
 from neurocarto.config import CartoConfig
 from neurocarto.util import probe_coor
 from neurocarto.util.atlas_brain import get_atlas_brain, REFERENCE
-from neurocarto.util.atlas_slice import SlicePlane, SLICE, SliceView
+from neurocarto.util.atlas_slice import SlicePlane, SLICE, SliceView, SliceCache, SlicePrefetcher, SLICE_CACHE
 from neurocarto.util.atlas_struct import Structures
 from neurocarto.util.bokeh_util import ButtonFactory, SliderFactory, as_callback, new_help_button, recursive_call_barrier
 from neurocarto.util.util_numpy import closest_point_index
@@ -58,6 +58,8 @@ class AtlasBrainView(BoundView, StateView[AtlasBrainViewState]):
     Used command-line arguments:
     * '--atlas' : brain name.
     * '--atlas-root' : data saving directory.
+    * '--atlas-cache' : memory budget of slice image cache.
+    * '--atlas-prefetch' : number of neighbouring slices prefetched in background.
 
     Event Call chain
     ----------------
@@ -101,7 +103,8 @@ class AtlasBrainView(BoundView, StateView[AtlasBrainViewState]):
         super().__init__(config, logger=logger)
 
         self.logger.debug('init(%s)', config.atlas_name)
-        self.brain = get_atlas_brain(config.atlas_name, config.atlas_root)
+        from neurocarto.files import user_cache_file
+        self.brain = get_atlas_brain(config.atlas_name, config.atlas_root, mmap_dir=user_cache_file(config, 'atlas'))
 
         self._origin: tuple[float, float, float] | None = None
         try:
@@ -116,6 +119,9 @@ class AtlasBrainView(BoundView, StateView[AtlasBrainViewState]):
         self.data_region = ColumnDataSource(data=dict(image=[], x=[], y=[], dw=[], dh=[]))
         self.data_labels = ColumnDataSource(data=dict(i=[], x=[], y=[], label=[], color=[], ap=[], dv=[], ml=[]))
 
+        # SLICE_CACHE is shared by all sessions. Its budget is set once by the application.
+        self._slice_cache: SliceCache | None = SLICE_CACHE if config.atlas_cache > 0 else None
+        self._slice_prefetch = SlicePrefetcher(config.atlas_prefetch)
         self._brain_view: SliceView | None = None
         self._brain_slice: SlicePlane | None = None
         self._regions: dict[str, int] = {}
@@ -415,6 +421,10 @@ class AtlasBrainView(BoundView, StateView[AtlasBrainViewState]):
         elif (plane := self._brain_slice) is not None:
             self.update_image(plane.image)
 
+    def cleanup(self):
+        # stop prefetcher thread, which keeps the plane and volumes referenced.
+        self._slice_prefetch.close()
+
     # ====== #
     # Labels #
     # ====== #
@@ -628,11 +638,12 @@ class AtlasBrainView(BoundView, StateView[AtlasBrainViewState]):
 
         if isinstance(view, str):
             try:
-                view = SliceView(self.brain, view)
+                view = SliceView(self.brain, view, cache=self._slice_cache)
             except ValueError as e:
                 self.logger.warning('slice_view(%s)', view, exc_info=e)
-                view = SliceView(self.brain, 'coronal')
+                view = SliceView(self.brain, 'coronal', cache=self._slice_cache)
 
+        self._slice_prefetch.cancel()
         self._brain_view = view
         self.logger.debug('slice_view(%s)', view.name)
 
@@ -653,9 +664,10 @@ class AtlasBrainView(BoundView, StateView[AtlasBrainViewState]):
                            update_image=True):
         view = self.brain_view
 
+        previous = self._brain_slice
         if isinstance(plane, int):
-            if (_slice := self._brain_slice) is not None:
-                plane = _slice.with_plane(plane)
+            if previous is not None:
+                plane = previous.with_plane(plane)
             else:
                 plane = view.plane_at(plane)
 
@@ -685,6 +697,19 @@ class AtlasBrainView(BoundView, StateView[AtlasBrainViewState]):
                 self.update_image(None)
             else:
                 self.update_image(plane.image)
+                self._prefetch_slices(previous, plane)
+
+    def _prefetch_slices(self, previous: SlicePlane | None, plane: SlicePlane):
+        """prefetch slices next to *plane*, in the direction of motion from *previous*."""
+        direction = 0
+        if previous is not None and previous.slice is plane.slice and (previous.dw, previous.dh) == (plane.dw, plane.dh):
+            direction = plane.plane - previous.plane
+
+        volume = [self.brain.reference]
+        if len(self._regions):
+            volume.append(self.brain.annotation)
+
+        self._slice_prefetch.prefetch(plane, direction, *volume)
 
     def get_plane_offset(self, plane: int) -> float:
         view = self.brain_view
@@ -753,9 +778,8 @@ class AtlasBrainView(BoundView, StateView[AtlasBrainViewState]):
         if len(self._regions) == 0 or (plane := self._brain_slice) is None:
             self.data_region.data = dict(image=[], dw=[], dh=[], x=[], y=[])
         else:
-            view = SliceView(self.brain, plane.slice.name, self.brain.annotation)
-            plane = view.plane_at(plane)
-            self.data_region.data = self.transform_image_data(self.process_image_data(np.flipud(plane.image)))
+            image = plane.image_of(self.brain.annotation)
+            self.data_region.data = self.transform_image_data(self.process_image_data(np.flipud(image)))
 
     def process_image_data(self, image: NDArray[np.uint]) -> NDArray[np.uint]:
         return self._structure.image_annotation(image, self._regions, 0)
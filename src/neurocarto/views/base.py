@@ -1,10 +1,11 @@
 from __future__ import annotations
 
 import abc
+import functools
 import logging
 import math
 import sys
-from typing import TypeVar, Generic, TypedDict, Any, TYPE_CHECKING, cast, final, NamedTuple
+from typing import TypeVar, Generic, TypedDict, Any, TYPE_CHECKING, cast, final, NamedTuple, ClassVar
 
 import numpy as np
 from bokeh.models import UIElement, ColumnDataSource, GlyphRenderer, Slider, Switch, Div, tools
@@ -34,7 +35,7 @@ __all__ = [
     'Figure',
     'ViewBase', 'ControllerView',
     'StateView', 'GlobalStateView',
-    'DynamicView', 'EditorView',
+    'DynamicView', 'ProbeUpdate', 'EditorView',
     'ExtensionView', 'InvisibleView',
     'RecordView', 'RecordStep',
     'BoundaryState',
@@ -169,6 +170,10 @@ class ViewBase(metaclass=abc.ABCMeta):
         """Invoked when figure is ready."""
         pass
 
+    def cleanup(self):
+        """Invoked when the session is destroyed. Release resources, such as worker threads."""
+        pass
+
     # =========== #
     # GUI methods #
     # =========== #
@@ -444,11 +449,18 @@ class GlobalStateView(StateView[S], Generic[S], metaclass=abc.ABCMeta):
         pass
 
 
+@doc_link()
 class DynamicView:
     """
     This view component needs to be aware on modification of channelmap and electrodes.
     """
 
+    deferrable: ClassVar[bool] = False
+    """
+    Could this view be updated on the next idle tick, after all non-deferrable views have been updated?
+    Expensive views (plotting) set it to ``True``, so they do not delay the cheap ones.
+    """
+
     def on_probe_update(self, probe: ProbeDesp[M, E], chmap: M | None, electrodes: list[E] | None):
         """
         Invoked when channelmap is changed or electrode's category is changed.
@@ -459,6 +471,108 @@ class DynamicView:
         """
         pass
 
+    def on_probe_snapshot(self, update: ProbeUpdate):
+        """
+        Invoked when channelmap is changed or electrode's category is changed, with the shared *update* snapshot.
+
+        By default, it calls {#on_probe_update()}. Overwrite it to reuse the derived data in *update*.
+
+        :param update: probe update snapshot.
+        """
+        self.on_probe_update(update.probe, update.chmap, update.electrodes)
+
+
+@doc_link()
+class ProbeUpdate:
+    """
+    A snapshot of one probe update, shared by all {DynamicView} in the same dispatching.
+
+    Electrode categories are captured when the snapshot is created, so {#blueprint} of deferred views
+    keeps the same even if *electrodes* are modified in the meantime. Derived data are computed
+    on the first access, and should be treated as read-only.
+    """
+
+    def __init__(self, probe: ProbeDesp[M, E], chmap: M | None, electrodes: list[E] | None):
+        self.probe = probe
+        """probe interface"""
+
+        self.chmap = chmap
+        """channelmap instance"""
+
+        self.electrodes = electrodes
+        """all electrodes. It is the live list, which may be modified after this snapshot is created."""
+
+        # capture categories now, instead of reading the live electrodes later.
+        self._categories: NDArray[np.int_] | None = None
+        if electrodes is not None:
+            self._categories = np.fromiter((it.category for it in electrodes), dtype=int, count=len(electrodes))
+
+    def new_blueprint_function(self) -> BlueprintFunctions:
+        """
+        Create a {BlueprintFunctions} with the {#blueprint} of this update.
+
+        :return: a new instance, which is free to modify.
+        :raise RuntimeError: no channelmap.
+        """
+        from neurocarto.util.util_blueprint import BlueprintFunctions
+        if (chmap := self.chmap) is None:
+            raise RuntimeError('missing channelmap')
+
+        bp = BlueprintFunctions(self.probe, chmap)
+        bp.set_blueprint(self.blueprint)
+        return bp
+
+    @functools.cached_property
+    def _bp(self) -> BlueprintFunctions:
+        from neurocarto.util.util_blueprint import BlueprintFunctions
+        if (chmap := self.chmap) is None:
+            raise RuntimeError('missing channelmap')
+
+        bp = BlueprintFunctions(self.probe, chmap)
+        if (categories := self._categories) is not None:
+            # electrode positions do not change, only categories.
+            index = bp.electrode_index(self.electrodes)
+            found = index >= 0
+            blueprint = np.full((len(bp),), bp.CATE_UNSET, dtype=int)
+            blueprint[index[found]] = categories[found]
+            bp.set_blueprint(blueprint)
+        return bp
+
+    @functools.cached_property
+    def blueprint(self) -> NDArray[np.int_]:
+        """
+        blueprint (category of all electrodes). Array[category:int, E]
+
+        :raise RuntimeError: no channelmap.
+        """
+        ret = self._bp.blueprint()
+        ret.setflags(write=False)
+        return ret
+
+    @functools.cached_property
+    def selected(self) -> NDArray[np.bool_]:
+        """
+        mask of electrodes selected by the channelmap. Array[bool, E]
+
+        :raise RuntimeError: no channelmap.
+        """
+        ret = np.zeros((len(self.blueprint),), dtype=bool)
+        ret[self._bp.selected_electrodes(self.chmap)] = True
+        ret.setflags(write=False)
+        return ret
+
+    @functools.cached_property
+    def statistics(self) -> dict[str, str] | None:
+        """
+        statistics information (such as channel efficiency) given by the probe's ``view_ext_statistics_info()``.
+        ``None`` if the probe does not support it.
+
+        :raise RuntimeError: no channelmap.
+        """
+        if (info := getattr(self.probe, 'view_ext_statistics_info', None)) is None:
+            return None
+        return info(self._bp)
+
 
 class EditorView(DynamicView):
     """
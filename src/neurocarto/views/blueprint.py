@@ -8,7 +8,7 @@ from neurocarto.config import parse_cli, CartoConfig
 from neurocarto.util.bokeh_util import as_callback
 from neurocarto.util.util_blueprint import BlueprintFunctions
 from neurocarto.util.utils import doc_link, SPHINX_BUILD
-from neurocarto.views.base import Figure, ViewBase, InvisibleView, DynamicView
+from neurocarto.views.base import Figure, ViewBase, InvisibleView, DynamicView, ProbeUpdate
 from numpy.typing import NDArray
 
 if SPHINX_BUILD:
@@ -168,15 +168,22 @@ class BlueprintView(ViewBase, InvisibleView, DynamicView):
     # updating #
     # ======== #
 
+    deferrable = True
+
     cache_probe: Any
     cache_chmap: Any = None
     cache_blueprint: Any = None
+    cache_update: ProbeUpdate | None = None
 
     def on_visible(self, visible: bool):
         super().on_visible(visible)
         if visible and self.cache_chmap is not None:
             self.on_probe_update(self.cache_probe, self.cache_chmap, self.cache_blueprint)
 
+    def on_probe_snapshot(self, update: ProbeUpdate):
+        self.cache_update = update
+        super().on_probe_snapshot(update)
+
     def on_probe_update(self, probe, chmap, electrodes):
         self.cache_probe = probe
         self.cache_chmap = chmap
@@ -194,8 +201,12 @@ class BlueprintView(ViewBase, InvisibleView, DynamicView):
         if (chmap := self.cache_chmap) is None:
             self.reset_blueprint()
         else:
-            bp = BlueprintFunctions(self.cache_probe, chmap)
-            bp.set_blueprint(self.cache_blueprint)
+            update = self.cache_update
+            if update is not None and update.chmap is chmap and update.electrodes is self.cache_blueprint:
+                bp = update.new_blueprint_function()
+            else:
+                bp = BlueprintFunctions(self.cache_probe, chmap)
+                bp.set_blueprint(self.cache_blueprint)
             impl = ProbePlotBlueprintCallbackImpl(self, bp, options)
 
             functor: ProbePlotBlueprintProtocol
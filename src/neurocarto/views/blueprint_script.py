@@ -298,9 +298,12 @@ class BlueprintScriptView(PltImageView, EditorView, ControllerView,
 
         if isinstance(probe, ProbePlotElectrodeProtocol) or hasattr(probe, 'view_ext_blueprint_plot_electrode'):
             if (value := self.cache_data) is not None:
+                kwargs = dict(gridspec_kw=dict(top=0.99, bottom=0.01, left=0, right=1), offset=-50,
+                              cache=(chmap, value))
                 try:
-                    with self.plot_figure(gridspec_kw=dict(top=0.99, bottom=0.01, left=0, right=1), offset=-50) as ax:
-                        probe.view_ext_blueprint_plot_electrode(ax, chmap, value)
+                    if not self.cached_figure(**kwargs):
+                        with self.plot_figure(**kwargs) as ax:
+                            probe.view_ext_blueprint_plot_electrode(ax, chmap, value)
                 except BaseException:
                     self.set_image(None)
         else:
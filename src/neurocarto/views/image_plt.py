@@ -2,16 +2,25 @@ from __future__ import annotations
 
 import abc
 import contextlib
+import functools
+import hashlib
 import io
 import logging
+import pickle
 import sys
-from collections.abc import Sequence
+import threading
+from collections import OrderedDict
+from collections.abc import Sequence, Callable
 from pathlib import Path
 from typing import ContextManager, overload, Literal, Any, TYPE_CHECKING, NamedTuple, TypedDict
 
+import matplotlib as mpl
 import matplotlib.pyplot as plt
 import numpy as np
+from bokeh.io import curdoc
 from bokeh.models import UIElement
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure as PltFigure
 from neurocarto.config import CartoConfig
 from neurocarto.util.utils import doc_link
 from neurocarto.views.base import Figure, DynamicView, ViewBase, GlobalStateView
@@ -30,8 +39,12 @@ if TYPE_CHECKING:
 
 __all__ = [
     'PltImageView',
+    'PltRenderer',
+    'PltImageCache',
     'Boundary',
     'RC_FILE',
+    'PLT_IMAGE_CACHE',
+    'plt_content_key',
     'get_current_plt_image',
     'get_current_plt_boundary'
 ]
@@ -272,10 +285,14 @@ class PltImageView(ImageView, DynamicView, GlobalStateView[PltImageState], metac
                     plot.plot_probe_shape(ax, m, color='k')
     """
 
+    deferrable = True
+
     def __init__(self, config: CartoConfig, *,
                  logger: str | logging.Logger = 'neurocarto.view.plt'):
         super().__init__(config, logger=logger)
         self._plt_rc_file = RC_FILE
+        self._plt_renderer: PltRenderer | None = None
+        self._plt_render_generation = 0
 
     @property
     def name(self) -> str:
@@ -304,6 +321,9 @@ class PltImageView(ImageView, DynamicView, GlobalStateView[PltImageState], metac
         :param boundary: image boundary. May from {get_current_plt_boundary()}
         :param offset: x or (x, y) offset. When you don't want the image 100% aligned to the probe origin.
         """
+        # supersede pending rendering
+        self._plt_render_generation += 1
+
         if image is None:
             self.set_status('clean image ...')
             self.set_image_handler(None)
@@ -358,6 +378,11 @@ class PltImageView(ImageView, DynamicView, GlobalStateView[PltImageState], metac
         self.visible = False
         self.restore_global_state()
 
+    def cleanup(self):
+        if (renderer := self._plt_renderer) is not None:
+            self._plt_renderer = None
+            renderer.close()
+
     @overload
     def plot_figure(self,
                     nrows: int = 1, ncols: int = 1, *,
@@ -371,6 +396,7 @@ class PltImageView(ImageView, DynamicView, GlobalStateView[PltImageState], metac
                     offset: float | tuple[float, float] = 0,
                     transparent: bool = True,
                     rc: str = None,
+                    cache: Any = None,
                     **kwargs) -> ContextManager[Axes]:
         pass
 
@@ -386,7 +412,20 @@ class PltImageView(ImageView, DynamicView, GlobalStateView[PltImageState], metac
             with self.plot_figure() as ax:
                 ax.plot(...)
 
-        Once context closed, call {#set_image()} with parameters *image*, *boundary* and *offset* filled.
+        The figure is created without :mod:`matplotlib.pyplot`, so pyplot functions (``plt.gca()``) do not
+        refer to it. Once context closed, the figure is rendered on a worker thread (:class:`PltRenderer`),
+        and then {#set_image()} is called with parameters *image*, *boundary* and *offset* filled on the next
+        event loop. A rendering not finished yet is dropped when a new one is requested. Outside
+        a Bokeh server, the figure is rendered in place.
+
+        The rc file is applied while plotting, on the document thread. Matplotlib reads rcParams when
+        artists are created, so the figure carries the rc setting, and the worker thread draws it
+        without touching the global ``rcParams``.
+
+        When *cache* is given, the rendered image is kept in :data:`PLT_IMAGE_CACHE`, keyed by the content
+        of *cache*, the view type, *kwargs* and the rc file. Once the same figure is plotted again, the
+        cached image is used without rendering. Use {#cached_figure()} before this method to skip plotting
+        as well.
 
         If a ``KeyboardInterrupt`` is raised, capture and clear the image.
 
@@ -395,11 +434,61 @@ class PltImageView(ImageView, DynamicView, GlobalStateView[PltImageState], metac
         :param transparent: fig.savefig(transparent)
         :param rc: default is read from image_plt.matplotlibrc.
         :param offset: see *offset* in {#set_image()}
-        :param kwargs: plt.subplots(kwargs)
+        :param cache: the content plotted in the figure, such as channelmap and blueprint.
+        :param kwargs: plt.subplots(kwargs). Figure parameters, such as *figsize*, are also accepted.
         :return: a context manger carries {Axes}
         """
         self.set_status('computing...')
 
+        rc_file, transparent, offset, cache_key = self._plot_figure_args(kwargs)
+
+        ax: Axes
+        with mpl.rc_context(fname=rc_file):
+            fg, ax = _new_figure(**kwargs)
+            try:
+                yield ax
+            except KeyboardInterrupt:
+                self.logger.info('plot interrupted')
+                interrupted = True
+            except BaseException as e:
+                self.set_status('computing failed')
+                self.logger.warning('plot fail', exc_info=e)
+                return
+            else:
+                self.set_status('computing done')
+                interrupted = False
+
+        if interrupted:
+            self.set_image(None, None, offset)
+        elif cache_key is not None and (cached := PLT_IMAGE_CACHE.get(cache_key)) is not None:
+            self.set_image(*cached, offset)
+        else:
+            self.render_figure(fg, ax, offset, transparent=transparent, cache_key=cache_key)
+
+    @doc_link()
+    def cached_figure(self, **kwargs) -> bool:
+        """
+        Use the cached image if the same figure was rendered by {#plot_figure()} before.
+
+        .. code-block:: python
+
+            if not self.cached_figure(offset=-80, cache=chmap):
+                with self.plot_figure(offset=-80, cache=chmap) as ax:
+                    ax.plot(...)
+
+        :param kwargs: the same parameters given to {#plot_figure()}, including *cache*.
+        :return: ``True`` if the cached image is set, then the caller could skip the plotting.
+        """
+        _, _, offset, cache_key = self._plot_figure_args(dict(kwargs))
+        if cache_key is None or (cached := PLT_IMAGE_CACHE.get(cache_key)) is None:
+            return False
+
+        self.set_image(*cached, offset)
+        return True
+
+    def _plot_figure_args(self,
+                          kwargs: dict[str, Any]) -> tuple[Path, bool, float | tuple[float, float], bytes | None]:
+        # pop plot_figure() parameters, and leave plt.subplots() parameters in kwargs.
         rc_file = kwargs.pop('rc', None)
         if rc_file is None:
             rc_file = self._plt_rc_file
@@ -413,39 +502,311 @@ class PltImageView(ImageView, DynamicView, GlobalStateView[PltImageState], metac
         else:
             raise TypeError()
 
-        savefig_kw = dict(
-            transparent=kwargs.pop('transparent', True),
-        )
-
+        transparent = kwargs.pop('transparent', True)
         offset = kwargs.pop('offset', 0)
 
-        ax: Axes
-        with plt.rc_context(fname=rc_file):
-            fg, ax = plt.subplots(**kwargs)
+        cache_key = None
+        if (cache := kwargs.pop('cache', None)) is not None:
+            view_type = type(self)
+            cache_key = plt_content_key(view_type.__module__, view_type.__qualname__,
+                                        rc_file, transparent, kwargs, cache)
+            if cache_key is None:
+                self.logger.debug('plot content not hashable')
+
+        return rc_file, transparent, offset, cache_key
+
+    @doc_link()
+    def render_figure(self, fg: PltFigure, ax: Axes,
+                      offset: float | tuple[float, float] = 0, *,
+                      transparent: bool = True,
+                      cache_key: bytes = None):
+        """
+        Render a closed figure with the Agg canvas, and then call {#set_image()}.
+
+        Inside a Bokeh server, it is rendered on a worker thread and the result is posted back to
+        the document on the next event loop. Results superseded by a later rendering or
+        {#set_image()} are dropped.
+
+        :param fg: matplotlib Figure, which should not be touched by caller anymore.
+        :param ax: the axes used for image boundary.
+        :param offset: see *offset* in {#set_image()}
+        :param transparent: fig.savefig(transparent)
+        :param cache_key: put the rendered image into :data:`PLT_IMAGE_CACHE` with this key.
+        """
+        if not isinstance(fg.canvas, FigureCanvasAgg):
+            FigureCanvasAgg(fg)
+
+        def render() -> tuple[NDArray[np.uint], Boundary]:
+            image = get_current_plt_image(fg, transparent=transparent)
+            boundary = get_current_plt_boundary(ax)
+            if cache_key is not None:
+                image = PLT_IMAGE_CACHE.put(cache_key, image, boundary)
+            return image, boundary
+
+        document = curdoc()
+        if document.session_context is None:
+            image, boundary = render()
+            self.set_image(image, boundary, offset)
+            return
+
+        self._plt_render_generation += 1
+        generation = self._plt_render_generation
+
+        def post(result: tuple[NDArray[np.uint], Boundary] | None, error: BaseException | None):
+            # called on the worker thread, which has no current document.
+            callback = functools.partial(self._on_figure_rendered, generation, result, error, offset)
+            document.add_next_tick_callback(callback)
+
+        if (renderer := self._plt_renderer) is None:
+            renderer = self._plt_renderer = PltRenderer(name=f'PltRenderer[{self.name}]')
+
+        self.set_status('rendering...')
+        renderer.submit(render, post)
+
+    def _on_figure_rendered(self, generation: int,
+                            result: tuple[NDArray[np.uint], Boundary] | None,
+                            error: BaseException | None,
+                            offset: float | tuple[float, float]):
+        if generation != self._plt_render_generation:
+            return
+
+        if error is not None:
+            self.set_status('rendering failed')
+            self.logger.warning('render fail', exc_info=error)
+            return
+
+        image, boundary = result
+        self.set_image(image, boundary, offset)
+
+
+def _new_figure(nrows: int = 1, ncols: int = 1, *,
+                sharex=False, sharey=False, squeeze=True,
+                width_ratios=None, height_ratios=None,
+                subplot_kw=None, gridspec_kw=None,
+                **fig_kw) -> tuple[PltFigure, Any]:
+    # same as plt.subplots(), but the figure is not managed by pyplot.
+    fg = PltFigure(**fig_kw)
+    FigureCanvasAgg(fg)
+    ax = fg.subplots(nrows, ncols, sharex=sharex, sharey=sharey, squeeze=squeeze,
+                     width_ratios=width_ratios, height_ratios=height_ratios,
+                     subplot_kw=subplot_kw, gridspec_kw=gridspec_kw)
+    return fg, ax
+
+
+@doc_link()
+class PltRenderer:
+    """
+    Render matplotlib figures on a worker thread.
+
+    Only the latest request is kept. A new request, or {#cancel()}, abandons the pending one,
+    and its callback is never called.
+    """
+
+    def __init__(self, name: str = 'PltRenderer'):
+        self.name = name
+        self._cond = threading.Condition()
+        self._job: tuple[Callable[[], Any], Callable[[Any, BaseException | None], None]] | None = None
+        self._thread: threading.Thread | None = None
+        self._closed = False
+
+    def submit(self, task: Callable[[], Any], callback: Callable[[Any, BaseException | None], None]):
+        """
+        Request a rendering.
+
+        :param task: rendering function, called on the worker thread.
+        :param callback: called on the worker thread with ``(result, None)``, or ``(None, error)``
+            when *task* failed.
+        """
+        with self._cond:
+            if self._closed:
+                return
+            self._job = (task, callback)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def cancel(self):
+        """abandon pending work."""
+        with self._cond:
+            self._job = None
+
+    def close(self):
+        """abandon pending work and stop the worker thread."""
+        with self._cond:
+            self._closed = True
+            self._job = None
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._job is None and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                task, callback = self._job
+                self._job = None
+
             try:
-                yield ax
-            except KeyboardInterrupt:
-                self.logger.info('plot interrupted')
-                image = None
-                boundary = None
+                result = task()
             except BaseException as e:
-                self.set_status('computing failed')
-                self.logger.warning('plot fail', exc_info=e)
-                return
+                callback(None, e)
             else:
-                self.set_status('computing done')
-                boundary = get_current_plt_boundary(ax)
-                image = get_current_plt_image(fg, **savefig_kw)
-            finally:
-                plt.close(fg)
+                callback(result, None)
 
-        self.set_image(image, boundary, offset)
+
+class PltImageCache:
+    """
+    LRU cache of rendered matplotlib images, bounded by a memory budget.
+
+    Images are keyed by the content hash of the figure (see :func:`plt_content_key`).
+    Cached images are read-only. It is thread-safe, so :class:`PltRenderer` could fill it from a worker thread.
+    """
+
+    def __init__(self, budget: int = 64 * 2 ** 20):
+        """
+        :param budget: memory budget in bytes.
+        """
+        self._budget = int(budget)
+        self._cache: OrderedDict[bytes, tuple[NDArray[np.uint], Boundary]] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        """number of cache hits"""
+
+        self.misses = 0
+        """number of cache misses"""
+
+    @property
+    def budget(self) -> int:
+        """memory budget in bytes"""
+        return self._budget
+
+    @budget.setter
+    def budget(self, value: int):
+        with self._lock:
+            self._budget = int(value)
+            self._evict()
+
+    @property
+    def size(self) -> int:
+        """total bytes of cached images"""
+        return self._size
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def __contains__(self, key: bytes) -> bool:
+        with self._lock:
+            return key in self._cache
+
+    def get(self, key: bytes) -> tuple[NDArray[np.uint], Boundary] | None:
+        """
+        Get the cached image.
+
+        :param key: content key
+        :return: tuple of (image, boundary). ``None`` if not cached.
+        """
+        with self._lock:
+            try:
+                ret = self._cache[key]
+            except KeyError:
+                self.misses += 1
+                return None
+
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return ret
+
+    def put(self, key: bytes, image: NDArray[np.uint], boundary: Boundary) -> NDArray[np.uint]:
+        """
+        Put the image into the cache, and evict the least recently used images when over the budget.
+
+        :param key: content key
+        :param image: image
+        :param boundary: image boundary
+        :return: read-only *image*.
+        """
+        image.setflags(write=False)
+        if image.nbytes > self._budget:
+            return image
+
+        with self._lock:
+            self._remove(key)
+            self._cache[key] = (image, boundary)
+            self._size += image.nbytes
+            self._evict()
+        return image
+
+    def clear(self):
+        """remove all cached images."""
+        with self._lock:
+            self._cache.clear()
+            self._size = 0
+
+    def _remove(self, key: bytes):
+        if (old := self._cache.pop(key, None)) is not None:
+            self._size -= old[0].nbytes
+
+    def _evict(self):
+        while self._size > self._budget and len(self._cache):
+            _, (image, _) = self._cache.popitem(last=False)
+            self._size -= image.nbytes
+
+
+PLT_IMAGE_CACHE = PltImageCache()
+"""default rendered image cache shared by all :class:`PltImageView`."""
+
+
+def plt_content_key(*content: Any) -> bytes | None:
+    """
+    Hash the content of a figure.
+
+    Numpy arrays are hashed by their dtype, shape and data, paths by their name, modification time
+    and size, and other objects by their pickled bytes.
+
+    :param content: anything which determines the figure, such as channelmap, blueprint and plotting parameters.
+    :return: hash digest. ``None`` if any content cannot be hashed.
+    """
+    h = hashlib.blake2b(digest_size=20)
+    try:
+        _update_content_key(h, content)
+    except (TypeError, AttributeError, OSError, pickle.PicklingError):
+        return None
+    return h.digest()
+
+
+def _update_content_key(h, value: Any):
+    if isinstance(value, np.ndarray) and not value.dtype.hasobject:
+        h.update(repr(('ndarray', value.dtype.str, value.shape)).encode())
+        h.update(memoryview(np.ascontiguousarray(value)).cast('B'))
+    elif isinstance(value, (tuple, list)):
+        h.update(repr((type(value).__name__, len(value))).encode())
+        for it in value:
+            _update_content_key(h, it)
+    elif isinstance(value, dict):
+        h.update(repr(('dict', len(value))).encode())
+        for k, v in value.items():
+            _update_content_key(h, k)
+            _update_content_key(h, v)
+    elif isinstance(value, Path):
+        stat = value.stat()
+        h.update(repr(('Path', str(value), stat.st_mtime_ns, stat.st_size)).encode())
+    elif value is None or isinstance(value, (bool, int, float, str, bytes)):
+        h.update(repr((type(value).__name__, value)).encode())
+    else:
+        h.update(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
 
 
 def get_current_plt_image(fg=None, **kwargs) -> NDArray[np.uint]:
     """
     Save matplotlib figure into numpy array.
 
+    The image is read from the Agg canvas buffer directly. If the figure is not drawn by an Agg
+    canvas, or *kwargs* contains parameters other than *transparent*, fall back to ``fg.savefig()``.
+
     :param fg: matplotlib Figure.
     :param kwargs: ``fg.savefig(kwargs)``, except parameters *format* and *dpi*.
     :return: a numpy array.
@@ -453,6 +814,12 @@ def get_current_plt_image(fg=None, **kwargs) -> NDArray[np.uint]:
     if fg is None:
         fg = plt.gcf()
 
+    if isinstance(fg.canvas, FigureCanvasAgg) and set(kwargs) <= {'transparent'}:
+        transparent = kwargs.get('transparent', None)
+        if transparent is None:
+            transparent = mpl.rcParams['savefig.transparent']
+        return _get_agg_image(fg, transparent)
+
     # https://stackoverflow.com/a/67823421
     with io.BytesIO() as buff:
         # force dpi as 'figure'. Otherwise, we will get wrong w and h.
@@ -464,6 +831,27 @@ def get_current_plt_image(fg=None, **kwargs) -> NDArray[np.uint]:
     return np.flipud(image.view(dtype=np.uint32).reshape((int(h), int(w))))
 
 
+def _get_agg_image(fg: PltFigure, transparent: bool) -> NDArray[np.uint]:
+    # same as savefig(transparent=True), which clears figure and axes background.
+    patches = [fg.patch, *[ax.patch for ax in fg.axes]] if transparent else []
+    colors = [(it.get_facecolor(), it.get_edgecolor()) for it in patches]
+    try:
+        for it in patches:
+            it.set_facecolor('none')
+            it.set_edgecolor('none')
+
+        canvas = fg.canvas
+        canvas.draw()
+        image = np.flipud(np.asarray(canvas.buffer_rgba()))
+    finally:
+        for it, (fc, ec) in zip(patches, colors):
+            it.set_facecolor(fc)
+            it.set_edgecolor(ec)
+
+    h, w, _ = image.shape
+    return np.ascontiguousarray(image).view(dtype=np.uint32).reshape((h, w))
+
+
 def get_current_plt_boundary(ax: Axes = None) -> Boundary:
     """
     Get Axes boundary.
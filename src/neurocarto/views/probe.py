@@ -3,7 +3,8 @@ from __future__ import annotations
 from collections.abc import Iterable
 from typing import Any, TypedDict, Generic, TYPE_CHECKING
 
-from bokeh.models import ColumnDataSource, GlyphRenderer, tools, UIElement, Div
+import numpy as np
+from bokeh.models import ColumnDataSource, GlyphRenderer, tools, UIElement, Div, CDSView, GroupFilter
 from neurocarto.config import CartoConfig
 from neurocarto.probe import ProbeDesp, M, E
 from neurocarto.util.bokeh_app import run_timeout
@@ -37,9 +38,15 @@ class ProbeViewAction(TypedDict, total=False):
     category: int
 
 
+@doc_link()
 class ProbeView(Generic[M, E], ViewBase, RecordView[ProbeViewAction]):
     """
     Probe view.
+
+    The {#data_electrodes} source holds all electrodes, one row per electrode in the order of {#electrodes}.
+    Static columns (x, y, e, c) are sent once per {#reset()}, and the state column ``s`` is patched only
+    on changed electrodes in {#update_electrode()}. Each state has its own renderer on the same source,
+    which shows rows of its state via a {GroupFilter}.
     """
 
     STYLES: dict[int | str, dict[str, Any]] = {
@@ -49,7 +56,7 @@ class ProbeView(Generic[M, E], ViewBase, RecordView[ProbeViewAction]):
         'highlight': dict(color='yellow', size=6, alpha=0.5)
     }
 
-    data_electrodes: dict[int, ColumnDataSource]
+    data_electrodes: ColumnDataSource
     render_electrodes: dict[int, GlyphRenderer]
 
     data_highlight: ColumnDataSource
@@ -63,13 +70,13 @@ class ProbeView(Generic[M, E], ViewBase, RecordView[ProbeViewAction]):
         self.channelmap: M | None = None
         self.electrodes: list[E] | None = None
         self._e2i: dict[E, int] = {}  # {E: electrode_index}
+        self._selected_categories: list[int] | None = None  # electrode categories used by last selection
+        self._rendered_state: np.ndarray | None = None  # Array[state:int, E], electrode state on data_electrodes
+        self._rendered_channel: list[str] | None = None  # electrode channel on data_electrodes
 
-        self.data_electrodes = {}  # {state : ColumnDataSource}
-        """dict {state: ColumnDataSource}"""
-
-        for state in (ProbeDesp.STATE_UNUSED, ProbeDesp.STATE_USED, ProbeDesp.STATE_DISABLED):
-            self.data_electrodes[state] = ColumnDataSource(data=dict(x=[], y=[], e=[], c=[]))
-            self.data_electrodes[state].selected.on_change('indices', as_callback(self._on_capture, state=state))
+        self.data_electrodes = ColumnDataSource(data=dict(x=[], y=[], e=[], c=[], s=[]))
+        """all electrodes. Row index is the electrode index."""
+        self.data_electrodes.selected.on_change('indices', as_callback(self._on_capture))
 
         self.data_highlight = ColumnDataSource(data=dict(x=[], y=[], e=[]))
 
@@ -100,9 +107,11 @@ class ProbeView(Generic[M, E], ViewBase, RecordView[ProbeViewAction]):
 
         self.render_electrodes = {
             state: f.scatter(
-                x='x', y='y', source=data, **self.STYLES.get(state, {})
+                x='x', y='y', source=self.data_electrodes,
+                view=CDSView(filter=GroupFilter(column_name='s', group=str(state))),
+                **self.STYLES.get(state, {})
             )
-            for state, data in self.data_electrodes.items()
+            for state in (ProbeDesp.STATE_UNUSED, ProbeDesp.STATE_USED, ProbeDesp.STATE_DISABLED)
         }
 
         # toolbar
@@ -164,12 +173,15 @@ class ProbeView(Generic[M, E], ViewBase, RecordView[ProbeViewAction]):
 
         self.channelmap = channelmap
         self.electrodes = self.probe.all_electrodes(channelmap)
+        self._selected_categories = None
         self._reset_electrode_state()
 
         self._e2i = {}
         for i, e in enumerate(self.electrodes):  # type: int, E
             self._e2i[e] = i
 
+        self._reset_electrode_source()
+
         if (code := self.probe.channelmap_code(self.channelmap)) is None:
             raise RuntimeError('un-reachable')
 
@@ -177,26 +189,63 @@ class ProbeView(Generic[M, E], ViewBase, RecordView[ProbeViewAction]):
         self.add_record(ProbeViewAction(action='reset', code=code), 'reset', desp)
 
     def _reset_electrode_state(self):
-        for e in self.electrodes:
-            e.state = ProbeDesp.STATE_UNUSED
+        self.probe.reset_electrode_state(self.channelmap, self.electrodes)
+        self.update_probe_desp()
 
-        c = self.probe.all_channels(self.channelmap, self.electrodes)
-        for e in self.probe.invalid_electrodes(self.channelmap, c, self.electrodes):
-            e.state = ProbeDesp.STATE_DISABLED
-        for e in c:
-            e.state = ProbeDesp.STATE_USED
+    @doc_link()
+    def _reset_electrode_source(self):
+        """Resend static electrode columns to {#data_electrodes}."""
+        electrodes = self.electrodes if self.electrodes is not None else []
+        state = np.array([it.state for it in electrodes], dtype=int)
+        channel = [str(it.channel) for it in electrodes]
+        data = dict(
+            x=np.array([it.x for it in electrodes], dtype=float),
+            y=np.array([it.y for it in electrodes], dtype=float),
+            e=np.arange(len(electrodes)),
+            c=channel,
+            s=[str(it) for it in state],
+        )
 
-        self.update_probe_desp()
+        self.data_electrodes.selected.indices = []
+        self.data_electrodes.data = data
+
+        self._rendered_state = state
+        self._rendered_channel = channel
 
     def update_electrode(self):
         """Refresh channelmap"""
-        for state, data in self.data_electrodes.items():
-            self.update_electrode_position(data, self.get_electrodes(None, state=state))
-        self.update_electrode_position(self.data_highlight, [])
+        electrodes = self.electrodes
+        rendered = self._rendered_state
+        if electrodes is None or rendered is None or len(rendered) != len(electrodes):
+            self._reset_electrode_source()
+        else:
+            state = np.array([it.state for it in electrodes], dtype=int)
+            channel = [str(it.channel) for it in electrodes]
+
+            patch = {}
+            if len(changed := np.flatnonzero(state != rendered)):
+                patch['s'] = [(int(i), str(state[i])) for i in changed]
+            if channel != self._rendered_channel:
+                patch['c'] = [(i, c) for i, (c, r) in enumerate(zip(channel, self._rendered_channel)) if c != r]
+
+            if len(patch):
+                self.data_electrodes.patch(patch)
+
+            self._rendered_state = state
+            self._rendered_channel = channel
+
+        if len(self.data_highlight.data['e']):
+            self.update_electrode_position(self.data_highlight, [])
         self.update_probe_desp()
 
-    def refresh_selection(self):
-        """Rerun electrode selection and refresh channelmap"""
+    @doc_link()
+    def refresh_selection(self, incremental: bool = False):
+        """
+        Rerun electrode selection and refresh channelmap
+
+        :param incremental: only re-select electrodes affected by the category changes since last selection,
+            and keep the rest of current channelmap. See {ProbeDesp#reselect_electrodes()}.
+        """
         if self.channelmap is None:
             return
 
@@ -207,10 +256,23 @@ class ProbeView(Generic[M, E], ViewBase, RecordView[ProbeViewAction]):
         self.add_record(ProbeViewAction(action='blueprint', electrodes=electrodes),
                         'selection', 'electrode selection blueprint')
 
-        self.logger.debug('refresh_selection()')
+        previous = self._selected_categories
+        if not incremental or previous is None:
+            changed = None
+        else:
+            changed = [e for e, c in zip(self.electrodes, previous) if e.category != c]
+
+        self.logger.debug('refresh_selection(incremental=%s)', changed is not None)
         try:
             mark = TimeMarker()
-            self.channelmap = self.probe.select_electrodes(self.channelmap, self.electrodes, **self.selecting_parameters)
+            if changed is None:
+                self.channelmap = self.probe.select_electrodes(
+                    self.channelmap, self.electrodes, **self.selecting_parameters
+                )
+            elif len(changed) > 0:
+                self.channelmap = self.probe.reselect_electrodes(
+                    self.channelmap, self.electrodes, changed, **self.selecting_parameters
+                )
             t = mark()
 
             self.logger.debug('refresh_selection() used %.2f sec', t)
@@ -218,6 +280,7 @@ class ProbeView(Generic[M, E], ViewBase, RecordView[ProbeViewAction]):
             self.logger.warning('refresh_selection() fail', exc_info=e)
             self.log_message('refresh fail')
         else:
+            self._selected_categories = electrodes
             self._reset_electrode_state()
 
             electrodes = [
@@ -258,64 +321,94 @@ class ProbeView(Generic[M, E], ViewBase, RecordView[ProbeViewAction]):
 
         return ret
 
+    def _capture_state(self, state: int | ColumnDataSource | None) -> int | None:
+        # Before all electrodes were rendered in one source, capture functions took one of the per-state
+        # sources. Passing the (now single) data_electrodes source is still accepted and means all states.
+        if isinstance(state, ColumnDataSource):
+            if state is not self.data_electrodes:
+                raise ValueError('not an electrode source of this view')
+            return None
+        return state
+
     @doc_link()
-    def get_captured_electrodes(self, d: ColumnDataSource = None, *, reset=False) -> set[E]:
+    def get_captured_electrodes(self, state: int | ColumnDataSource = None, *, reset=False) -> set[E]:
         """
         Get captured electrodes.
 
-        :param d: one of {#data_electrodes}
-        :param reset: reset the selecting state.
+        :param state: only electrodes in this state. {#data_electrodes} is accepted and means all states.
+        :param reset: reset the selecting state of returned electrodes.
         :return: captured electrodes.
         """
-        return set(self.get_electrodes(self.get_captured_electrodes_index(d, reset=reset)))
+        return set(self.get_electrodes(self.get_captured_electrodes_index(state, reset=reset)))
 
-    def get_captured_electrodes_index(self, d: ColumnDataSource = None, *, reset=False) -> list[int]:
+    @doc_link()
+    def get_captured_electrodes_index(self, state: int | ColumnDataSource = None, *, reset=False) -> list[int]:
         """
         Get captured electrodes.
 
-        :param d: one of {#data_electrodes}
-        :param reset: reset the selecting state.
+        :param state: only electrodes in this state. {#data_electrodes} is accepted and means all states.
+        :param reset: reset the selecting state of returned electrodes.
         :return: index-list of captured electrodes.
         """
-        if d is None:
-            ret = list[int]()
-            for state, data in self.data_electrodes.items():
-                ret.extend(self.get_captured_electrodes_index(data, reset=reset))
-            return ret
+        state = self._capture_state(state)
+        d = self.data_electrodes
+        selected = [int(it) for it in d.selected.indices]
+
+        if state is None:
+            ret = selected
+            keep = []
+        elif (rendered := self._rendered_state) is None:
+            ret = []
+            keep = selected
         else:
-            selected_index = d.selected.indices
-            if reset:
-                d.selected.indices = []
+            ret = [it for it in selected if it < len(rendered) and rendered[it] == state]
+            keep = [it for it in selected if not (it < len(rendered) and rendered[it] == state)]
 
-            e = d.data['e']
-            return [e[it] for it in selected_index]
+        if reset and len(ret):
+            d.selected.indices = keep
 
-    def set_capture_electrodes(self, electrodes: list[int] | list[E], d: ColumnDataSource = None):
-        if d is None:
-            for data in self.data_electrodes.values():
-                self.set_capture_electrodes(electrodes, data)
-        else:
-            i = set([
-                it if isinstance(it, int) else self._e2i[it]
-                for it in electrodes
-            ])
-
-            e = d.data['e']
-            s = [ii for ii, ie in enumerate(e) if ie in i]
-            d.selected.indices = s
-
-    def clear_capture_electrode(self, d: ColumnDataSource = None):
-        if d is None:
-            for data in self.data_electrodes.values():
-                self.clear_capture_electrode(data)
+        return ret
+
+    @doc_link()
+    def set_capture_electrodes(self, electrodes: list[int] | list[E], state: int | ColumnDataSource = None):
+        """
+        Set captured electrodes.
+
+        :param electrodes: captured electrodes.
+        :param state: only set electrodes in this state, and keep the captured electrodes in other states.
+            {#data_electrodes} is accepted and means all states.
+        """
+        state = self._capture_state(state)
+        i = set([
+            it if isinstance(it, int) else self._e2i[it]
+            for it in electrodes
+        ])
+
+        if state is None:
+            self.data_electrodes.selected.indices = sorted(i)
+        elif (rendered := self._rendered_state) is not None:
+            in_state = set(np.flatnonzero(rendered == state).tolist())
+            keep = [it for it in self.data_electrodes.selected.indices if it not in in_state]
+            self.data_electrodes.selected.indices = sorted(set(keep) | (i & in_state))
+
+    @doc_link()
+    def clear_capture_electrode(self, state: int | ColumnDataSource = None):
+        """
+        Clear captured electrodes.
+
+        :param state: only electrodes in this state. {#data_electrodes} is accepted and means all states.
+        """
+        state = self._capture_state(state)
+        if state is None:
+            self.data_electrodes.selected.indices = []
         else:
-            d.selected.indices = []
+            self.get_captured_electrodes_index(state, reset=True)
 
     _captured_electrodes: list[E] = []
     _captured_callback: TimeoutCallback | None = None
 
-    def _on_capture(self, state: int):
-        selected = self.get_captured_electrodes(self.data_electrodes[state])
+    def _on_capture(self):
+        selected = self.get_captured_electrodes()
         self._captured_electrodes.extend(selected)
         if self._captured_callback is None:
             self._captured_callback = run_timeout(100, self._on_capture_callback)
@@ -334,7 +427,7 @@ class ProbeView(Generic[M, E], ViewBase, RecordView[ProbeViewAction]):
         """
         Show electrodes.
 
-        :param d: one of {#data_electrodes}
+        :param d: {#data_highlight}, or other electrode source.
         :param e: new electrodes
         """
         x = []
@@ -395,22 +488,22 @@ class ProbeView(Generic[M, E], ViewBase, RecordView[ProbeViewAction]):
                 captured.append(i)
 
         elif state == ProbeDesp.STATE_USED:
-            for e in self.get_captured_electrodes(self.data_electrodes[ProbeDesp.STATE_UNUSED], reset=True):
+            for e in self.get_captured_electrodes(ProbeDesp.STATE_UNUSED, reset=True):
                 captured.append(self._e2i[e])
                 self.probe.add_electrode(channelmap, e)
-            for e in self.get_captured_electrodes(self.data_electrodes[ProbeDesp.STATE_DISABLED], reset=True):
+            for e in self.get_captured_electrodes(ProbeDesp.STATE_DISABLED, reset=True):
                 captured.append(self._e2i[e])
                 self.probe.add_electrode(channelmap, e, overwrite=True)
-            for e in self.get_captured_electrodes(self.data_electrodes[ProbeDesp.STATE_USED], reset=True):
+            for e in self.get_captured_electrodes(ProbeDesp.STATE_USED, reset=True):
                 captured.append(self._e2i[e])
 
         elif state == ProbeDesp.STATE_UNUSED:
-            for e in self.get_captured_electrodes(self.data_electrodes[ProbeDesp.STATE_USED], reset=True):
+            for e in self.get_captured_electrodes(ProbeDesp.STATE_USED, reset=True):
                 captured.append(self._e2i[e])
                 self.probe.del_electrode(channelmap, e)
-            for e in self.get_captured_electrodes(self.data_electrodes[ProbeDesp.STATE_UNUSED], reset=True):
+            for e in self.get_captured_electrodes(ProbeDesp.STATE_UNUSED, reset=True):
                 captured.append(self._e2i[e])
-            for e in self.get_captured_electrodes(self.data_electrodes[ProbeDesp.STATE_DISABLED], reset=True):
+            for e in self.get_captured_electrodes(ProbeDesp.STATE_DISABLED, reset=True):
                 captured.append(self._e2i[e])
 
         self._reset_electrode_state()
@@ -6,7 +6,7 @@ from neurocarto.config import CartoConfig
 from neurocarto.probe import ProbeDesp
 from neurocarto.util.util_blueprint import BlueprintFunctions
 from neurocarto.util.utils import doc_link
-from neurocarto.views.base import ViewBase, DynamicView, InvisibleView, ExtensionView
+from neurocarto.views.base import ViewBase, DynamicView, InvisibleView, ExtensionView, ProbeUpdate
 
 __all__ = ['ElectrodeEfficiencyData', 'ProbeElectrodeEfficiencyProtocol']
 
@@ -69,15 +69,15 @@ class ElectrodeEfficiencyData(ViewBase, ExtensionView, InvisibleView, DynamicVie
         )
 
     def on_probe_update(self, probe: ProbeDesp, chmap, electrodes):
-        if chmap is not None and isinstance(probe, ProbeElectrodeEfficiencyProtocol):
-            # self.logger.debug('on_probe_update()')
-            bp = BlueprintFunctions(probe, chmap)
-            bp.set_blueprint(electrodes)
+        self.on_probe_snapshot(ProbeUpdate(probe, chmap, electrodes))
 
+    def on_probe_snapshot(self, update: ProbeUpdate):
+        if update.chmap is not None and isinstance(update.probe, ProbeElectrodeEfficiencyProtocol):
+            # self.logger.debug('on_probe_update()')
             try:
-                data = probe.view_ext_statistics_info(bp)
-            except BaseException as electrodes:
-                self.logger.warning(repr(electrodes), exc_info=electrodes)
+                data = update.statistics
+            except BaseException as e:
+                self.logger.warning(repr(e), exc_info=e)
                 self.label_columns_div.text = ''
                 self.value_columns_div.text = ''
             else:
@@ -27,8 +27,12 @@ class PlotChannelMap(PltImageView):
         self.logger.debug('plot_channelmap')
         from neurocarto.probe_npx import plot
 
+        # Give the plotted content as cache, so an unchanged channelmap reuses the previous rendered image.
+        if self.cached_figure(offset=-80, cache=m):
+            return
+
         # create a matplotlib Axes context.
-        with self.plot_figure(offset=-80) as ax:
+        with self.plot_figure(offset=-80, cache=m) as ax:
             # actual plotting functions. use builtin Neuropixels plotting functions.
             plot.plot_channelmap_block(ax, chmap=m)
             plot.plot_probe_shape(ax, m, color='k')
@@ -0,0 +1,49 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+from numpy.testing import assert_array_equal
+
+from neurocarto.util.atlas_brain import mmap_atlas_volume
+
+
+class FakeAtlas:
+    atlas_name = 'fake_atlas'
+    metadata = {'version': '1.0'}
+
+    def __init__(self, root_dir: Path):
+        self.root_dir = root_dir
+        self._reference = None
+        self.loaded = 0
+
+    @property
+    def reference(self):
+        if self._reference is None:
+            self.loaded += 1
+            self._reference = np.arange(60, dtype=np.uint16).reshape((3, 4, 5))
+        return self._reference
+
+
+class AtlasBrainTest(unittest.TestCase):
+    def test_mmap_atlas_volume(self):
+        with tempfile.TemporaryDirectory() as d:
+            d = Path(d)
+            expect = FakeAtlas(d).reference
+
+            atlas = FakeAtlas(d)
+            volume = mmap_atlas_volume(atlas, 'reference', d / 'cache')
+            self.assertEqual(1, atlas.loaded)
+            self.assertTrue((d / 'cache' / 'fake_atlas_v1.0' / 'reference.npy').exists())
+
+            atlas = FakeAtlas(d)
+            volume = mmap_atlas_volume(atlas, 'reference', d / 'cache')
+            self.assertEqual(0, atlas.loaded)
+            self.assertIsInstance(atlas.reference, np.memmap)
+            self.assertFalse(volume.flags.writeable)
+            assert_array_equal(expect, atlas.reference)
+            del volume, atlas
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+
+import numpy as np
+from numpy.testing import assert_array_equal
+
+from neurocarto.util.atlas_slice import SliceView, SliceCache, SlicePrefetcher
+
+
+def brain(shape=(6, 4, 5)):
+    reference = np.arange(np.prod(shape), dtype=np.uint16).reshape(shape)
+    return SimpleNamespace(reference=reference, annotation=reference + 1, resolution=(10, 10, 10))
+
+
+class SliceViewTest(unittest.TestCase):
+    def test_plane_flat(self):
+        b = brain()
+        for name in ('coronal', 'sagittal', 'transverse'):
+            view = SliceView(b, name)
+            self.assertIsNone(view.cache)
+            for p in (0, 2, view.n_plane - 1, view.n_plane + 2):
+                expect = view.plane(np.full((view.height, view.width), p))
+                image = view.plane(p)
+                self.assertFalse(image.flags.writeable)
+                assert_array_equal(expect, image, err_msg=f'{name}[{p}]')
+                assert_array_equal(expect, view.plane_at(p).image, err_msg=f'{name}[{p}]')
+
+    def test_plane_image_cache(self):
+        b = brain()
+        cache = SliceCache()
+        view = SliceView(b, 'coronal', cache=cache)
+        plane = view.plane_at(3).with_offset(1, 2)
+
+        image = plane.image
+        assert_array_equal(view.plane(plane.plane_offset), image)
+        self.assertEqual((0, 1, 1), (cache.hits, cache.misses, len(cache)))
+
+        self.assertIs(image, plane.image)
+        self.assertEqual((1, 1), (cache.hits, cache.misses))
+
+        annotation = plane.image_of(b.annotation)
+        assert_array_equal(image + 1, annotation)
+        self.assertEqual(2, len(cache))
+
+    def test_cache_budget(self):
+        b = brain()
+        view = SliceView(b, 'coronal', cache=None)
+        nbytes = view.plane(view.plane_at(0).with_offset(1, 1).plane_offset).nbytes
+
+        cache = SliceCache(2 * nbytes)
+        view = SliceView(b, 'coronal', cache=cache)
+        planes = [view.plane_at(p).with_offset(1, 1) for p in range(3)]
+        for plane in planes:
+            _ = plane.image
+        self.assertEqual(2, len(cache))
+        self.assertEqual(2 * nbytes, cache.size)
+
+        _ = planes[0].image
+        self.assertEqual(0, cache.hits)
+        _ = planes[2].image
+        self.assertEqual(1, cache.hits)
+
+        cache.budget = nbytes
+        self.assertEqual(1, len(cache))
+        cache.clear()
+        self.assertEqual((0, 0), (len(cache), cache.size))
+
+    def test_prefetch(self):
+        b = brain()
+        cache = SliceCache()
+        view = SliceView(b, 'coronal', cache=cache)
+        plane = view.plane_at(2).with_offset(1, 1)
+
+        prefetcher = SlicePrefetcher(2)
+        try:
+            prefetcher.prefetch(plane, 1, b.reference, b.annotation)
+            for _ in range(100):
+                if len(cache) == 4:
+                    break
+                time.sleep(0.01)
+        finally:
+            prefetcher.close()
+
+        self.assertEqual(4, len(cache))
+        image = plane.with_plane(4).image_of(b.annotation)
+        self.assertEqual(1, cache.hits)
+        assert_array_equal(view.plane(plane.with_plane(4).plane_offset, b.annotation), image)
+
+        self.assertIsNone(cache.get(view._plane_key(plane.with_plane(1)), b.reference))
+
+    def test_offset_concurrent(self):
+        view = SliceView(brain(), 'coronal')
+        errors = []
+
+        def worker(sign: int):
+            try:
+                for i in range(2000):
+                    view.offset(sign * (i % 12), i % 5)
+            except BaseException as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker, args=(sign,)) for sign in (1, -1)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual([], errors)
+        self.assertEqual(8, len(view._offset))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import unittest
+
+import numpy as np
+from numpy.testing import assert_array_equal
+
+from neurocarto.util.atlas_struct import Structures, Structure
+
+
+def structures() -> Structures:
+    return Structures(None, [
+        Structure('root', 997, 'root', (0, 0, 0), (997,)),
+        Structure('A', 8, 'A', (0, 0, 0), (997, 8)),
+        Structure('A1', 100, 'A1', (0, 0, 0), (997, 8, 100)),
+        Structure('A2', 20, 'A2', (0, 0, 0), (997, 8, 20)),
+        Structure('A2a', 5, 'A2a', (0, 0, 0), (997, 8, 20, 5)),
+        Structure('B', 300, 'B', (0, 0, 0), (997, 300)),
+    ])
+
+
+class AtlasStructuresTest(unittest.TestCase):
+    def test_getitem(self):
+        s = structures()
+        self.assertEqual('A2', s[20].acronym)
+        self.assertEqual('A2', s[np.int64(20)].acronym)
+        self.assertEqual(20, s['A2'].id)
+        with self.assertRaises(KeyError):
+            s[21]
+
+    def test_subregion_ids(self):
+        s = structures()
+        assert_array_equal(s.subregion_ids('A'), [5, 8, 20, 100])
+        assert_array_equal(s.subregion_ids('A2'), [5, 20])
+        assert_array_equal(s.subregion_ids('B'), [300])
+        self.assertEqual({it.id for it in s.iter_subregions('A')}, set(s.subregion_ids('A').tolist()))
+
+    def test_mask_region(self):
+        s = structures()
+        r = np.array([0, 997, 8, 100, 20, 5, 300, 7])
+        assert_array_equal(s.mask_region(r, 'A'), [0, 0, 1, 1, 1, 1, 0, 0])
+        assert_array_equal(s.mask_region(r, 'A2'), [0, 0, 0, 0, 1, 1, 0, 0])
+        assert_array_equal(s.mask_region(r, 'root'), [0, 1, 1, 1, 1, 1, 1, 0])
+        assert_array_equal(s.mask_region(r.reshape((2, 4)), 'B'), [[0, 0, 0, 0], [0, 0, 1, 0]])
+
+    def test_label_regions(self):
+        s = structures()
+        r = np.array([0, 100, 5, 300])
+        assert_array_equal(s.label_regions(r), [
+            [0, 0, 0, 0],
+            [997, 8, 100, 0],
+            [997, 8, 20, 5],
+            [997, 300, 0, 0],
+        ])
+        assert_array_equal(s.label_regions(r, 1), [0, 8, 8, 300])
+        assert_array_equal(s.label_regions(r, 10), [0, 0, 0, 0])
+
+    def test_image_annotation(self):
+        s = structures()
+        image = np.array([[0, 997, 8, 100], [20, 5, 300, 7]], dtype=np.uint32)
+        ret = s.image_annotation(image, {'A': 1, 'A2': 2, 'B': 3}, 0)
+        self.assertEqual(np.uint32, ret.dtype)
+        assert_array_equal(ret, [[0, 0, 1, 1], [2, 2, 3, 0]])
+
+        lut = s.region_lut({'A': 1, 'A2': 2, 'B': 3}, 0)
+        self.assertIs(lut, s.region_lut({'A': 1, 'A2': 2, 'B': 3}, 0))
+        self.assertIsNot(lut, s.region_lut({'A': 1, 'B': 3}, 0))
+
+        assert_array_equal(s.image_annotation(image, {'A2': 1, 'A': 2}, 9), [[9, 9, 2, 2], [1, 1, 9, 9]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,3 +1,4 @@
+import random
 import unittest
 from pathlib import Path
 
@@ -6,6 +7,7 @@ from numpy.typing import NDArray
 
 from neurocarto.probe_npx import NpxProbeDesp, ChannelMap, NpxElectrodeDesp
 from neurocarto.probe_npx.select import load_select
+from neurocarto.probe_npx.select_weaker import Struct, pick_electrode
 from neurocarto.util.debug import Profiler
 from neurocarto.util.util_blueprint import BlueprintFunctions
 
@@ -77,7 +79,150 @@ def make_selector_test(selector: str, module_path: str = None, suffix: str = '',
 
 
 make_selector_test('default')
+make_selector_test('default-fast')
 make_selector_test('weaker')
 
+
+class ElectrodeSelectorConsistencyTest(unittest.TestCase):
+    PROBE: NpxProbeDesp
+    CHANNELMAP: ChannelMap
+    ELECTRODES: list[NpxElectrodeDesp]
+
+    @classmethod
+    def setUpClass(cls):
+        cls.PROBE = NpxProbeDesp()
+        cls.CHANNELMAP = cls.PROBE.load_from_file(RES / 'Fig3_example.imro')
+        bp = BlueprintFunctions(cls.PROBE, cls.CHANNELMAP)
+        bp.set_blueprint(bp.load_blueprint(RES / 'Fig3_example.blueprint.npy'))
+        cls.ELECTRODES = bp.apply_blueprint()
+
+    def test_default_fast(self):
+        selector = load_select('default')
+        selector_fast = load_select('default-fast')
+
+        for seed in range(10):
+            random.seed(seed)
+            expect = selector(self.PROBE, self.CHANNELMAP, self.ELECTRODES)
+            random.seed(seed)
+            result = selector_fast(self.PROBE, self.CHANNELMAP, self.ELECTRODES)
+            self.assertEqual(expect, result)
+
+    def test_default_fast_rng(self):
+        selector = load_select('default')
+        selector_fast = load_select('default-fast')
+
+        for seed in range(10):
+            expect = selector(self.PROBE, self.CHANNELMAP, self.ELECTRODES, rng=np.random.default_rng(seed))
+            result = selector_fast(self.PROBE, self.CHANNELMAP, self.ELECTRODES, rng=np.random.default_rng(seed))
+            self.assertEqual(expect, result)
+
+    def test_weaker_rng(self):
+        selector = load_select('weaker')
+
+        for seed in range(3):
+            expect = selector(self.PROBE, self.CHANNELMAP, self.ELECTRODES, rng=np.random.default_rng(seed))
+            result = selector(self.PROBE, self.CHANNELMAP, self.ELECTRODES, rng=np.random.default_rng(seed))
+            self.assertEqual(expect, result)
+
+    def test_reselect(self):
+        probe = self.PROBE
+        random.seed(0)
+        previous = probe.select_electrodes(self.CHANNELMAP, self.ELECTRODES, selector='default-fast')
+
+        blueprint = probe.copy_electrode(self.ELECTRODES)
+        changed = [e for e in blueprint if e.electrode[0] == 0 and 100 <= e.electrode[2] < 110]
+        for e in changed:
+            e.category = NpxProbeDesp.CATE_EXCLUDED
+
+        result = probe.reselect_electrodes(previous, blueprint, changed, selector='default-fast')
+        self.assertTrue(probe.is_valid(result))
+
+        changed_rows = set(range(100 - 2, 110 + 2))
+        for e in result.electrodes:
+            if e.shank == 0:
+                self.assertNotIn(e.row, range(100, 110))
+
+        # electrodes far away from the changed region are kept.
+        kept = {(e.shank, e.column, e.row) for e in previous.electrodes if e.shank != 0 or e.row not in changed_rows}
+        self.assertLessEqual(kept, {(e.shank, e.column, e.row) for e in result.electrodes})
+
+
+class WeakerSelectTest(unittest.TestCase):
+    def test_pick_electrode(self):
+        probe = NpxProbeDesp()
+        s = Struct.new(probe, probe.new_channelmap(24))
+        s.init_probability()
+        self.assertEqual(0.5, s.candidate[pick_electrode(s, np.random.default_rng(0))])
+
+        s.candidate[10] = 0.9
+        self.assertEqual(10, pick_electrode(s))
+
+        s.add(10)
+        self.assertEqual(1, s.probability[10])
+        self.assertEqual(1, s.selected_electrode())
+        c = s.table.channels[10]
+        self.assertTrue(np.all(s.candidate[s.table.channels == c] == 0))
+
+        s.candidate[:] = 0
+        self.assertIsNone(pick_electrode(s))
+
+
+class BatchSelectTest(unittest.TestCase):
+    PROBE: NpxProbeDesp
+    CHANNELMAP: ChannelMap
+    BLUEPRINT: NDArray[np.int_]
+
+    @classmethod
+    def setUpClass(cls):
+        cls.PROBE = NpxProbeDesp()
+        cls.CHANNELMAP = cls.PROBE.load_from_file(RES / 'Fig3_example.imro')
+        bp = BlueprintFunctions(cls.PROBE, cls.CHANNELMAP)
+        cls.BLUEPRINT = bp.load_blueprint(RES / 'Fig3_example.blueprint.npy')
+
+    def test_batch_select(self):
+        from neurocarto.probe_npx.select_batch import batch_select
+        from neurocarto.probe_npx.stat import npx_channel_efficiency
+
+        bp = BlueprintFunctions(self.PROBE, self.CHANNELMAP)
+        result = batch_select(self.CHANNELMAP, self.BLUEPRINT, 20, batch_size=8, rng=np.random.default_rng(0))
+        self.assertEqual((20, len(bp)), result.selected.shape)
+        self.assertTrue(np.all(result.complete()))
+
+        aeff, ceff = result.efficiency()
+        for i in range(len(result)):
+            chmap = result.channelmap(i)
+            self.assertTrue(self.PROBE.is_valid(chmap))
+            expect = npx_channel_efficiency(bp, chmap, self.BLUEPRINT)
+            self.assertAlmostEqual(expect[0], aeff[i])
+            self.assertAlmostEqual(expect[1], ceff[i])
+
+    def test_batch_table_columns(self):
+        from neurocarto.probe_npx.select_batch import batch_table
+
+        probe_type = self.CHANNELMAP.probe_type
+        self.assertEqual(2, probe_type.n_col_shank)
+        batch_table(probe_type)
+
+        with self.assertRaises(ValueError):
+            batch_table(probe_type._replace(n_col_shank=4))
+
+    def test_channel_efficiency_scorer(self):
+        from neurocarto.probe_npx.stat import NpxChannelEfficiency, npx_request_electrode
+
+        bp = BlueprintFunctions(self.PROBE, self.CHANNELMAP)
+        scorer = NpxChannelEfficiency.new(self.CHANNELMAP, self.BLUEPRINT)
+        self.assertEqual(npx_request_electrode(bp, self.BLUEPRINT), scorer.requested)
+
+        aeff, ceff = scorer(self.CHANNELMAP)
+        self.assertAlmostEqual(0.8336448598130841, aeff)
+        self.assertAlmostEqual(0.8336448598130841, ceff)
+
+        selected = np.zeros((2, len(bp)), dtype=bool)
+        selected[0, bp.selected_electrodes(self.CHANNELMAP)] = True
+        aeff, ceff = scorer.score_matrix(selected)
+        self.assertAlmostEqual(0.8336448598130841, ceff[0])
+        self.assertEqual(0, ceff[1])
+
+
 if __name__ == '__main__':
     unittest.main()
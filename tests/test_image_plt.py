@@ -0,0 +1,179 @@
+import threading
+import unittest
+
+import matplotlib
+
+matplotlib.use('agg')
+
+import matplotlib.pyplot as plt
+import numpy as np
+from bokeh.plotting import figure as bokeh_figure
+from numpy.testing import assert_array_equal
+
+from neurocarto.config import parse_cli
+from neurocarto.probe_npx import ChannelMap
+from neurocarto.views.image_plt import get_current_plt_image, PltRenderer, PltImageCache, Boundary, plt_content_key, \
+    PltImageView
+
+
+class DummyPltImageView(PltImageView):
+    pass
+
+
+class PltImageTest(unittest.TestCase):
+
+    def test_agg_image(self):
+        fg, ax = plt.subplots(figsize=(2, 4))
+        try:
+            ax.plot([0, 1], [0, 1])
+            ax.imshow(np.arange(100).reshape((10, 10)))
+
+            for transparent in (True, False):
+                image = get_current_plt_image(fg, transparent=transparent)
+                # extra savefig kwargs fall back to savefig(format='raw')
+                expect = get_current_plt_image(fg, transparent=transparent, bbox_inches=None)
+                self.assertEqual((400, 200), image.shape)
+                self.assertEqual(np.uint32, image.dtype)
+                assert_array_equal(image, expect)
+        finally:
+            plt.close(fg)
+
+    def test_plot_figure(self):
+        view = DummyPltImageView(parse_cli([]))
+        view.setup(bokeh_figure())
+
+        with view.plot_figure() as ax:
+            ax.plot([0, 1], [0, 1])
+
+        # not managed by pyplot
+        self.assertEqual([], plt.get_fignums())
+
+        # figure size from image_plt.matplotlibrc
+        self.assertEqual((2200, 500), view._image.image.shape)
+
+    def test_plot_figure_rc(self):
+        view = DummyPltImageView(parse_cli([]))
+        view.setup(bokeh_figure())
+
+        with view.plot_figure(transparent=False) as ax:
+            ax.plot(np.arange(10), np.arange(10) ** 2)
+            ax.set_title('title')
+        fg = ax.figure
+
+        # rendered outside rc_context, but the same as rendered inside it.
+        with matplotlib.rc_context(fname=view._plt_rc_file):
+            expect = get_current_plt_image(fg, transparent=False)
+        assert_array_equal(expect, view._image.image)
+
+    def test_cleanup(self):
+        view = DummyPltImageView(parse_cli([]))
+        renderer = view._plt_renderer = PltRenderer()
+        renderer.submit(lambda: None, lambda value, error: None)
+        thread = renderer._thread
+
+        view.cleanup()
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+        self.assertIsNone(view._plt_renderer)
+
+    def test_plot_figure_cached(self):
+        view = DummyPltImageView(parse_cli([]))
+        view.setup(bokeh_figure())
+        plotted = []
+
+        for _ in range(2):
+            if not view.cached_figure(cache='test_plot_figure_cached'):
+                with view.plot_figure(cache='test_plot_figure_cached') as ax:
+                    ax.plot([0, 1], [0, 1])
+                    plotted.append(True)
+            self.assertEqual((2200, 500), view._image.image.shape)
+
+        self.assertEqual([True], plotted)
+        self.assertFalse(view.cached_figure(cache='test_plot_figure_cached', offset=10, transparent=False))
+
+    def test_renderer_drop_superseded(self):
+        renderer = PltRenderer()
+        started = threading.Event()
+        release = threading.Event()
+        done = threading.Event()
+        result = []
+
+        def blocking():
+            started.set()
+            release.wait(5)
+            return 1
+
+        def callback(value, error):
+            self.assertIsNone(error)
+            result.append(value)
+            if value == 3:
+                done.set()
+
+        try:
+            renderer.submit(blocking, callback)
+            self.assertTrue(started.wait(5))
+            renderer.submit(lambda: 2, callback)
+            renderer.submit(lambda: 3, callback)
+            release.set()
+            self.assertTrue(done.wait(5))
+        finally:
+            renderer.close()
+
+        self.assertEqual([1, 3], result)
+
+    def test_renderer_error(self):
+        renderer = PltRenderer()
+        done = threading.Event()
+        result = []
+
+        def failing():
+            raise RuntimeError()
+
+        def callback(value, error):
+            result.append((value, type(error)))
+            done.set()
+
+        try:
+            renderer.submit(failing, callback)
+            self.assertTrue(done.wait(5))
+        finally:
+            renderer.close()
+
+        self.assertEqual([(None, RuntimeError)], result)
+
+    def test_content_key(self):
+        blueprint = np.zeros((100,), dtype=int)
+        chmap = ChannelMap(24)
+        key = plt_content_key(chmap, blueprint, dict(offset=0))
+
+        self.assertEqual(key, plt_content_key(ChannelMap(24), blueprint.copy(), dict(offset=0)))
+        self.assertNotEqual(key, plt_content_key(chmap, blueprint, dict(offset=1)))
+        self.assertNotEqual(key, plt_content_key(ChannelMap(21), blueprint, dict(offset=0)))
+        self.assertNotEqual(key, plt_content_key(chmap, blueprint.astype(float), dict(offset=0)))
+
+        blueprint[0] = 1
+        self.assertNotEqual(key, plt_content_key(chmap, blueprint, dict(offset=0)))
+
+        self.assertIsNone(plt_content_key(lambda: 0))
+
+    def test_image_cache(self):
+        boundary = Boundary((10, 10), (0, 0, 1, 1), (0, 1), (0, 1))
+        image = np.zeros((10, 10), dtype=np.uint32)
+        cache = PltImageCache(budget=image.nbytes * 2)
+
+        self.assertIsNone(cache.get(b'a'))
+        cache.put(b'a', image, boundary)
+        self.assertFalse(image.flags.writeable)
+        cache.put(b'b', image.copy(), boundary)
+
+        self.assertIs(cache.get(b'a')[0], image)
+        cache.put(b'c', image.copy(), boundary)  # evict b
+        self.assertIn(b'a', cache)
+        self.assertNotIn(b'b', cache)
+        self.assertEqual(2, len(cache))
+        self.assertEqual(image.nbytes * 2, cache.size)
+        self.assertEqual((1, 1), (cache.hits, cache.misses))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,6 +5,7 @@ import numpy as np
 from numpy.testing import assert_array_equal
 
 from neurocarto.probe_npx import NpxProbeDesp, ChannelMap, ProbeType
+from neurocarto.probe_npx.npx import ChannelHasUsedError
 from neurocarto.util.debug import Profiler
 from neurocarto.util.util_blueprint import BlueprintFunctions
 
@@ -194,6 +195,175 @@ class ProbeChannelElectrodeMappingTest(unittest.TestCase):
         ])
 
 
+class ChannelMapTest(unittest.TestCase):
+    def test_add_electrode(self):
+        chmap = ChannelMap(24)
+        self.assertEqual(0, len(chmap))
+
+        e = chmap.add_electrode((0, 1, 0))
+        self.assertEqual((0, 1, 0), (e.shank, e.column, e.row))
+        self.assertEqual(1, len(chmap))
+        self.assertIs(e, chmap.channels[1])
+        assert_array_equal([0, 1, 0], chmap.channel_position[1])
+
+        # same position
+        self.assertIs(e, chmap.add_electrode((0, 1, 0), exist_ok=True))
+        with self.assertRaises(ChannelHasUsedError):
+            chmap.add_electrode((0, 1, 0))
+
+        # same channel, different position
+        with self.assertRaises(ChannelHasUsedError):
+            chmap.add_electrode((0, 1, 192))
+        assert_array_equal([0, 1, 0], chmap.channel_position[1])
+
+        with self.assertRaises(ValueError):
+            chmap.add_electrode((4, 0, 0))
+
+    def test_del_electrode(self):
+        chmap = ChannelMap(24)
+        e = chmap.add_electrode((0, 0, 0))
+        chmap.add_electrode((1, 0, 0))
+
+        self.assertIsNone(chmap.del_electrode((0, 0, 192)))  # same channel, not in map
+        self.assertEqual(2, len(chmap))
+
+        self.assertIs(e, chmap.del_electrode((0, 0, 0)))
+        self.assertIsNone(chmap.channels[0])
+        assert_array_equal([-1, -1, -1], chmap.channel_position[0])
+        self.assertEqual(1, len(chmap))
+        self.assertIsNone(chmap.del_electrode((0, 0, 0)))
+
+        # channel is free again
+        chmap.add_electrode((0, 0, 192))
+        assert_array_equal([0, 0, 192], chmap.channel_position[0])
+
+    def test_contains(self):
+        chmap = ChannelMap(24)
+        chmap.add_electrode((0, 1, 0))
+
+        self.assertIn((0, 1, 0), chmap)
+        self.assertIn(chmap.channels[1], chmap)
+        self.assertNotIn((0, 1, 192), chmap)
+        self.assertNotIn((0, 5, 0), chmap)  # out of range
+        self.assertIn(None, chmap)
+
+        for e in range(chmap.n_channels):
+            chmap.add_electrode(e, exist_ok=True)
+        self.assertNotIn(None, chmap)
+
+    def test_eq_hash(self):
+        a = ChannelMap(24)
+        b = ChannelMap(24)
+        for e in [(0, 0, 0), (1, 1, 0), (2, 0, 10)]:
+            a.add_electrode(e)
+        for e in [(2, 0, 10), (0, 0, 0), (1, 1, 0)]:
+            b.add_electrode(e)
+
+        self.assertEqual(a, b)
+        self.assertEqual(hash(a), hash(b))
+        self.assertEqual(a, ChannelMap(a))
+
+        b.del_electrode((2, 0, 10))
+        self.assertNotEqual(a, b)
+
+        c = ChannelMap(a)
+        c.reference = 1
+        self.assertNotEqual(a, c)
+        self.assertNotEqual(a, ChannelMap(21))
+        self.assertNotEqual(a, None)
+
+    def test_copy(self):
+        a = ChannelMap(24)
+        a.add_electrode((0, 0, 0))
+        b = ChannelMap(a)
+        b.add_electrode((0, 1, 0))
+
+        self.assertEqual(1, len(a))
+        self.assertEqual(2, len(b))
+        assert_array_equal([-1, -1, -1], a.channel_position[1])
+
+    def test_channel_position(self):
+        chmap = ChannelMap(24)
+        pos = chmap.channel_position
+        self.assertEqual((chmap.n_channels, 3), pos.shape)
+        self.assertFalse(pos.flags.writeable)
+        self.assertTrue(np.all(pos == -1))
+
+        # a view, which reflects later changes.
+        chmap.add_electrode((0, 1, 0))
+        assert_array_equal([0, 1, 0], pos[1])
+
+    def test_channels_accessor(self):
+        chmap = ChannelMap(24)
+        chmap.add_electrode((0, 0, 0))
+        chmap.add_electrode((0, 1, 0))
+
+        self.assertIn(0, chmap.channels)
+        self.assertNotIn(2, chmap.channels)
+        self.assertEqual([(0, 0, 0), (0, 1, 0)], [(e.shank, e.column, e.row) for e in chmap.channels[0:2]])
+
+        del chmap.channels[0]
+        self.assertIsNone(chmap.channels[0])
+        assert_array_equal([-1, -1, -1], chmap.channel_position[0])
+        self.assertNotIn((0, 0, 0), chmap)
+        self.assertEqual(1, len(chmap))
+
+    def test_electrodes_accessor(self):
+        chmap = ChannelMap(24)
+        for e in [(0, 0, 0), (0, 1, 0), (1, 0, 0), (1, 1, 1)]:
+            chmap.add_electrode(e)
+
+        electrodes = chmap.electrodes
+        self.assertEqual(4, len(electrodes))
+        self.assertIn((0, 0, 0), electrodes)
+        self.assertNotIn((0, 0, 192), electrodes)
+        self.assertIn((1, None, None), electrodes)
+        self.assertNotIn((2, None, None), electrodes)
+
+        self.assertEqual((0, 1, 0), tuple(chmap.channel_position[1]))
+        self.assertEqual(2, len(electrodes[1, None, None]))
+        self.assertEqual(2, len(electrodes[None, 1, None]))
+        self.assertEqual(4, len(electrodes[None, None, None]))
+        self.assertEqual(3, len(electrodes[None, None, 0]))
+
+        e = electrodes[1, 1, 1]
+        self.assertEqual((1, 1, 1), (e.shank, e.column, e.row))
+        self.assertIsNone(electrodes[1, 1, 0])
+
+        del electrodes[1, None, None]
+        self.assertEqual(2, len(chmap))
+        self.assertNotIn((1, 0, 0), chmap)
+
+    def test_electrodes_del_exact(self):
+        chmap = ChannelMap(24)
+        chmap.add_electrode((0, 0, 0))
+        chmap.add_electrode((0, 1, 0))
+
+        # electrode not in map, but its channel is used.
+        del chmap.electrodes[0, 0, 192]
+        self.assertEqual(2, len(chmap))
+
+        # it was a no-op before, when given an exact position.
+        del chmap.electrodes[0, 0, 0]
+        self.assertEqual(1, len(chmap))
+        self.assertNotIn((0, 0, 0), chmap)
+        assert_array_equal([-1, -1, -1], chmap.channel_position[0])
+
+
+class NpxProbeDespTest(unittest.TestCase):
+    def test_reset_electrode_state(self):
+        from neurocarto.probe import ProbeDesp
+
+        desp = NpxProbeDesp()
+        chmap = ChannelMap.from_imro(RES / 'Fig3_example.imro')
+
+        for electrodes in [desp.all_electrodes(chmap), desp.all_electrodes(chmap)[::3]]:
+            expect = desp.copy_electrode(electrodes)
+            ProbeDesp.reset_electrode_state(desp, chmap, expect)
+            desp.reset_electrode_state(chmap, electrodes)
+            self.assertListEqual([it.state for it in expect], [it.state for it in electrodes])
+
+
 class NpxProbeBenchmark(unittest.TestCase):
     profile: Profiler | None
 
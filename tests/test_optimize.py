@@ -0,0 +1,135 @@
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from neurocarto.probe_npx import NpxProbeDesp, ChannelMap
+from neurocarto.util.edit.optimize import iter_optimize_channelmap, _optimize_channelmap, generate_channelmap
+from neurocarto.util.util_blueprint import BlueprintFunctions
+from neurocarto.util.util_pool import CancelFlag, get_pool, use_pool, shutdown_pool
+
+if (res := Path('res')).exists():
+    RES = res
+elif (res := Path('../res')).exists():
+    RES = res
+else:
+    raise RuntimeError()
+
+
+class IterOptimizeTest(unittest.TestCase):
+    PROBE: NpxProbeDesp
+    CHANNELMAP: ChannelMap
+    BLUEPRINT: np.ndarray
+
+    @classmethod
+    def setUpClass(cls):
+        cls.PROBE = NpxProbeDesp()
+        cls.CHANNELMAP = cls.PROBE.load_from_file(RES / 'Fig3_example.imro')
+        bp = BlueprintFunctions(cls.PROBE, cls.CHANNELMAP)
+        cls.BLUEPRINT = bp.load_blueprint(RES / 'Fig3_example.blueprint.npy')
+
+    def setUp(self):
+        self.bp = BlueprintFunctions(self.PROBE, self.CHANNELMAP)
+
+    def iter_optimize(self, sample_times=20, **kwargs):
+        kwargs.setdefault('chunk_size', 4)
+        kwargs.setdefault('seed', 0)
+        kwargs.setdefault('selector', 'default-fast')
+        return list(iter_optimize_channelmap(self.bp, self.CHANNELMAP, self.BLUEPRINT, sample_times, **kwargs))
+
+    def test_best_so_far(self):
+        result = self.iter_optimize(20)
+        self.assertEqual(5, len(result))
+        self.assertEqual([4, 8, 12, 16, 20], [it.sample_times for it in result])
+
+        ceff = [it.ceff for it in result]
+        self.assertEqual(sorted(ceff), ceff)
+        for it in result:
+            self.assertTrue(self.PROBE.is_valid(it.channelmap))
+
+    def test_same_seed(self):
+        a = self.iter_optimize(12, seed=1)[-1]
+        b = self.iter_optimize(12, seed=1)[-1]
+        self.assertEqual(a.channelmap, b.channelmap)
+        self.assertEqual((a.aeff, a.ceff), (b.aeff, b.ceff))
+
+    def test_target(self):
+        result = self.iter_optimize(40, target=0)
+        self.assertEqual(1, len(result))
+        self.assertEqual(4, result[-1].sample_times)
+
+    def test_patience(self):
+        result = self.iter_optimize(400, patience=8)
+        self.assertLess(result[-1].sample_times, 400)
+
+        # stop right after 8 samples without improvement.
+        last = result[-1]
+        improved = min(it.sample_times for it in result if it.channelmap is last.channelmap)
+        self.assertEqual(improved + 8, last.sample_times)
+
+    def test_batch_rng(self):
+        a = self.iter_optimize(12, batch_size=4, seed=None, rng=np.random.default_rng(1))
+        b = self.iter_optimize(12, batch_size=4, seed=None, rng=np.random.default_rng(1))
+        self.assertEqual([4, 8, 12], [it.sample_times for it in a])
+        self.assertEqual(a[-1].channelmap, b[-1].channelmap)
+
+        maps_a, _, ceff_a = generate_channelmap(self.bp, self.CHANNELMAP, self.BLUEPRINT, 8,
+                                                batch_size=4, rng=np.random.default_rng(1))
+        maps_b, _, ceff_b = generate_channelmap(self.bp, self.CHANNELMAP, self.BLUEPRINT, 8,
+                                                batch_size=4, rng=np.random.default_rng(1))
+        self.assertEqual(8, len(maps_a))
+        self.assertEqual(maps_a, maps_b)
+        np.testing.assert_array_equal(ceff_a, ceff_b)
+
+    def test_seed_and_rng(self):
+        with self.assertRaises(ValueError):
+            self.iter_optimize(4, seed=0, rng=np.random.default_rng(0))
+        with self.assertRaises(ValueError):
+            generate_channelmap(self.bp, self.CHANNELMAP, self.BLUEPRINT, 4,
+                                batch_size=4, seed=0, rng=np.random.default_rng(0))
+
+    def test_pool_replaced(self):
+        result = iter_optimize_channelmap(self.bp, self.CHANNELMAP, self.BLUEPRINT, 16, n_worker=2,
+                                          chunk_size=2, seed=0, selector='default-fast')
+        try:
+            self.assertEqual(2, next(result).sample_times)
+            get_pool(3)  # replace the pool used by result
+            self.assertEqual(16, list(result)[-1].sample_times)
+        finally:
+            shutdown_pool()
+
+    def test_cancel(self):
+        cancel = CancelFlag.new()
+        self.assertFalse(cancel.cancelled)
+        cancel.cancel()
+        self.assertTrue(cancel.cancelled)
+        cancel.cancel()
+
+        chmap, aeff, ceff = _optimize_channelmap(self.bp, self.CHANNELMAP, self.BLUEPRINT, 100, cancel,
+                                                 selector='default-fast')
+        self.assertIs(chmap, self.CHANNELMAP)
+
+
+class PoolTest(unittest.TestCase):
+    def tearDown(self):
+        shutdown_pool()
+
+    def test_use_pool_replaced(self):
+        with use_pool(1) as pool:
+            self.assertIs(pool, get_pool(1))
+            self.assertIsNot(pool, get_pool(2))
+
+            # still usable after it is replaced.
+            self.assertEqual(1, pool.apply(int, ('1',)))
+
+        with self.assertRaises(ValueError):
+            pool.apply_async(int, ('1',))
+
+    def test_use_pool_current(self):
+        with use_pool(1) as pool:
+            pass
+        self.assertIs(pool, get_pool(1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,8 +2,9 @@ import unittest
 from pathlib import Path
 from typing import Generic
 
-from neurocarto.probe import ProbeDesp, M, E
+from neurocarto.probe import ProbeDesp, ElectrodeDesp, M, E
 from neurocarto.probe_npx import NpxProbeDesp, ChannelMap
+from neurocarto.probe_npx.desp import NpxElectrodeDesp
 
 if (res := Path('res')).exists():
     RES = res
@@ -133,5 +134,65 @@ class NpxProbeDespTest(ProbeDespTest[NpxProbeDesp, ChannelMap], unittest.TestCas
         self.chmap = ChannelMap.from_imro(self.chmap_file)
 
 
+class PlainElectrodeDesp(ElectrodeDesp):
+    # does not call super().__init__()
+    def __init__(self, electrode=None):
+        self.electrode = electrode
+
+
+class ElectrodeDespTest(unittest.TestCase):
+    def test_default_state(self):
+        e = PlainElectrodeDesp(0)
+        self.assertEqual(0, e.state)
+        self.assertEqual(0, e.category)
+
+        e.state = 1
+        self.assertEqual(1, e.state)
+        self.assertEqual(0, PlainElectrodeDesp().state)
+
+    def test_copy_slots(self):
+        e = NpxElectrodeDesp()
+        e.s, e.x, e.y = 1, 32, 15
+        e.electrode = (1, 0, 1)
+        e.channel = 10
+        e.state = NpxProbeDesp.STATE_USED
+        e.category = NpxProbeDesp.CATE_SET
+
+        c = NpxElectrodeDesp().copy(e)
+        self.assertEqual((1, 32, 15), (c.s, c.x, c.y))
+        self.assertEqual(((1, 0, 1), 10), (c.electrode, c.channel))
+        self.assertEqual((NpxProbeDesp.STATE_USED, NpxProbeDesp.CATE_SET), (c.state, c.category))
+
+        c = NpxElectrodeDesp().copy(e, category=NpxProbeDesp.CATE_LOW)
+        self.assertEqual(NpxProbeDesp.CATE_LOW, c.category)
+        self.assertEqual(NpxProbeDesp.CATE_SET, e.category)
+
+    def test_copy_unset_slot(self):
+        e = NpxElectrodeDesp()
+        e.electrode = (0, 0, 0)
+
+        c = NpxElectrodeDesp().copy(e)
+        self.assertEqual((0, 0, 0), c.electrode)
+        self.assertFalse(hasattr(c, 'channel'))
+        self.assertEqual(0, c.state)
+
+    def test_copy_dict(self):
+        e = PlainElectrodeDesp(0)
+        e.channel = 2
+        e.category = 3
+        e.extra = [1]
+        e._private = 1
+
+        c = PlainElectrodeDesp().copy(e)
+        self.assertEqual((0, 2, 0, 3), (c.electrode, c.channel, c.state, c.category))
+        self.assertIs(e.extra, c.extra)
+        self.assertFalse(hasattr(c, '_private'))
+
+        # copy between different electrode types
+        c = NpxElectrodeDesp().copy(e, extra=None)
+        self.assertEqual((0, 2, 0, 3), (c.electrode, c.channel, c.state, c.category))
+        self.assertEqual(None, getattr(c, 'extra'))
+
+
 if __name__ == '__main__':
     unittest.main()
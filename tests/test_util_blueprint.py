@@ -114,6 +114,49 @@ class UtilBlueprintTest(unittest.TestCase):
         ])
         assert_array_equal(bp.index_blueprint(electrode), i)
 
+    def test_electrode_index(self):
+        bp = bp_from_shape((2, 40, 2))
+        electrode = np.column_stack([bp.s, bp.x, bp.y]).reshape((2, 2, -1, 3))
+        electrode[0, 0, 0] = (2, 0, 0)
+
+        i = np.arange(len(bp)).reshape((2, 2, -1))
+        i[0, 0, 0] = -1
+        assert_array_equal(bp.electrode_index(electrode), i)
+        assert_array_equal(bp.index_blueprint(electrode.reshape((-1, 3))), np.arange(1, len(bp)))
+
+    def test_grid(self):
+        bp = bp_from_shape((2, 3, 2))
+        grid = bp.grid
+        self.assertEqual((2, 2, 3), grid.shape)
+        self.assertTrue(np.all(grid.valid))
+
+        a = np.arange(len(bp))
+        g = grid.to_grid(a)
+        assert_array_equal(g[1, :, 0], [6, 7])
+        assert_array_equal(grid.from_grid(g), a)
+
+        assert_array_equal(grid.index_of([0, 1, 1, 2], [1, 0, 2, 0], [2, 1, 0, 0]), [5, 8, -1, -1])
+
+    def test_shared_geometry(self):
+        probe = NpxProbeDesp()
+        chmap = probe.new_channelmap(24)
+        a = BlueprintFunctions(probe, chmap)
+        b = BlueprintFunctions(NpxProbeDesp(), probe.new_channelmap(24))
+
+        self.assertIs(a.s, b.s)
+        self.assertIs(a.grid, b.grid)
+        self.assertFalse(a.s.flags.writeable)
+
+        a[0] = a.CATE_SET
+        self.assertEqual(a.blueprint()[0], a.CATE_SET)
+        self.assertEqual(b.blueprint()[0], b.CATE_UNSET)
+
+        self.assertIsNot(a.electrodes, b.electrodes)
+        self.assertEqual(len(a.electrodes), len(b.electrodes))
+
+        c = BlueprintFunctions(probe, probe.new_channelmap(21))
+        self.assertIsNot(a.s, c.s)
+
     def test_blueprint_merge(self):
         bp = bp_from_shape((1, 4, 2))
         x = bp.CATE_UNSET
@@ -472,6 +515,54 @@ class UtilBlueprintTestMoving(unittest.TestCase, UtilBlueprintCommon):
             0, 1,
         ]))
 
+    def test_extend_categories(self):
+        bp = bp_from_shape((1, 6, 2))
+
+        blueprint = np.array([
+            1, 1,
+            0, 0,
+            0, 0,
+            0, 0,
+            2, 2,
+            0, 0,
+        ])
+        assert_array_equal(bp.extend(blueprint, category=[1, 2], step=2), np.array([
+            1, 1,
+            1, 1,
+            1, 1,
+            2, 2,
+            2, 2,
+            2, 2,
+        ]))
+        assert_array_equal(bp.extend(blueprint, category=[2, 1], step=2, value=[3, 4]), np.array([
+            1, 1,
+            4, 4,
+            3, 3,
+            3, 3,
+            2, 2,
+            3, 3,
+        ]))
+
+    def test_reduce_categories(self):
+        bp = bp_from_shape((1, 6, 2))
+
+        blueprint = np.array([
+            1, 1,
+            1, 1,
+            1, 1,
+            2, 2,
+            2, 2,
+            2, 2,
+        ])
+        assert_array_equal(bp.reduce(blueprint, category=[1, 2], step=1), np.array([
+            0, 0,
+            1, 1,
+            0, 0,
+            0, 0,
+            2, 2,
+            0, 0,
+        ]))
+
     def test_reduce(self):
         bp = bp_from_shape((1, 7, 2))
 
@@ -598,6 +689,20 @@ class UtilBlueprintTestClustering(unittest.TestCase, UtilBlueprintCommon):
             1, 1, 4,
         ]))
 
+    def test_find_clustering_snake(self):
+        bp = bp_from_shape((2, 5, 5))
+
+        blueprint = np.array([
+            1, 1, 1, 1, 1,
+            0, 0, 0, 0, 1,
+            1, 1, 1, 0, 1,
+            1, 0, 0, 0, 1,
+            1, 1, 1, 1, 1,
+        ] * 2)
+
+        clustering = bp.find_clustering(blueprint, diagonal=False)
+        assert_array_equal(clustering, np.where(blueprint == 0, 0, np.repeat([1, 26], 25)))
+
     def test_clustering_edges_single(self):
         bp = bp_from_shape((1, 3, 3))
         blueprint = np.array([
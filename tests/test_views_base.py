@@ -0,0 +1,46 @@
+import unittest
+
+import numpy as np
+from numpy.testing import assert_array_equal
+
+from neurocarto.probe_npx.desp import NpxProbeDesp
+from neurocarto.views.base import ProbeUpdate
+
+
+class ProbeUpdateTest(unittest.TestCase):
+    def test_blueprint_snapshot(self):
+        probe = NpxProbeDesp()
+        chmap = probe.new_channelmap(24)
+        electrodes = probe.all_electrodes(chmap)
+        update = ProbeUpdate(probe, chmap, electrodes)
+
+        # built on the first access
+        self.assertNotIn('_bp', update.__dict__)
+
+        for e in electrodes:
+            e.category = NpxProbeDesp.CATE_SET
+
+        assert_array_equal(np.zeros(len(electrodes)), update.blueprint)
+        self.assertFalse(update.blueprint.flags.writeable)
+
+    def test_blueprint_subset(self):
+        probe = NpxProbeDesp()
+        chmap = probe.new_channelmap(24)
+        electrodes = probe.all_electrodes(chmap)
+        electrodes[10].category = NpxProbeDesp.CATE_SET
+        electrodes[20].category = NpxProbeDesp.CATE_EXCLUDED
+
+        update = ProbeUpdate(probe, chmap, electrodes[20:5:-5])
+        expect = np.full(len(electrodes), NpxProbeDesp.CATE_UNSET)
+        expect[[10, 20]] = [NpxProbeDesp.CATE_SET, NpxProbeDesp.CATE_EXCLUDED]
+        assert_array_equal(expect, update.blueprint)
+
+    def test_no_channelmap(self):
+        probe = NpxProbeDesp()
+        update = ProbeUpdate(probe, None, None)
+        with self.assertRaises(RuntimeError):
+            _ = update.blueprint
+
+
+if __name__ == '__main__':
+    unittest.main()
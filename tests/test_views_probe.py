@@ -0,0 +1,40 @@
+import unittest
+
+from bokeh.models import ColumnDataSource
+from bokeh.plotting import figure
+
+from neurocarto.config import parse_cli
+from neurocarto.probe_npx.desp import NpxProbeDesp
+from neurocarto.views.probe import ProbeView
+
+
+class ProbeViewCaptureTest(unittest.TestCase):
+    def setUp(self):
+        self.view = ProbeView(parse_cli([]), NpxProbeDesp())
+        self.view.setup(figure())
+        self.view.reset(24)
+
+    def test_capture_state(self):
+        view = self.view
+        view.electrodes[2].state = NpxProbeDesp.STATE_USED
+        view.update_electrode()
+
+        view.set_capture_electrodes([1, 2, 3])
+        self.assertEqual([2], view.get_captured_electrodes_index(NpxProbeDesp.STATE_USED, reset=True))
+        self.assertEqual([1, 3], view.get_captured_electrodes_index())
+
+    def test_capture_source(self):
+        view = self.view
+        view.set_capture_electrodes([1, 2, 3], view.data_electrodes)
+        self.assertEqual([1, 2, 3], view.get_captured_electrodes_index(view.data_electrodes))
+        self.assertEqual(set(view.electrodes[1:4]), view.get_captured_electrodes(view.data_electrodes))
+
+        view.clear_capture_electrode(view.data_electrodes)
+        self.assertEqual([], view.get_captured_electrodes_index())
+
+        with self.assertRaises(ValueError):
+            view.get_captured_electrodes_index(ColumnDataSource())
+
+
+if __name__ == '__main__':
+    unittest.main()